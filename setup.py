@@ -13,5 +13,10 @@ setup(
         '': 'src',
     },
     install_requires=['python-stdnet', 'Django'],
+    extras_require={
+        'numpy': ['numpy'],
+        'msgpack': ['msgpack>=0.5.2'],
+        'inmemory': ['lupa'],
+    },
     tests_require=['mock', 'freezegun'],
 )
@@ -0,0 +1,55 @@
+from stdnet.utils import native_str
+
+
+class Aggregate(object):
+    """reduction of values of a field, computed by the server"""
+    function = None
+
+    def __init__(self, field):
+        self.field = field
+
+    @property
+    def default_alias(self):
+        return '%s__%s' % (self.field, self.function)
+
+    def convert(self, field, value, backend=None):
+        value = native_str(value)
+        if value == '':
+            return None
+        try:
+            return field.to_python(value, backend)
+        except ValueError:
+            # large number in exponent notation
+            return field.to_python(float(value), backend)
+
+
+class Sum(Aggregate):
+    function = 'sum'
+
+
+class Avg(Aggregate):
+    function = 'avg'
+
+    def convert(self, field, value, backend=None):
+        value = native_str(value)
+        if value == '':
+            return None
+        return float(value)
+
+
+class Min(Aggregate):
+    function = 'min'
+
+
+class Max(Aggregate):
+    function = 'max'
+
+
+class Count(Aggregate):
+    function = 'count'
+
+    def convert(self, field, value, backend=None):
+        return int(value)
+
+
+__all__ = ['Sum', 'Avg', 'Min', 'Max', 'Count']
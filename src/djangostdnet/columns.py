@@ -0,0 +1,134 @@
+from collections import OrderedDict
+
+import numpy as np
+from stdnet import odm
+from stdnet.utils import zip
+from .fields import DecimalField, IPAddressField
+
+
+class Columns(OrderedDict):
+    """arrays by field name, with categories of arrays of codes"""
+    def __init__(self, *args, **kwargs):
+        super(Columns, self).__init__(*args, **kwargs)
+        self.categories = {}
+
+
+class NumberColumn(object):
+    """float64 array, or int64 or bool one if no value is missing. NaN for missing float"""
+    def __init__(self, field, dtype):
+        self.field = field
+        self.dtype = dtype
+        self.chunks = []
+        self.missing = False
+
+    def append(self, values, backend):
+        array = np.array(values, dtype=object)
+        missing = np.equal(array, None) | np.equal(array, b'') | np.equal(array, '')
+        array[missing] = 'nan'
+        if self.dtype is int:
+            # integers above 2 ** 53 are exact in int64 only, so converted as a whole at build
+            self.chunks.append(array)
+        else:
+            self.chunks.append(array.astype(np.float64))
+        self.missing = self.missing or bool(missing.any())
+
+    def build(self):
+        if self.dtype is int:
+            array = np.concatenate(self.chunks) if self.chunks else np.array([], dtype=object)
+            return array.astype(np.float64 if self.missing else np.int64)
+        array = np.concatenate(self.chunks) if self.chunks else np.array([], dtype=np.float64)
+        if self.dtype is bool:
+            return np.nan_to_num(array) != 0
+        return array
+
+
+class CategoryColumn(object):
+    """int32 array of codes to categories, -1 for missing"""
+    def __init__(self, field):
+        self.field = field
+        self.chunks = []
+        self.codes = {}
+        self.categories = []
+
+    def append(self, values, backend):
+        array = np.array(values, dtype=object)
+        present = ~(np.equal(array, None) | np.equal(array, b'') | np.equal(array, ''))
+        codes = np.empty(len(array), dtype=np.int32)
+        codes.fill(-1)
+        if present.any():
+            uniques, inverse = np.unique(array[present], return_inverse=True)
+            mapping = np.array([self._code(value, backend) for value in uniques], dtype=np.int32)
+            codes[present] = mapping[inverse]
+        self.chunks.append(codes)
+
+    def _code(self, value, backend):
+        if value not in self.codes:
+            self.codes[value] = len(self.categories)
+            self.categories.append(self.field.to_python(value, backend))
+        return self.codes[value]
+
+    def build(self):
+        return np.concatenate(self.chunks) if self.chunks else np.array([], dtype=np.int32)
+
+
+class ObjectColumn(object):
+    """object array of values as they are loaded to instances"""
+    def __init__(self, field, converted=False):
+        self.field = field
+        self.converted = converted
+        self.chunks = []
+
+    def append(self, values, backend):
+        array = np.empty(len(values), dtype=object)
+        if self.converted:
+            array[:] = values
+        else:
+            array[:] = [self.field.to_python(value, backend) for value in values]
+        self.chunks.append(array)
+
+    def build(self):
+        return np.concatenate(self.chunks) if self.chunks else np.array([], dtype=object)
+
+
+def make_column(field, pk=None):
+    if field is pk:
+        # already converted
+        if isinstance(field, odm.AutoIdField) and field.type == 'auto':
+            return NumberColumn(field, int)
+        return ObjectColumn(field, converted=True)
+    if isinstance(field, odm.ForeignKey):
+        related_pk = field.relmodel._meta.pk
+        if isinstance(related_pk, odm.AutoIdField) and related_pk.type == 'auto':
+            return NumberColumn(field, int)
+        return ObjectColumn(field)
+    if isinstance(field, DecimalField):
+        return ObjectColumn(field)
+    if isinstance(field, odm.FloatField):
+        return NumberColumn(field, float)
+    if isinstance(field, odm.IntegerField):
+        return NumberColumn(field, int)
+    if isinstance(field, odm.BooleanField):
+        return NumberColumn(field, bool)
+    if type(field) in (odm.SymbolField, IPAddressField):
+        return CategoryColumn(field)
+    return ObjectColumn(field)
+
+
+def build_columns(fields, chunks, pk):
+    """
+    Build arrays of fields of a model whose primary key is pk, from chunks of rows with their backend.
+    Numeric fields and foreign keys are typed arrays, symbol fields are codes to categories,
+    and the others are object arrays.
+    """
+    columns = [make_column(field, pk) for field in fields]
+    for backend, rows in chunks:
+        if not rows:
+            continue
+        for column, values in zip(columns, zip(*rows)):
+            column.append(values, backend)
+    result = Columns()
+    for field, column in zip(fields, columns):
+        result[field.name] = column.build()
+        if isinstance(column, CategoryColumn):
+            result.categories[field.name] = np.array(column.categories, dtype=object)
+    return result
@@ -0,0 +1,159 @@
+from collections import defaultdict
+import logging
+import threading
+
+from django.db.models import F
+from stdnet import odm, FieldError
+from .loading import id_set_key, is_packed, object_key
+from .sortedviews import view_key
+from . import scripts  # noqa, registers lua scripts
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_INTERVAL = 10
+FLUSH_CHUNK_SIZE = 1000
+
+
+def get_counter_field(meta, name):
+    field = meta.dfields.get(name)
+    if not isinstance(field, odm.IntegerField) or field.unique or is_packed(field):
+        raise FieldError('Field "%s" can not be incremented' % name)
+    return field
+
+
+def pending_key(backend, meta, field):
+    return backend.basekey(meta, 'counter', field.attname)
+
+
+def write_back_fields(model):
+    """counter fields of the model with a column of the mapped Django model"""
+    if not hasattr(model, '_django_meta'):
+        return []
+    from .models import get_fields
+
+    names = set(field.name for field in get_fields(model._django_meta.model._meta))
+    return [field for field in model._meta.scalarfields
+            if isinstance(field, odm.IntegerField) and not field.unique and field.name in names]
+
+
+def pending_deltas(manager, ids):
+    """
+    deltas of counters not written back yet by attname, in order of ids, None where nothing is pending.
+    Values of the mapped Django model plus them are the values counted on the server
+    """
+    meta = manager._meta
+    backend = manager.backend
+    fields = write_back_fields(manager.model)
+    if not fields or not ids:
+        return {}
+    pipe = backend.client.pipeline()
+    for field in fields:
+        pipe.hmget(pending_key(backend, meta, field), *ids)
+    return dict((field.attname, [None if delta is None else field.to_python(delta, backend) for delta in deltas])
+                for field, deltas in zip(fields, pipe.execute()))
+
+
+def incr(manager, instance_or_id, name, amount=1):
+    """
+    Increment a numeric field of an object atomically on the server, and return the new value.
+    The delta is accumulated to be written back by flush_counters if the field is mapped to Django.
+    """
+    meta = manager._meta
+    field = get_counter_field(meta, name)
+    backend = manager.backend
+    if isinstance(instance_or_id, odm.StdModel):
+        instance = instance_or_id
+        id = instance.pkvalue()
+    else:
+        instance = None
+        id = meta.pk.to_python(instance_or_id, backend)
+    ordering = meta.ordering and not meta.ordering.auto and meta.ordering.name == field.name
+    views = [view_key(backend, meta, view_field)
+             for view_field, _ in getattr(manager.model, '_sorted_views', ()) if view_field is field]
+    keys = [id_set_key(backend, meta)] + views
+    if field.name in [f.name for f in write_back_fields(manager.model)]:
+        keys.append(pending_key(backend, meta, field))
+    args = [object_key(backend, meta, id), backend.basekey(meta, 'idx', ''), id, field.attname, amount,
+            1 if isinstance(field, odm.FloatField) else 0, 1 if meta.ordering else 0, 1 if ordering else 0,
+            len(views)]
+    args.extend(index.attname for index in meta.indices if not index.unique)
+    value = backend.client.execute_script('djangostdnet_incr', keys, *args)
+    if value is None:
+        raise manager.model.DoesNotExist('%s with id %s does not exist' % (meta, id))
+    value = field.to_python(value, backend)
+    if instance is not None:
+        setattr(instance, field.attname, value)
+    return value
+
+
+def flush_counters(manager):
+    """
+    Write back deltas of counters accumulated since the last flush to the mapped Django model,
+    one UPDATE per chunk of objects sharing a delta. Returns the number of written deltas.
+    """
+    from .models import registry
+
+    meta = manager._meta
+    backend = manager.backend
+    flushed = 0
+    fields = write_back_fields(manager.model)
+    if not fields:
+        return flushed
+    django_model = registry.get_django_model(manager.model)
+    for field in fields:
+        key = pending_key(backend, meta, field)
+        # take them atomically, increments from now on are left to the next flush
+        pipe = backend.client.pipeline()
+        pipe.hgetall(key)
+        pipe.delete(key)
+        deltas = pipe.execute()[0]
+        by_delta = defaultdict(list)
+        for id, delta in deltas.items():
+            by_delta[field.to_python(delta, backend)].append(id)
+        written = set()
+        try:
+            for delta, ids in by_delta.items():
+                for i in range(0, len(ids), FLUSH_CHUNK_SIZE):
+                    chunk = ids[i:i + FLUSH_CHUNK_SIZE]
+                    pks = [meta.pk.to_python(id, backend) for id in chunk]
+                    django_model.objects.filter(pk__in=pks).update(**{field.name: F(field.name) + delta})
+                    written.update(chunk)
+        except Exception:
+            # put back ones not written yet for the next flush
+            pipe = backend.client.pipeline()
+            command = pipe.hincrbyfloat if isinstance(field, odm.FloatField) else pipe.hincrby
+            for id, delta in deltas.items():
+                if id not in written:
+                    command(key, id, field.to_python(delta, backend))
+            pipe.execute()
+            raise
+        flushed += len(deltas)
+    return flushed
+
+
+class CounterFlusher(threading.Thread):
+    """flush counters of models every interval seconds in background"""
+    def __init__(self, models, interval=DEFAULT_FLUSH_INTERVAL):
+        super(CounterFlusher, self).__init__()
+        self.daemon = True
+        self.models = models
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.flush()
+
+    def flush(self):
+        for model in self.models:
+            try:
+                model.objects.flush_counters()
+            except Exception:
+                logger.exception("failed to flush counters of %s", model._meta)
+
+    def stop(self):
+        """stop flushing, with the last flush of deltas left"""
+        self.stopped.set()
+        self.join()
+        self.flush()
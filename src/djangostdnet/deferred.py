@@ -0,0 +1,150 @@
+import threading
+
+from stdnet.odm.query import EmptyQuery
+from stdnet.utils.structures import OrderedDict
+from .loading import queue_command, queue_load
+
+
+_local = threading.local()
+
+
+def current_block():
+    """the active block of the thread, or a new one for a standalone placeholder"""
+    block = getattr(_local, 'block', None)
+    if block is None:
+        block = DeferredBlock()
+    return block
+
+
+class Deferred(object):
+    """placeholder of a query result, resolved together with the pending ones of its block"""
+    def __init__(self, block, query, kind):
+        self.block = block
+        self.query = query
+        self.kind = kind
+        self.resolved = False
+        self._value = None
+        self._error = None
+        self._backend_query = None
+        self._index = None
+
+    @property
+    def value(self):
+        if not self.resolved:
+            self.block.resolve()
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+    def _queue(self, pipe):
+        self._backend_query = self.query.backend_query(pipe=pipe)
+        if isinstance(self._backend_query, EmptyQuery):
+            return False
+        meta = self.query._meta
+        if self.kind == 'count':
+            command = getattr(pipe, 'zcard' if meta.ordering else 'scard')
+            self._index = queue_command(pipe, command, self._backend_query.query_key)
+        else:
+            self._index = queue_load(pipe, self._backend_query)
+        return True
+
+    def _resolve(self, results):
+        self.resolved = True
+        if self._index is None:
+            result = 0 if self.kind == 'count' else []
+        else:
+            result = results[self._index]
+        if self.kind == 'count':
+            self._value = result
+            return
+
+        session = self.query.session
+        for instance in result:
+            session.add(instance, modified=False)
+        # expired items are deleted through their session
+        purge_expired_items = getattr(self._backend_query, '_purge_expired_items', None)
+        if purge_expired_items is not None:
+            result = purge_expired_items(result)
+        if self.kind == 'get':
+            try:
+                self._value = self.query.model.get_unique_instance(result)
+            except Exception as e:
+                self._error = e
+        else:
+            self._value = result
+
+
+class DeferredBlock(object):
+    """
+    Collect deferred queries, then execute all pending of them in a pipeline per server
+    when one of them is resolved first.
+    """
+    def __init__(self):
+        self.pending = []
+        self._outer = None
+
+    def __enter__(self):
+        self._outer = getattr(_local, 'block', None)
+        _local.block = self
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _local.block = self._outer
+        self._outer = None
+
+    def get(self, query):
+        return self._add(query, 'get')
+
+    def count(self, query):
+        return self._add(query, 'count')
+
+    def items(self, query):
+        return self._add(query, 'items')
+
+    def _add(self, query, kind):
+        # the query must be built on the pipeline of this block
+        deferred = Deferred(self, query._clone(), kind)
+        self.pending.append(deferred)
+        return deferred
+
+    def resolve(self):
+        pending, self.pending = self.pending, []
+        pipes = OrderedDict()
+        for deferred in pending:
+            backend = deferred.query.backend
+            if backend.connection_string not in pipes:
+                pipes[backend.connection_string] = (backend.client.pipeline(), [])
+            pipe, queued = pipes[backend.connection_string]
+            if deferred._queue(pipe):
+                queued.append(deferred)
+            else:
+                deferred._resolve(())
+        for pipe, queued in pipes.values():
+            if queued:
+                try:
+                    results = pipe.execute()
+                except Exception as e:
+                    for deferred in queued:
+                        deferred.resolved = True
+                        deferred._error = e
+                    raise
+                for deferred in queued:
+                    deferred._resolve(results)
+
+
+class DeferredManager(object):
+    def __init__(self, manager, block):
+        self.manager = manager
+        self.block = block
+
+    def get(self, **kwargs):
+        return self.block.get(self.manager.filter(**kwargs))
+
+    def count(self, **kwargs):
+        return self.block.count(self.manager.filter(**kwargs))
+
+    def filter(self, **kwargs):
+        return self.block.items(self.manager.filter(**kwargs))
+
+    def all(self):
+        return self.block.items(self.manager.query())
@@ -1,4 +1,5 @@
 from decimal import Decimal
+import zlib
 from django.db.models.fields import files
 from django.utils.encoding import smart_text
 from six import binary_type
@@ -273,4 +274,89 @@ class DateTimeField(odm.DateTimeField):
         self.auto_now_add = auto_now_add
 
 
-__all__ = ['OneToOneField', 'ImageField', 'IPAddressField', 'DecimalField', 'DateTimeField']
+# first byte of compressed values, which never appears in UTF-8 text
+COMPRESSED_MARKER = b'\xff'
+
+
+def is_compressed(value):
+    return isinstance(value, binary_type) and value[:1] == COMPRESSED_MARKER
+
+
+class CompressedText(object):
+    """compressed value loaded from the backend, decompressed on first access"""
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = data
+
+    def decompress(self, charset):
+        return zlib.decompress(self.data[1:]).decode(charset)
+
+
+class CompressedTextDescriptor(object):
+    def __init__(self, field):
+        self.field = field
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        attname = self.field.attname
+        try:
+            value = instance.__dict__[attname]
+        except KeyError:
+            # deferred
+            raise AttributeError(attname)
+        if isinstance(value, CompressedText):
+            value = instance.__dict__[attname] = value.decompress(self.field.charset)
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+
+class CompressedTextField(odm.CharField):
+    """
+    Text compressed by zlib when its UTF-8 encoding is compress_threshold bytes or more.
+    Compressed values are flagged by a leading byte, and decompressed on first access of the attribute.
+    """
+    def __init__(self, compress_threshold=1024, compress_level=1, *args, **kwargs):
+        super(CompressedTextField, self).__init__(*args, **kwargs)
+        self.compress_threshold = compress_threshold
+        self.compress_level = compress_level
+
+    def register_with_model(self, name, model):
+        super(CompressedTextField, self).register_with_model(name, model)
+        setattr(model, name, CompressedTextDescriptor(self))
+
+    def value_from_data(self, instance, data):
+        value = super(CompressedTextField, self).value_from_data(instance, data)
+        return CompressedText(value) if is_compressed(value) else value
+
+    def to_python(self, value, backend=None):
+        if isinstance(value, CompressedText):
+            # kept until accessed
+            return value
+        elif is_compressed(value):
+            return CompressedText(value).decompress(self.charset)
+        return super(CompressedTextField, self).to_python(value, backend)
+
+    def set_get_value(self, instance, value):
+        if isinstance(value, CompressedText):
+            # not accessed since loaded
+            return value.data
+        value = super(CompressedTextField, self).set_get_value(instance, value)
+        if value is None:
+            return value
+        data = value.encode(self.charset)
+        if len(data) < self.compress_threshold:
+            return value
+        compressed = COMPRESSED_MARKER + zlib.compress(data, self.compress_level)
+        return compressed if len(compressed) < len(data) else value
+
+    def json_serialise(self, value):
+        if isinstance(value, CompressedText):
+            value = value.decompress(self.charset)
+        return super(CompressedTextField, self).json_serialise(value)
+
+
+__all__ = ['OneToOneField', 'ImageField', 'IPAddressField', 'DecimalField', 'DateTimeField', 'CompressedTextField']
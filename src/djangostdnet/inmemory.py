@@ -0,0 +1,85 @@
+"""
+In-process backend keeping data of models in python for tests, without a redis server.
+Connection strings of the memory scheme select it, as 'memory://<name>?db=0&namespace=<prefix>'.
+Backends of the same name share a server of the process, and drop_server discards it.
+"""
+from redis.exceptions import NoScriptError
+from stdnet.backends import parse_backend, redisb
+from stdnet.backends.redisb.client import Redis
+from stdnet.backends.redisb.extensions import RedisManager
+
+from . import memoryserver
+
+
+class ConnectionPool(RedisManager):
+    """pool of the client running commands on a server in the process, in place of connections"""
+    def __init__(self, address, db=0, encoding='utf-8', encoding_errors='strict'):
+        self._setup(address, db, None)
+        self.server = memoryserver.get_server(address)
+        self.encoding = encoding
+        self.encoding_errors = encoding_errors
+
+    def clone(self, db=0):
+        if self.db != db:
+            return self.__class__(self.address, db, self.encoding, self.encoding_errors)
+        return self
+
+    def disconnect(self):
+        pass
+
+    def release(self, connection):
+        pass
+
+    def parse_response(self, client, args, response, **options):
+        command_name = args[0]
+        if isinstance(response, Exception):
+            if isinstance(response, NoScriptError):
+                self.clear_scripts()
+            return response
+        if command_name == 'SCRIPT' and options.get('parse') == 'FLUSH':
+            self.clear_scripts()
+        if command_name in client.response_callbacks:
+            return client.response_callbacks[command_name](response, **options)
+        return response
+
+    def request(self, client, *args, **options):
+        response = self.parse_response(client, args, self.server.execute(self.db, args), **options)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def request_pipeline(self, pipeline, raise_on_error=True):
+        commands = pipeline.command_stack
+        if not commands:
+            return ()
+        # commands of a pipeline run at once, as a transaction of the server would
+        with self.server.lock:
+            response = [self.parse_response(pipeline, args, self.server.execute(self.db, args), **options)
+                        for args, options in commands]
+        if pipeline.is_transaction:
+            response = [response]
+        return pipeline.on_response(response, raise_on_error)
+
+
+class BackendDataServer(redisb.BackendDataServer):
+    def setup_connection(self, address):
+        if 'db' not in self.params:
+            self.params['db'] = 0
+        name = ':'.join(str(part) for part in address)
+        client = Redis(connection_pool=ConnectionPool(name, int(self.params['db'])))
+        if self.namespace:
+            self.params['namespace'] = self.namespace
+        return client
+
+
+def getdb(backend, **params):
+    """in-memory backend of a connection string of the memory scheme"""
+    scheme, address, backend_params = parse_backend(backend)
+    backend_params.update(params)
+    return BackendDataServer(scheme, address, **backend_params)
+
+
+def drop_server(name):
+    """discard the server of name with all of its data, as a teardown of tests"""
+    memoryserver.drop_server(name)
+    RedisManager.all_loaded_scripts.pop(name, None)
@@ -0,0 +1,143 @@
+import json
+
+from stdnet.utils import native_str, unique_tuple, zip
+
+
+OBJ = 'obj'
+
+
+def object_key(backend, meta, id):
+    return backend.basekey(meta, OBJ, id)
+
+
+def id_set_key(backend, meta):
+    return backend.basekey(meta, 'id')
+
+
+def queue_command(pipe, command, *args, **kwargs):
+    """queue a command and return the index of its result"""
+    command(*args, **kwargs)
+    return len(pipe.command_stack) - 1
+
+
+def load_fields(backend_query):
+    """fields and their attributes to load for the built backend query, both None for all"""
+    queryelem = backend_query.queryelem
+    meta = backend_query.meta
+    pkname_tuple = (meta.pk.name,)
+    fields = queryelem.fields or None
+    if fields:
+        fields = unique_tuple(fields, queryelem.select_related or ())
+    if fields == pkname_tuple:
+        return fields, fields
+    elif fields:
+        return meta.backend_fields(fields)
+    else:
+        return None, None
+
+
+def queue_load(pipe, backend_query, start=0, count=None):
+    """
+    queue loading instances matched by the built backend query, as the backend query does by itself.
+    all of them, or count of them from start in order.
+    """
+    queryelem = backend_query.queryelem
+    meta = backend_query.meta
+    backend = backend_query.backend
+    name = ''
+    order = ()
+    stop = -1
+    if queryelem.ordering:
+        name = 'explicit'
+        order = backend_query.order(queryelem.ordering)
+        # SORT takes the count as LIMIT, without LIMIT sorts the whole set
+        stop = count or 0
+    elif meta.ordering:
+        name = 'DESC' if meta.ordering.desc else 'ASC'
+        if count is not None:
+            stop = start + count - 1
+    fields, fields_attributes = load_fields(backend_query)
+    options = {'ordering': name,
+               'order': order,
+               'start': start,
+               'stop': stop,
+               'fields': fields_attributes or (),
+               'related': dict(backend_query.related_lua_args()),
+               'get': None}
+    joptions = json.dumps(options)
+    options.update({'fields': fields,
+                    'fields_attributes': fields_attributes or ()})
+    return queue_command(pipe, backend.odmrun, pipe, 'load', meta, (backend_query.query_key,),
+                         backend_query.meta_info, joptions, **options)
+
+
+def queue_exists(pipe, backend, meta, ids):
+    """queue checking membership of ids in the id set of the model"""
+    key = id_set_key(backend, meta)
+    command = pipe.zscore if meta.ordering else pipe.sismember
+    return [queue_command(pipe, command, key, id) for id in ids]
+
+
+def queue_hashes(pipe, backend, meta, ids, fields_attributes=None):
+    """queue fetching object hashes of ids, only fields_attributes if given"""
+    if fields_attributes:
+        return [queue_command(pipe, pipe.hmget, object_key(backend, meta, id), *fields_attributes)
+                for id in ids]
+    else:
+        return [queue_command(pipe, pipe.hgetall, object_key(backend, meta, id))
+                for id in ids]
+
+
+def make_instances(backend, meta, ids, hashes, fields=None, fields_attributes=None):
+    """make instances from fetched object hashes as the backend does with its loading script"""
+    if fields and tuple(fields) == (meta.pk.name,):
+        data = ((id, (), {}) for id in ids)
+    elif fields:
+        data = ((id, fields, dict(zip(fields_attributes, values)))
+                for id, values in zip(ids, hashes))
+    else:
+        encoding = backend.client.encoding
+        data = ((id, None, dict((native_str(k, encoding), v) for k, v in values.items()))
+                for id, values in zip(ids, hashes))
+    return backend.objects_from_db(meta, data)
+
+
+# attribute of the hash holding packed fields of a model with blob storage
+BLOB = '_blob'
+# key of fetched data where the decoded blob is kept
+PACKED = '__packed__'
+
+
+def is_packed(field):
+    return getattr(field, 'packed', False)
+
+
+def storage_attributes(fields):
+    """attributes of the hash to fetch for fields, the blob and the plain one for packed fields"""
+    attributes = []
+    for field in fields:
+        for attribute in ((BLOB, field.attname) if is_packed(field) else (field.attname,)):
+            if attribute not in attributes:
+                attributes.append(attribute)
+    return attributes
+
+
+def unpacked(data):
+    """dict decoded from the blob of fetched data once, None without the blob"""
+    if PACKED not in data:
+        blob = data.pop(BLOB, None)
+        if blob:
+            from .storage import decode
+            data[PACKED] = decode(blob)
+        else:
+            data[PACKED] = None
+    return data[PACKED]
+
+
+def stored_value(field, data):
+    """serialised value of field in fetched data, the plain attribute of objects not yet packed"""
+    if is_packed(field):
+        values = unpacked(data)
+        if values is not None:
+            return values.get(field.attname)
+    return data.get(field.attname)
@@ -0,0 +1,36 @@
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+from djangostdnet.memory import DEFAULT_SAMPLES
+from .stdnet_reindex import import_model
+
+
+class Command(BaseCommand):
+    args = '[<model path> ...]'
+    help = 'Report memory of django-stdnet models, estimated from samples. All registered models if none given'
+    option_list = BaseCommand.option_list + (
+        make_option('--samples', type='int', default=DEFAULT_SAMPLES,
+                    help='Number of objects and keys sampled, and samples of MEMORY USAGE'),
+    )
+
+    def handle(self, *args, **options):
+        from djangostdnet.models import mapper
+
+        if args:
+            models = [import_model(path) for path in args]
+        else:
+            models = [meta.model for meta in mapper.registered_models]
+        for model in models:
+            report = model.objects.memory_report(options['samples'])
+            self.write_report(model, report)
+
+    def write_report(self, model, report):
+        self.stdout.write('%s: %d objects, %d bytes' % (model._meta, report['objects'], report['bytes']))
+        if report['expired'] is not None:
+            self.stdout.write('  expired: %d objects' % report['expired'])
+        for attribute, size in sorted(report['attributes'].items(), key=lambda item: -item[1]):
+            self.stdout.write('  attribute %s: %d bytes' % (attribute, size))
+        for name, index in sorted(report['indices'].items(), key=lambda item: -item[1]['bytes']):
+            self.stdout.write('  index %s: %d keys, %d bytes' % (name, index['keys'], index['bytes']))
+        for key, size in sorted(report['keys'].items(), key=lambda item: -item[1]):
+            self.stdout.write('  key %s: %d bytes' % (key, size))
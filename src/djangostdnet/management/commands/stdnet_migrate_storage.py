@@ -0,0 +1,22 @@
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+from djangostdnet.query import DEFAULT_CHUNK_SIZE
+from .stdnet_reindex import import_model
+
+
+class Command(BaseCommand):
+    args = '<model path> [<model path> ...]'
+    help = 'Rewrite objects of django-stdnet models to the storage of their Meta online'
+    option_list = BaseCommand.option_list + (
+        make_option('--chunk-size', type='int', default=DEFAULT_CHUNK_SIZE,
+                    help='Number of objects rewritten in a request'),
+    )
+
+    def handle(self, *args, **options):
+        if not args:
+            raise CommandError('Specify model paths: %s' % self.args)
+        for path in args:
+            model = import_model(path)
+            count = model.objects.migrate_storage(options['chunk_size'])
+            self.stdout.write('Migrated %d objects of %s' % (count, path))
@@ -0,0 +1,35 @@
+from importlib import import_module
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+from djangostdnet.reindex import DEFAULT_REINDEX_CHUNK_SIZE
+
+
+def import_model(path):
+    module_name, _, name = path.rpartition('.')
+    try:
+        return getattr(import_module(module_name), name)
+    except (ImportError, AttributeError, ValueError):
+        raise CommandError("Can't import model: %s" % path)
+
+
+class Command(BaseCommand):
+    args = '<model path> [<field> ...]'
+    help = 'Build or rebuild index sets of fields, or sorted views and prefix indexes, of a django-stdnet model online'
+    option_list = BaseCommand.option_list + (
+        make_option('--chunk-size', type='int', default=DEFAULT_REINDEX_CHUNK_SIZE,
+                    help='Number of objects processed in a request'),
+        make_option('--views', action='store_true', default=False,
+                    help='Rebuild sorted views, range indexes and prefix indexes of the model'),
+    )
+
+    def handle(self, *args, **options):
+        if not args or (len(args) < 2 and not options['views']):
+            raise CommandError('Specify a model path and fields, or --views: %s' % self.args)
+        model = import_model(args[0])
+        for field in args[1:]:
+            count = model.objects.reindex(field, options['chunk_size'])
+            self.stdout.write('Reindexed %s of %d objects' % (field, count))
+        if options['views']:
+            count = model.objects.rebuild_views(options['chunk_size'])
+            self.stdout.write('Rebuilt views of %d objects' % count)
@@ -0,0 +1,44 @@
+from datetime import datetime
+from optparse import make_option
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from djangostdnet.snapshot import DEFAULT_SNAPSHOT_CHUNK_SIZE, SnapshotError, catch_up, load
+
+
+class Command(BaseCommand):
+    args = '<file>'
+    help = 'Restore keys of django-stdnet models from a file of stdnet_snapshot, replacing existing ones'
+    option_list = BaseCommand.option_list + (
+        make_option('--chunk-size', type='int', default=DEFAULT_SNAPSHOT_CHUNK_SIZE,
+                    help='Number of keys or rows processed in a request'),
+        make_option('--catch-up', dest='catch_up', default=None,
+                    help='Field of Django models updated at every save, to mirror rows changed since the snapshot'),
+    )
+
+    def handle(self, *args, **options):
+        from djangostdnet.models import mapper
+
+        if len(args) != 1:
+            raise CommandError('Specify a file: %s' % self.args)
+        managers = [mapper[meta.model] for meta in mapper.registered_models]
+        try:
+            with open(args[0], 'rb') as fileobj:
+                header = load(managers, fileobj, options['chunk_size'])
+        except SnapshotError as e:
+            raise CommandError(str(e))
+        self.stdout.write('Restored %s' % ', '.join(header['models']))
+
+        if options['catch_up']:
+            if settings.USE_TZ:
+                since = datetime.utcfromtimestamp(header['time']).replace(tzinfo=timezone.utc)
+            else:
+                since = datetime.fromtimestamp(header['time'])
+            by_name = dict((str(manager._meta), manager) for manager in managers)
+            for name in header['models']:
+                manager = by_name[name]
+                if not hasattr(manager.model, '_django_meta'):
+                    continue
+                synced, deleted = catch_up(manager, options['catch_up'], since, options['chunk_size'])
+                self.stdout.write('Caught up %s: %d mirrored, %d deleted' % (name, synced, deleted))
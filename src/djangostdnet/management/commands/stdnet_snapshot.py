@@ -0,0 +1,27 @@
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+from djangostdnet.snapshot import DEFAULT_SNAPSHOT_CHUNK_SIZE, dump
+from .stdnet_reindex import import_model
+
+
+class Command(BaseCommand):
+    args = '<file> [<model path> ...]'
+    help = 'Dump keys of django-stdnet models to a file. All registered models if none given'
+    option_list = BaseCommand.option_list + (
+        make_option('--chunk-size', type='int', default=DEFAULT_SNAPSHOT_CHUNK_SIZE,
+                    help='Number of keys dumped in a request'),
+    )
+
+    def handle(self, *args, **options):
+        from djangostdnet.models import mapper
+
+        if not args:
+            raise CommandError('Specify a file: %s' % self.args)
+        if args[1:]:
+            managers = [mapper[import_model(path)] for path in args[1:]]
+        else:
+            managers = [mapper[meta.model] for meta in mapper.registered_models]
+        with open(args[0], 'wb') as fileobj:
+            header = dump(managers, fileobj, options['chunk_size'])
+        self.stdout.write('Dumped %s at %s' % (', '.join(header['models']), header['time']))
@@ -0,0 +1,144 @@
+from stdnet.odm import session
+from stdnet.utils import zip
+from . import counters, memory, prefixes, reindex, relations
+from .deferred import DeferredManager, current_block
+from .loading import object_key, queue_exists, queue_hashes, make_instances, storage_attributes
+from .memory import DEFAULT_SAMPLES
+from .prefixes import DEFAULT_COMPLETE_COUNT
+from .reindex import DEFAULT_REINDEX_CHUNK_SIZE
+from .sortedviews import SortedView
+from .query import Query, DEFAULT_CHUNK_SIZE, DEFAULT_PAGE_SIZE
+
+
+class Manager(session.Manager):
+    query_class = Query
+
+    @property
+    def deferred(self):
+        return DeferredManager(self, current_block())
+
+    def load_only(self, *fields):
+        return self.query().load_only(*fields)
+
+    def defer(self, *fields):
+        return self.query().defer(*fields)
+
+    def load_deferred_fields(self, instance):
+        """load the rest of fields of the instance, which are not loaded by load_only or defer, in a request"""
+        meta = self._meta
+        loaded = set(field.name for field in instance.loadedfields())
+        fields = [field for field in meta.scalarfields
+                  if field.name not in loaded and field.attname not in instance.__dict__]
+        if not fields:
+            return
+        backend = self.read_backend
+        attributes = storage_attributes(fields)
+        values = backend.client.hmget(object_key(backend, meta, instance.pkvalue()), *attributes)
+        data = dict(zip(attributes, values))
+        for field in fields:
+            value = field.value_from_data(instance, data)
+            setattr(instance, field.attname, field.to_python(value, backend))
+        instance._loadedfields = tuple(instance._loadedfields) + tuple(field.name for field in fields)
+
+    def values(self, *fields, **kwargs):
+        return self.query().values(*fields, **kwargs)
+
+    def values_list(self, *fields, **kwargs):
+        return self.query().values_list(*fields, **kwargs)
+
+    def aggregate(self, *args, **kwargs):
+        return self.query().aggregate(*args, **kwargs)
+
+    def facets(self, *fields):
+        return self.query().facets(*fields)
+
+    def update(self, **kwargs):
+        return self.query().update(**kwargs)
+
+    def bulk_delete(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        return self.query().bulk_delete(chunk_size)
+
+    def incr(self, instance_or_id, field, amount=1):
+        return counters.incr(self, instance_or_id, field, amount)
+
+    def flush_counters(self):
+        return counters.flush_counters(self)
+
+    def autocomplete(self, field, prefix, count=DEFAULT_COMPLETE_COUNT):
+        """instances of which values of a field with prefix index start with prefix, in order of the values"""
+        ids = prefixes.prefix_ids(self, field, prefix, count)
+        return [instance for instance in self.get_many(ids) if instance is not None]
+
+    def reindex(self, field, chunk_size=DEFAULT_REINDEX_CHUNK_SIZE):
+        return reindex.reindex(self, field, chunk_size)
+
+    def rebuild_views(self, chunk_size=DEFAULT_REINDEX_CHUNK_SIZE):
+        return reindex.rebuild_views(self, chunk_size)
+
+    def memory_report(self, samples=DEFAULT_SAMPLES):
+        return memory.memory_report(self, samples)
+
+    def migrate_storage(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        from .storage import migrate_storage
+
+        return migrate_storage(self, chunk_size)
+
+    def relation_counts(self, field, instances_or_ids):
+        return relations.relation_counts(self, field, instances_or_ids)
+
+    def sorted_view(self, name):
+        for field, desc in getattr(self.model, '_sorted_views', ()):
+            if field.name == name:
+                return SortedView(self, field, desc)
+        raise KeyError('No sorted view of field "%s"' % name)
+
+    def tojson(self, *fields, **kwargs):
+        return self.query().tojson(*fields, **kwargs)
+
+    def columns(self, *fields, **kwargs):
+        return self.query().columns(*fields, **kwargs)
+
+    def iterator(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        return self.query().iterator(chunk_size)
+
+    def page(self, cursor=None, count=DEFAULT_PAGE_SIZE):
+        return self.query().page(cursor, count)
+
+    def get_many(self, ids, fallback=False):
+        """
+        Fetch instances of ids in a pipeline, in order of ids.
+        Missing one is None, or loaded from the mapped Django model and mirrored if fallback.
+        """
+        pk = self._meta.pk
+        backend = self.read_backend
+        ids = [pk.to_python(id, backend) for id in ids]
+        pipe = backend.client.pipeline()
+        exists_indexes = queue_exists(pipe, backend, self._meta, ids)
+        hash_indexes = queue_hashes(pipe, backend, self._meta, ids)
+        results = pipe.execute() if ids else []
+
+        found = [(id, results[hash_index])
+                 for id, exists_index, hash_index in zip(ids, exists_indexes, hash_indexes)
+                 # a score of 0 of an ordered id set is a member
+                 if results[exists_index] is not None and results[exists_index] is not False]
+        found_ids = [id for id, _ in found]
+        hashes = [values for _, values in found]
+        instances = self.purge_expired_items(make_instances(backend, self._meta, found_ids, hashes))
+        session = self.session()
+        for instance in instances:
+            session.add(instance, modified=False)
+        by_id = dict((instance.pkvalue(), instance) for instance in instances)
+
+        missing_ids = [id for id in ids if id not in by_id]
+        if fallback and missing_ids:
+            from .models import registry
+
+            django_model = registry.get_django_model(self.model)
+            django_objs = django_model.objects.filter(pk__in=missing_ids)
+            for instance in session.mirror_django_objects(self, django_objs):
+                by_id[instance.pkvalue()] = instance
+
+        return [by_id.get(id) for id in ids]
+
+    def purge_expired_items(self, items):
+        return items
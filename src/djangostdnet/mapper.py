@@ -1,7 +1,27 @@
+from stdnet.backends import getdb as stdnet_getdb
 from stdnet.odm import mapper
+import six
+
+
+def getdb(backend=None, **params):
+    """backend of a connection string, of which the memory scheme is of the in-memory backend"""
+    if isinstance(backend, six.string_types) and backend.startswith('memory://'):
+        # lupa is required only by the in-memory backend
+        from . import inmemory
+        return inmemory.getdb(backend, **params)
+    return stdnet_getdb(backend, **params)
 
 
 class Mapper(mapper.Router):
+    def register(self, model, backend=None, read_backend=None, include_related=True, **params):
+        backend = getdb(backend or self._default_backend, **params)
+        if read_backend:
+            read_backend = getdb(read_backend)
+        return super(Mapper, self).register(model, backend, read_backend, include_related)
+
     def session(self):
-        from .session import Session
+        from .session import Session, get_bound_session
+        session = get_bound_session()
+        if session is not None and session.router is self:
+            return session
         return Session(self)
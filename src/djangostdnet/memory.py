@@ -0,0 +1,123 @@
+from collections import defaultdict
+import random
+
+from stdnet.utils import native_str, zip
+from .loading import id_set_key, object_key, queue_command
+from .prefixes import prefix_key, prefix_values_key
+from .reindex import scan_keys
+from .sortedviews import view_key
+
+
+DEFAULT_SAMPLES = 100
+
+
+def queue_memory_usage(pipe, key, samples=DEFAULT_SAMPLES):
+    """queue MEMORY USAGE of key, which requires redis 4.0 or later"""
+    return queue_command(pipe, pipe.execute_command, 'MEMORY', 'USAGE', key, 'SAMPLES', samples)
+
+
+def sample_ids(client, key, sorted, count):
+    """ids picked at random from the id set, at most count of them"""
+    if not sorted:
+        return [native_str(id) for id in client.srandmember(key, count) or ()]
+    size = client.zcard(key)
+    pipe = client.pipeline()
+    for rank in random.sample(range(size), min(count, size)):
+        pipe.zrange(key, rank, rank)
+    return [native_str(ids[0]) for ids in pipe.execute() if ids]
+
+
+def sample_keys(client, pattern, samples):
+    """number of keys matching pattern, and first samples of them scanned"""
+    count = 0
+    sampled = []
+    for key in scan_keys(client, pattern, samples):
+        count += 1
+        if len(sampled) < samples:
+            sampled.append(key)
+    return count, sampled
+
+
+def keys_memory(client, keys, samples):
+    pipe = client.pipeline()
+    indexes = [queue_memory_usage(pipe, key, samples) for key in keys]
+    results = pipe.execute()
+    return [results[index] or 0 for index in indexes]
+
+
+def extrapolate(total, sampled, count):
+    return int(round(total * count / float(sampled))) if sampled else 0
+
+
+def memory_report(manager, samples=DEFAULT_SAMPLES):
+    """
+    Estimate of memory used by objects of a model, extrapolated from samples of object hashes and index sets.
+    A dict of the number of objects and bytes of their hashes, bytes of attributes by name,
+    keys and bytes of index sets by field, bytes of other keys of the model,
+    and the number of objects expired by TTL but not purged yet, None without TTL.
+    Bytes of attributes are of names and values, without overhead of the server.
+    """
+    from .query import glob_escape
+    from .ttl import TTLField
+
+    meta = manager._meta
+    backend = manager.backend
+    client = backend.client
+    idset = id_set_key(backend, meta)
+    sorted = bool(meta.ordering)
+    count = client.zcard(idset) if sorted else client.scard(idset)
+
+    ids = sample_ids(client, idset, sorted, samples)
+    pipe = client.pipeline()
+    indexes = [(queue_memory_usage(pipe, object_key(backend, meta, id), samples),
+                queue_command(pipe, pipe.hgetall, object_key(backend, meta, id))) for id in ids]
+    results = pipe.execute()
+    hashes = []
+    attributes = defaultdict(int)
+    for usage_index, hash_index in indexes:
+        data = results[hash_index]
+        # deleted on the way
+        if not data:
+            continue
+        for attribute, value in data.items():
+            attributes[native_str(attribute)] += len(attribute) + len(value)
+        hashes.append((results[usage_index] or 0, dict((native_str(k), v) for k, v in data.items())))
+
+    ttl_fields = [field for field in meta.scalarfields if isinstance(field, TTLField)]
+    expired = None
+    if ttl_fields:
+        ttl_field = ttl_fields[0]
+        expired = 0
+        for _, data in hashes:
+            ttl_value = ttl_field.to_python(data.get(ttl_field.attname), backend)
+            if ttl_value is not None and ttl_value < 0:
+                expired += 1
+        expired = extrapolate(expired, len(hashes), count)
+
+    indices = {}
+    for field in meta.indices:
+        if field is meta.pk:
+            continue
+        if field.unique:
+            # values to ids in a hash
+            key_count, keys = 1, [backend.basekey(meta, 'uni', field.attname)]
+        else:
+            pattern = glob_escape(backend.basekey(meta, 'idx', field.attname, '')) + '*'
+            key_count, keys = sample_keys(client, pattern, samples)
+        indices[field.name] = {'keys': key_count,
+                               'bytes': extrapolate(sum(keys_memory(client, keys, samples)), len(keys), key_count)}
+
+    keys = [idset]
+    keys.extend(view_key(backend, meta, field) for field, _ in getattr(manager.model, '_sorted_views', ()))
+    for field in getattr(manager.model, '_prefix_indexes', ()):
+        keys.extend((prefix_key(backend, meta, field), prefix_values_key(backend, meta, field)))
+    keys.extend(native_str(key) for key in scan_keys(client, glob_escape(backend.basekey(meta, 'counter', '')) + '*',
+                                                    samples))
+
+    return {'objects': count,
+            'bytes': extrapolate(sum(usage for usage, _ in hashes), len(hashes), count),
+            'attributes': dict((attribute, extrapolate(size, len(hashes), count))
+                               for attribute, size in attributes.items()),
+            'indices': indices,
+            'keys': dict((key, size) for key, size in zip(keys, keys_memory(client, keys, samples)) if size),
+            'expired': expired}
@@ -0,0 +1,196 @@
+"""
+Lua scripting of the in-process server by lupa, with redis.call, cjson and cmsgpack as the server provides.
+stdnet scripts rely on loadstring and setfenv, so Lua 5.1 or LuaJIT is taken when lupa is built for it.
+"""
+import json
+
+from redis.exceptions import ResponseError
+import six
+
+try:
+    from lupa import lua51 as lupa
+except ImportError:
+    try:
+        import lupa
+    except ImportError:
+        from stdnet import ImproperlyConfigured
+        raise ImproperlyConfigured('In-memory backend requires lupa for lua scripts')
+
+from .memoryserver import Status
+
+
+PRELUDE = b"""
+local bridge, unpack_json, pack_json, pack_msg, unpack_msg = ...
+unpack = unpack or table.unpack
+loadstring = loadstring or load
+redis = {LOG_DEBUG = 0, LOG_VERBOSE = 1, LOG_NOTICE = 2, LOG_WARNING = 3}
+function redis.pcall(...)
+    return bridge(...)
+end
+function redis.call(...)
+    local reply = bridge(...)
+    if type(reply) == 'table' and reply.err then
+        error(reply.err, 0)
+    end
+    return reply
+end
+function redis.error_reply(message)
+    return {err = message}
+end
+function redis.status_reply(message)
+    return {ok = message}
+end
+function redis.log(level, message)
+end
+cjson = {null = function() end}
+function cjson.decode(value)
+    return unpack_json(value)
+end
+function cjson.encode(value)
+    return pack_json(value)
+end
+cmsgpack = {}
+function cmsgpack.pack(value)
+    return pack_msg(value)
+end
+function cmsgpack.unpack(value)
+    return unpack_msg(value)
+end
+function compile_script(source)
+    local script, message = loadstring(source)
+    if not script then
+        error(message, 0)
+    end
+    return script
+end
+"""
+
+
+def lua_number(value):
+    """string of a lua number passed to commands, as the server formats it"""
+    if isinstance(value, bool):
+        raise ResponseError('Lua redis() command arguments must be strings or integers')
+    if isinstance(value, six.integer_types) or value == int(value):
+        return str(int(value)).encode('utf-8')
+    return ('%.14g' % value).encode('utf-8')
+
+
+class LuaScripting(object):
+    def __init__(self):
+        self.runtime = lupa.LuaRuntime(encoding=None, unpack_returned_tuples=True, register_eval=False)
+        self.globals = self.runtime.globals()
+        self.runtime.execute(PRELUDE, self.call, self.unpack_json, self.pack_json,
+                             self.pack_msg, self.unpack_msg)
+        self.null = self.globals[b'cjson'][b'null']
+        self.server = None
+        self.db = None
+
+    def compile(self, source):
+        try:
+            return self.globals[b'compile_script'](source)
+        except lupa.LuaError as e:
+            raise ResponseError('Error compiling script: %s' % str(e).split('\n', 1)[0])
+
+    def run(self, script, server, db, keys, args):
+        previous = self.server, self.db
+        self.server, self.db = server, db
+        self.globals[b'KEYS'] = self.runtime.table_from(list(keys))
+        self.globals[b'ARGV'] = self.runtime.table_from(list(args))
+        try:
+            return self.from_lua(script())
+        except lupa.LuaError as e:
+            raise ResponseError('Error running script: %s' % str(e).split('\n', 1)[0])
+        finally:
+            self.server, self.db = previous
+
+    def call(self, *args):
+        if not args:
+            return self.to_lua(ResponseError('Please specify at least one argument for redis.call()'))
+        try:
+            args = [arg if isinstance(arg, bytes) else lua_number(arg) for arg in args]
+        except (TypeError, ResponseError):
+            return self.to_lua(ResponseError('Lua redis() command arguments must be strings or integers'))
+        return self.to_lua(self.server.execute(self.db, args))
+
+    def to_lua(self, reply):
+        """redis reply into lua value"""
+        if isinstance(reply, ResponseError):
+            return self.runtime.table_from({b'err': str(reply).encode('utf-8')})
+        elif isinstance(reply, Status):
+            return self.runtime.table_from({b'ok': bytes(reply)})
+        elif reply is None:
+            return False
+        elif isinstance(reply, list):
+            return self.runtime.table_from([self.to_lua(item) for item in reply])
+        return reply
+
+    def from_lua(self, value):
+        """lua value returned by a script into redis reply"""
+        if lupa.lua_type(value) == 'table':
+            if value[b'err'] is not None:
+                raise ResponseError(value[b'err'].decode('utf-8', 'replace'))
+            if value[b'ok'] is not None:
+                return Status(value[b'ok'])
+            items = []
+            index = 1
+            while value[index] is not None:
+                items.append(self.from_lua(value[index]))
+                index += 1
+            return items
+        elif value is True:
+            return 1
+        elif value is False or value is None:
+            return None
+        elif isinstance(value, (six.integer_types, float)):
+            return int(value)
+        elif isinstance(value, bytes):
+            return value
+        return None
+
+    # cjson and cmsgpack
+
+    def to_lua_data(self, value):
+        if value is None:
+            return self.null
+        elif isinstance(value, six.text_type):
+            return value.encode('utf-8')
+        elif isinstance(value, dict):
+            return self.runtime.table_from(dict((self.to_lua_data(k), self.to_lua_data(v)) for k, v in value.items()))
+        elif isinstance(value, (list, tuple)):
+            return self.runtime.table_from([self.to_lua_data(item) for item in value])
+        return value
+
+    def from_lua_data(self, value, text):
+        if lupa.lua_type(value) == 'table':
+            items = list(value.items())
+            if items and all(isinstance(k, six.integer_types) and not isinstance(k, bool) for k, _ in items) and \
+               sorted(k for k, _ in items) == list(range(1, len(items) + 1)):
+                return [self.from_lua_data(v, text) for _, v in sorted(items, key=lambda item: item[0])]
+            return dict((self.from_lua_data(k if isinstance(k, bytes) else lua_number(k), text),
+                         self.from_lua_data(v, text)) for k, v in items)
+        elif lupa.lua_type(value) == 'function':
+            return None
+        elif isinstance(value, bytes):
+            return value.decode('utf-8') if text else value
+        elif isinstance(value, float) and value == int(value):
+            return int(value)
+        return value
+
+    def unpack_json(self, value):
+        try:
+            return self.to_lua_data(json.loads(value.decode('utf-8')))
+        except ValueError as e:
+            raise ResponseError('cjson decode: %s' % e)
+
+    def pack_json(self, value):
+        return json.dumps(self.from_lua_data(value, True), separators=(',', ':')).encode('utf-8')
+
+    def pack_msg(self, value):
+        import msgpack
+
+        return msgpack.packb(self.from_lua_data(value, False), use_bin_type=False)
+
+    def unpack_msg(self, value):
+        import msgpack
+
+        return self.to_lua_data(msgpack.unpackb(value, raw=True))
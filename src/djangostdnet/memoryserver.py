@@ -0,0 +1,865 @@
+"""
+In-process emulation of the subset of redis commands and lua scripting stdnet uses.
+Values are kept in dicts of a database, so each server is an isolated keyspace of the process.
+"""
+from collections import defaultdict
+from hashlib import sha1
+import pickle
+import random
+import re
+import threading
+from time import time
+
+from redis.exceptions import NoScriptError, ResponseError
+import six
+
+
+WRONGTYPE = 'WRONGTYPE Operation against a key holding the wrong kind of value'
+# set-max-intset-entries of redis by default
+INTSET_MAX_ENTRIES = 512
+INTEGER = re.compile(br'^-?(0|[1-9][0-9]*)$')
+
+
+class Status(bytes):
+    """status reply, as OK"""
+
+
+OK = Status(b'OK')
+
+
+def to_bytes(value):
+    if isinstance(value, bytes):
+        return value
+    elif isinstance(value, six.text_type):
+        return value.encode('utf-8')
+    elif isinstance(value, float):
+        return repr(value).encode('utf-8')
+    return str(value).encode('utf-8')
+
+
+def to_int(value):
+    try:
+        return int(value)
+    except ValueError:
+        raise ResponseError('value is not an integer or out of range')
+
+
+def to_float(value):
+    try:
+        return float(value)
+    except ValueError:
+        raise ResponseError('value is not a valid float')
+
+
+def format_float(value):
+    if value == int(value) and abs(value) < 1e17:
+        return str(int(value)).encode('utf-8')
+    return ('%.17g' % value).encode('utf-8')
+
+
+def set_members(members):
+    """members of a set in order of redis, ascending for a small set of integers which it encodes as an intset"""
+    members = list(members)
+    if len(members) <= INTSET_MAX_ENTRIES and all(INTEGER.match(member) for member in members):
+        members.sort(key=int)
+    return members
+
+
+def parse_score_bound(value):
+    """score and whether exclusive, of a bound of ZRANGEBYSCORE"""
+    value = to_bytes(value)
+    exclusive = value.startswith(b'(')
+    if exclusive:
+        value = value[1:]
+    if value in (b'-inf', b'+inf', b'inf'):
+        return float(value), exclusive
+    return to_float(value), exclusive
+
+
+def parse_lex_bound(value):
+    """member, or None for the end, and whether exclusive, of a bound of ZRANGEBYLEX"""
+    value = to_bytes(value)
+    if value in (b'-', b'+'):
+        return value, False
+    if value[:1] not in (b'[', b'('):
+        raise ResponseError('min or max not valid string range item')
+    return value[1:], value[:1] == b'('
+
+
+def glob_regex(pattern):
+    """regex of a glob pattern of KEYS and SCAN, with escapes by backslash"""
+    pattern = to_bytes(pattern)
+    parts = []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i:i + 1]
+        if c == b'\\' and i + 1 < len(pattern):
+            parts.append(re.escape(pattern[i + 1:i + 2]))
+            i += 2
+            continue
+        if c == b'*':
+            parts.append(b'.*')
+        elif c == b'?':
+            parts.append(b'.')
+        elif c == b'[':
+            end = pattern.find(b']', i + 1)
+            if end < 0:
+                parts.append(re.escape(c))
+            else:
+                group = pattern[i + 1:end]
+                if group.startswith(b'^'):
+                    group = b'^' + re.escape(group[1:])
+                else:
+                    group = re.escape(group).replace(b'\\-', b'-')
+                parts.append(b'[' + group + b']')
+                i = end
+        else:
+            parts.append(re.escape(c))
+        i += 1
+    return re.compile(b''.join(parts) + b'\\Z', re.DOTALL)
+
+
+class ZSet(object):
+    """members by score, sorted by score then member when ranged"""
+    def __init__(self, scores=None):
+        self.scores = dict(scores or ())
+
+    def __len__(self):
+        return len(self.scores)
+
+    def items(self, desc=False):
+        items = sorted(self.scores.items(), key=lambda item: (item[1], item[0]))
+        return items[::-1] if desc else items
+
+    def by_score(self, min, max, desc=False):
+        (min, min_exclusive), (max, max_exclusive) = min, max
+        for member, score in self.items(desc):
+            if (min < score or (score == min and not min_exclusive)) and \
+               (score < max or (score == max and not max_exclusive)):
+                yield member, score
+
+
+def type_name(value):
+    if isinstance(value, bytes):
+        return b'string'
+    elif isinstance(value, dict):
+        return b'hash'
+    elif isinstance(value, set):
+        return b'set'
+    elif isinstance(value, ZSet):
+        return b'zset'
+    return b'list'
+
+
+def range_slice(items, start, stop):
+    """items from start to stop both inclusive, negative from the end, as LRANGE and ZRANGE"""
+    length = len(items)
+    start, stop = to_int(start), to_int(stop)
+    if start < 0:
+        start = max(length + start, 0)
+    if stop < 0:
+        stop = length + stop
+    if start > stop or start >= length:
+        return []
+    return items[start:stop + 1]
+
+
+def limit(items, args):
+    """items after LIMIT offset count in args if any, and the rest of args"""
+    args = list(args)
+    upper = [to_bytes(arg).upper() for arg in args]
+    if b'LIMIT' in upper:
+        index = upper.index(b'LIMIT')
+        offset, count = to_int(args[index + 1]), to_int(args[index + 2])
+        del args[index:index + 3]
+        items = list(items)[offset:] if count < 0 else list(items)[offset:offset + count]
+    return items, args
+
+
+class Server(object):
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.dbs = defaultdict(dict)
+        self.expires = defaultdict(dict)
+        self.scripts = {}
+        self._lua = None
+
+    def execute(self, db, args):
+        """reply of a command, or ResponseError"""
+        name = to_bytes(args[0]).decode('utf-8').lower()
+        command = getattr(self, 'command_' + name, None)
+        if command is None:
+            return ResponseError("unknown command '%s'" % name)
+        with self.lock:
+            try:
+                return command(db, *[to_bytes(arg) for arg in args[1:]])
+            except ResponseError as e:
+                return e
+            except (IndexError, TypeError):
+                return ResponseError("wrong number of arguments for '%s' command" % name)
+
+    # keys
+
+    def _data(self, db):
+        return self.dbs[db]
+
+    def _expire_if_needed(self, db, key):
+        deadline = self.expires[db].get(key)
+        if deadline is not None and deadline <= time():
+            self.dbs[db].pop(key, None)
+            del self.expires[db][key]
+
+    def _get(self, db, key, kind=None):
+        self._expire_if_needed(db, key)
+        value = self.dbs[db].get(key)
+        if value is not None and kind is not None and not isinstance(value, kind):
+            raise ResponseError(WRONGTYPE)
+        return value
+
+    def _get_or_create(self, db, key, kind):
+        value = self._get(db, key, kind)
+        if value is None:
+            value = self.dbs[db][key] = kind()
+        return value
+
+    def _set(self, db, key, value):
+        self.dbs[db][key] = value
+        self.expires[db].pop(key, None)
+
+    def _delete(self, db, key):
+        self.expires[db].pop(key, None)
+        return self.dbs[db].pop(key, None) is not None
+
+    def _cleanup(self, db, key):
+        """remove key of an emptied structure, as the server does"""
+        value = self.dbs[db].get(key)
+        if value is not None and not isinstance(value, bytes) and not len(value):
+            self._delete(db, key)
+
+    def _keys(self, db, pattern=b'*'):
+        regex = glob_regex(pattern)
+        keys = []
+        for key in list(self.dbs[db]):
+            self._expire_if_needed(db, key)
+            if key in self.dbs[db] and regex.match(key):
+                keys.append(key)
+        return keys
+
+    def command_ping(self, db, *args):
+        return Status(b'PONG')
+
+    def command_echo(self, db, message):
+        return message
+
+    def command_time(self, db):
+        now = time()
+        return [to_bytes(int(now)), to_bytes(int((now - int(now)) * 1000000))]
+
+    def command_info(self, db, *args):
+        return b'redis_version:2.8.0\r\n'
+
+    def command_select(self, db, index):
+        return OK
+
+    def command_dbsize(self, db):
+        return len(self._keys(db))
+
+    def command_flushdb(self, db):
+        self.dbs.pop(db, None)
+        self.expires.pop(db, None)
+        return OK
+
+    def command_flushall(self, db):
+        self.dbs.clear()
+        self.expires.clear()
+        return OK
+
+    def command_del(self, db, *keys):
+        return sum(1 for key in keys if self._get(db, key) is not None and self._delete(db, key))
+
+    def command_exists(self, db, *keys):
+        return sum(1 for key in keys if self._get(db, key) is not None)
+
+    def command_type(self, db, key):
+        value = self._get(db, key)
+        return Status(b'none' if value is None else type_name(value))
+
+    def command_keys(self, db, pattern):
+        return self._keys(db, pattern)
+
+    def command_scan(self, db, cursor, *args):
+        # all at once, which the iteration of SCAN allows
+        pattern = b'*'
+        upper = [arg.upper() for arg in args]
+        if b'MATCH' in upper:
+            pattern = args[upper.index(b'MATCH') + 1]
+        return [b'0', self._keys(db, pattern)]
+
+    def command_rename(self, db, key, newkey):
+        value = self._get(db, key)
+        if value is None:
+            raise ResponseError('no such key')
+        deadline = self.expires[db].get(key)
+        self._delete(db, key)
+        self._set(db, newkey, value)
+        if deadline is not None:
+            self.expires[db][newkey] = deadline
+        return OK
+
+    def command_expire(self, db, key, seconds):
+        return self.command_pexpire(db, key, to_int(seconds) * 1000)
+
+    def command_pexpire(self, db, key, milliseconds):
+        if self._get(db, key) is None:
+            return 0
+        self.expires[db][key] = time() + to_int(milliseconds) / 1000.0
+        return 1
+
+    def command_persist(self, db, key):
+        return 1 if self.expires[db].pop(key, None) is not None else 0
+
+    def command_pttl(self, db, key):
+        if self._get(db, key) is None:
+            return -2
+        deadline = self.expires[db].get(key)
+        return -1 if deadline is None else int(round((deadline - time()) * 1000))
+
+    def command_ttl(self, db, key):
+        ttl = self.command_pttl(db, key)
+        return ttl if ttl < 0 else int(round(ttl / 1000.0))
+
+    def command_object(self, db, subcommand, key):
+        value = self._get(db, key)
+        if value is None:
+            return None
+        return {b'string': b'raw', b'hash': b'hashtable', b'set': b'hashtable',
+                b'zset': b'skiplist', b'list': b'linkedlist'}[type_name(value)]
+
+    def command_dump(self, db, key):
+        value = self._get(db, key)
+        if value is None:
+            return None
+        if isinstance(value, ZSet):
+            value = ('zset', value.scores)
+        return pickle.dumps(value, 2)
+
+    def command_restore(self, db, key, ttl, serialized, *args):
+        if self._get(db, key) is not None and b'REPLACE' not in [arg.upper() for arg in args]:
+            raise ResponseError('BUSYKEY Target key name already exists.')
+        value = pickle.loads(serialized)
+        if isinstance(value, tuple):
+            value = ZSet(value[1])
+        self._set(db, key, value)
+        if to_int(ttl) > 0:
+            self.command_pexpire(db, key, ttl)
+        return OK
+
+    def command_memory(self, db, subcommand, key, *args):
+        value = self._get(db, key)
+        if value is None:
+            return None
+        return len(key) + len(self.command_dump(db, key))
+
+    # strings
+
+    def command_get(self, db, key):
+        return self._get(db, key, bytes)
+
+    def command_mget(self, db, *keys):
+        return [value if isinstance(value, bytes) else None for value in (self._get(db, key) for key in keys)]
+
+    def command_set(self, db, key, value, *args):
+        upper = [arg.upper() for arg in args]
+        exists = self._get(db, key) is not None
+        if (b'NX' in upper and exists) or (b'XX' in upper and not exists):
+            return None
+        self._set(db, key, value)
+        if b'EX' in upper:
+            self.command_expire(db, key, args[upper.index(b'EX') + 1])
+        if b'PX' in upper:
+            self.command_pexpire(db, key, args[upper.index(b'PX') + 1])
+        return OK
+
+    def command_setex(self, db, key, seconds, value):
+        return self.command_set(db, key, value, b'EX', seconds)
+
+    def command_setnx(self, db, key, value):
+        return 1 if self.command_set(db, key, value, b'NX') else 0
+
+    def command_append(self, db, key, value):
+        value = (self._get(db, key, bytes) or b'') + value
+        self.dbs[db][key] = value
+        return len(value)
+
+    def command_strlen(self, db, key):
+        return len(self._get(db, key, bytes) or b'')
+
+    def command_getrange(self, db, key, start, end):
+        value = self._get(db, key, bytes) or b''
+        start, end = to_int(start), to_int(end)
+        if start < 0:
+            start = max(len(value) + start, 0)
+        if end < 0:
+            end = len(value) + end
+        return value[start:end + 1] if start <= end else b''
+
+    def command_setrange(self, db, key, offset, value):
+        current = self._get(db, key, bytes) or b''
+        offset = to_int(offset)
+        current = current.ljust(offset, b'\x00')
+        current = current[:offset] + value + current[offset + len(value):]
+        self.dbs[db][key] = current
+        return len(current)
+
+    def command_incrby(self, db, key, amount):
+        value = to_int(self._get(db, key, bytes) or 0) + to_int(amount)
+        self.dbs[db][key] = to_bytes(value)
+        return value
+
+    def command_incr(self, db, key):
+        return self.command_incrby(db, key, 1)
+
+    def command_decrby(self, db, key, amount):
+        return self.command_incrby(db, key, -to_int(amount))
+
+    def command_decr(self, db, key):
+        return self.command_incrby(db, key, -1)
+
+    def command_incrbyfloat(self, db, key, amount):
+        value = format_float(to_float(self._get(db, key, bytes) or 0) + to_float(amount))
+        self.dbs[db][key] = value
+        return value
+
+    # hashes
+
+    def command_hset(self, db, key, *pairs):
+        if not pairs or len(pairs) % 2:
+            raise TypeError
+        data = self._get_or_create(db, key, dict)
+        added = 0
+        for field, value in zip(pairs[::2], pairs[1::2]):
+            added += field not in data
+            data[field] = value
+        return added
+
+    def command_hmset(self, db, key, *pairs):
+        self.command_hset(db, key, *pairs)
+        return OK
+
+    def command_hsetnx(self, db, key, field, value):
+        data = self._get_or_create(db, key, dict)
+        if field in data:
+            return 0
+        data[field] = value
+        return 1
+
+    def command_hget(self, db, key, field):
+        return (self._get(db, key, dict) or {}).get(field)
+
+    def command_hmget(self, db, key, *fields):
+        data = self._get(db, key, dict) or {}
+        return [data.get(field) for field in fields]
+
+    def command_hgetall(self, db, key):
+        data = self._get(db, key, dict) or {}
+        return [item for pair in data.items() for item in pair]
+
+    def command_hkeys(self, db, key):
+        return list(self._get(db, key, dict) or ())
+
+    def command_hvals(self, db, key):
+        return list((self._get(db, key, dict) or {}).values())
+
+    def command_hlen(self, db, key):
+        return len(self._get(db, key, dict) or ())
+
+    def command_hstrlen(self, db, key, field):
+        return len((self._get(db, key, dict) or {}).get(field, b''))
+
+    def command_hexists(self, db, key, field):
+        return 1 if field in (self._get(db, key, dict) or ()) else 0
+
+    def command_hdel(self, db, key, *fields):
+        data = self._get(db, key, dict) or {}
+        deleted = sum(1 for field in fields if data.pop(field, None) is not None)
+        self._cleanup(db, key)
+        return deleted
+
+    def command_hincrby(self, db, key, field, amount):
+        data = self._get_or_create(db, key, dict)
+        value = to_int(data.get(field, 0)) + to_int(amount)
+        data[field] = to_bytes(value)
+        return value
+
+    def command_hincrbyfloat(self, db, key, field, amount):
+        data = self._get_or_create(db, key, dict)
+        value = format_float(to_float(data.get(field, 0)) + to_float(amount))
+        data[field] = value
+        return value
+
+    def command_hscan(self, db, key, cursor, *args):
+        return [b'0', self.command_hgetall(db, key)]
+
+    # sets
+
+    def command_sadd(self, db, key, *members):
+        data = self._get_or_create(db, key, set)
+        added = len(set(members) - data)
+        data.update(members)
+        return added
+
+    def command_srem(self, db, key, *members):
+        data = self._get(db, key, set) or set()
+        removed = len(data & set(members))
+        data.difference_update(members)
+        self._cleanup(db, key)
+        return removed
+
+    def command_smembers(self, db, key):
+        return set_members(self._get(db, key, set) or ())
+
+    def command_sismember(self, db, key, member):
+        return 1 if member in (self._get(db, key, set) or ()) else 0
+
+    def command_scard(self, db, key):
+        return len(self._get(db, key, set) or ())
+
+    def command_srandmember(self, db, key, count=None):
+        members = list(self._get(db, key, set) or ())
+        if count is None:
+            return random.choice(members) if members else None
+        count = to_int(count)
+        if count < 0:
+            return [random.choice(members) for _ in range(-count)] if members else []
+        return random.sample(members, min(count, len(members)))
+
+    def command_spop(self, db, key):
+        data = self._get(db, key, set) or set()
+        if not data:
+            return None
+        member = data.pop()
+        self._cleanup(db, key)
+        return member
+
+    def command_sscan(self, db, key, cursor, *args):
+        return [b'0', self.command_smembers(db, key)]
+
+    def _sets(self, db, keys):
+        sets = []
+        for key in keys:
+            value = self._get(db, key)
+            if isinstance(value, ZSet):
+                value = set(value.scores)
+            elif value is not None and not isinstance(value, set):
+                raise ResponseError(WRONGTYPE)
+            sets.append(value or set())
+        return sets
+
+    def command_sinter(self, db, *keys):
+        sets = self._sets(db, keys)
+        return set_members(set.intersection(*sets))
+
+    def command_sunion(self, db, *keys):
+        return set_members(set().union(*self._sets(db, keys)))
+
+    def command_sdiff(self, db, *keys):
+        sets = self._sets(db, keys)
+        return set_members(sets[0].difference(*sets[1:]))
+
+    def _store_set(self, db, key, members):
+        self._delete(db, key)
+        if members:
+            self.dbs[db][key] = set(members)
+        return len(members)
+
+    def command_sinterstore(self, db, key, *keys):
+        return self._store_set(db, key, self.command_sinter(db, *keys))
+
+    def command_sunionstore(self, db, key, *keys):
+        return self._store_set(db, key, self.command_sunion(db, *keys))
+
+    def command_sdiffstore(self, db, key, *keys):
+        return self._store_set(db, key, self.command_sdiff(db, *keys))
+
+    # sorted sets
+
+    def _zset(self, db, key):
+        return self._get(db, key, ZSet) or ZSet()
+
+    def command_zadd(self, db, key, *args):
+        args = list(args)
+        flags = set()
+        while args and args[0].upper() in (b'NX', b'XX', b'CH'):
+            flags.add(args.pop(0).upper())
+        data = self._get_or_create(db, key, ZSet)
+        changed = 0
+        for score, member in zip(args[::2], args[1::2]):
+            exists = member in data.scores
+            if (b'NX' in flags and exists) or (b'XX' in flags and not exists):
+                continue
+            score = to_float(score)
+            if not exists or (b'CH' in flags and data.scores[member] != score):
+                changed += 1
+            data.scores[member] = score
+        self._cleanup(db, key)
+        return changed
+
+    def command_zincrby(self, db, key, amount, member):
+        data = self._get_or_create(db, key, ZSet)
+        score = data.scores[member] = data.scores.get(member, 0.0) + to_float(amount)
+        return format_float(score)
+
+    def command_zrem(self, db, key, *members):
+        data = self._zset(db, key)
+        removed = sum(1 for member in members if data.scores.pop(member, None) is not None)
+        self._cleanup(db, key)
+        return removed
+
+    def command_zscore(self, db, key, member):
+        score = self._zset(db, key).scores.get(member)
+        return None if score is None else format_float(score)
+
+    def command_zcard(self, db, key):
+        return len(self._zset(db, key))
+
+    def command_zcount(self, db, key, min, max):
+        return len(list(self._zset(db, key).by_score(parse_score_bound(min), parse_score_bound(max))))
+
+    def _reply_items(self, items, withscores):
+        if withscores:
+            return [item for member, score in items for item in (member, format_float(score))]
+        return [member for member, _ in items]
+
+    def command_zrange(self, db, key, start, stop, *args):
+        items = range_slice(self._zset(db, key).items(), start, stop)
+        return self._reply_items(items, b'WITHSCORES' in [arg.upper() for arg in args])
+
+    def command_zrevrange(self, db, key, start, stop, *args):
+        items = range_slice(self._zset(db, key).items(desc=True), start, stop)
+        return self._reply_items(items, b'WITHSCORES' in [arg.upper() for arg in args])
+
+    def command_zrangebyscore(self, db, key, min, max, *args):
+        items = self._zset(db, key).by_score(parse_score_bound(min), parse_score_bound(max))
+        items, args = limit(items, args)
+        return self._reply_items(items, b'WITHSCORES' in [arg.upper() for arg in args])
+
+    def command_zrevrangebyscore(self, db, key, max, min, *args):
+        items = self._zset(db, key).by_score(parse_score_bound(min), parse_score_bound(max), desc=True)
+        items, args = limit(items, args)
+        return self._reply_items(items, b'WITHSCORES' in [arg.upper() for arg in args])
+
+    def command_zrangebylex(self, db, key, min, max, *args):
+        (min, min_exclusive), (max, max_exclusive) = parse_lex_bound(min), parse_lex_bound(max)
+        members = []
+        for member in sorted(self._zset(db, key).scores):
+            if min == b'+' or max == b'-':
+                break
+            if min != b'-' and (member < min or (member == min and min_exclusive)):
+                continue
+            if max != b'+' and (member > max or (member == max and max_exclusive)):
+                continue
+            members.append(member)
+        members, _ = limit(members, args)
+        return list(members)
+
+    def command_zrank(self, db, key, member, desc=False):
+        members = [item for item, _ in self._zset(db, key).items(desc)]
+        return members.index(member) if member in members else None
+
+    def command_zrevrank(self, db, key, member):
+        return self.command_zrank(db, key, member, desc=True)
+
+    def command_zremrangebyscore(self, db, key, min, max):
+        data = self._zset(db, key)
+        members = [member for member, _ in data.by_score(parse_score_bound(min), parse_score_bound(max))]
+        return self.command_zrem(db, key, *members) if members else 0
+
+    def command_zremrangebyrank(self, db, key, start, stop):
+        members = [member for member, _ in range_slice(self._zset(db, key).items(), start, stop)]
+        return self.command_zrem(db, key, *members) if members else 0
+
+    def command_zscan(self, db, key, cursor, *args):
+        return [b'0', self._reply_items(self._zset(db, key).items(), True)]
+
+    def _zstore(self, db, dest, numkeys, args, intersect):
+        numkeys = to_int(numkeys)
+        keys, args = args[:numkeys], list(args[numkeys:])
+        upper = [arg.upper() for arg in args]
+        weights = [1.0] * numkeys
+        if b'WEIGHTS' in upper:
+            index = upper.index(b'WEIGHTS')
+            weights = [to_float(weight) for weight in args[index + 1:index + 1 + numkeys]]
+        aggregate = args[upper.index(b'AGGREGATE') + 1].upper() if b'AGGREGATE' in upper else b'SUM'
+        function = {b'SUM': lambda a, b: a + b, b'MIN': min, b'MAX': max}[aggregate]
+        scored = []
+        for key in keys:
+            value = self._get(db, key)
+            if isinstance(value, ZSet):
+                scored.append(value.scores)
+            elif isinstance(value, set):
+                scored.append(dict((member, 1.0) for member in value))
+            elif value is None:
+                scored.append({})
+            else:
+                raise ResponseError(WRONGTYPE)
+        if intersect:
+            members = set(scored[0]).intersection(*scored[1:]) if scored else set()
+        else:
+            members = set().union(*scored)
+        result = {}
+        for member in members:
+            score = None
+            for scores, weight in zip(scored, weights):
+                if member in scores:
+                    weighted = scores[member] * weight
+                    score = weighted if score is None else function(score, weighted)
+            result[member] = score
+        self._delete(db, dest)
+        if result:
+            self.dbs[db][dest] = ZSet(result)
+        return len(result)
+
+    def command_zinterstore(self, db, dest, numkeys, *args):
+        return self._zstore(db, dest, numkeys, args, True)
+
+    def command_zunionstore(self, db, dest, numkeys, *args):
+        return self._zstore(db, dest, numkeys, args, False)
+
+    # lists
+
+    def command_rpush(self, db, key, *values):
+        data = self._get_or_create(db, key, list)
+        data.extend(values)
+        return len(data)
+
+    def command_lpush(self, db, key, *values):
+        data = self._get_or_create(db, key, list)
+        data[:0] = reversed(values)
+        return len(data)
+
+    def command_lpop(self, db, key):
+        data = self._get(db, key, list) or []
+        value = data.pop(0) if data else None
+        self._cleanup(db, key)
+        return value
+
+    def command_rpop(self, db, key):
+        data = self._get(db, key, list) or []
+        value = data.pop() if data else None
+        self._cleanup(db, key)
+        return value
+
+    def command_llen(self, db, key):
+        return len(self._get(db, key, list) or ())
+
+    def command_lrange(self, db, key, start, stop):
+        return range_slice(self._get(db, key, list) or [], start, stop)
+
+    def command_lindex(self, db, key, index):
+        data = self._get(db, key, list) or []
+        index = to_int(index)
+        return data[index] if -len(data) <= index < len(data) else None
+
+    # sort
+
+    def _lookup(self, db, pattern, member):
+        if b'*' not in pattern:
+            return None
+        key, _, field = pattern.replace(b'*', member, 1).partition(b'->')
+        if field:
+            return self.command_hget(db, key, field)
+        value = self._get(db, key)
+        return value if isinstance(value, bytes) else None
+
+    def command_sort(self, db, key, *args):
+        value = self._get(db, key)
+        if value is None:
+            members = []
+        elif isinstance(value, ZSet):
+            members = [member for member, _ in value.items()]
+        elif isinstance(value, (set, list)):
+            members = list(value)
+        else:
+            raise ResponseError(WRONGTYPE)
+        args = list(args)
+        upper = [arg.upper() for arg in args]
+        by = args[upper.index(b'BY') + 1] if b'BY' in upper else None
+        gets = [args[i + 1] for i, arg in enumerate(upper) if arg == b'GET']
+        store = args[upper.index(b'STORE') + 1] if b'STORE' in upper else None
+        desc = b'DESC' in upper
+        alpha = b'ALPHA' in upper
+        if by is None or b'*' in by:
+            def weight(member):
+                value = member if by is None else self._lookup(db, by, member)
+                if alpha:
+                    return value or b''
+                try:
+                    return float(value or 0)
+                except ValueError:
+                    raise ResponseError("One or more scores can't be converted into double")
+            members.sort(key=weight, reverse=desc)
+        members, _ = limit(members, args)
+        if gets:
+            result = [member if pattern == b'#' else self._lookup(db, pattern, member)
+                      for member in members for pattern in gets]
+        else:
+            result = list(members)
+        if store is not None:
+            self._delete(db, store)
+            if result:
+                self.dbs[db][store] = [item if item is not None else b'' for item in result]
+            return len(result)
+        return result
+
+    # scripting
+
+    def command_script(self, db, subcommand, *args):
+        subcommand = subcommand.upper()
+        if subcommand == b'LOAD':
+            sha = sha1(args[0]).hexdigest().encode('utf-8')
+            if sha not in self.scripts:
+                self.scripts[sha] = self.lua.compile(args[0])
+            return sha
+        elif subcommand == b'EXISTS':
+            return [1 if sha.lower() in self.scripts else 0 for sha in args]
+        elif subcommand == b'FLUSH':
+            self.scripts.clear()
+            return OK
+        raise ResponseError('Unknown SCRIPT subcommand')
+
+    def command_evalsha(self, db, sha, numkeys, *args):
+        script = self.scripts.get(sha.lower())
+        if script is None:
+            raise NoScriptError('NOSCRIPT No matching script. Please use EVAL.')
+        numkeys = to_int(numkeys)
+        return self.lua.run(script, self, db, args[:numkeys], args[numkeys:])
+
+    def command_eval(self, db, script, numkeys, *args):
+        sha = self.command_script(db, b'LOAD', script)
+        return self.command_evalsha(db, sha, numkeys, *args)
+
+    @property
+    def lua(self):
+        if self._lua is None:
+            from .memorylua import LuaScripting
+
+            self._lua = LuaScripting()
+        return self._lua
+
+
+_servers = {}
+_servers_lock = threading.Lock()
+
+
+def get_server(name):
+    """server of name in the process, created on first use"""
+    with _servers_lock:
+        if name not in _servers:
+            _servers[name] = Server()
+        return _servers[name]
+
+
+def drop_server(name):
+    """discard the server of name with all of its data"""
+    with _servers_lock:
+        _servers.pop(name, None)
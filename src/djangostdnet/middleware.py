@@ -0,0 +1,47 @@
+from django.db import transaction
+from . import models
+from .session import Session, bind_session, unbind_session
+
+
+class SessionMiddleware(object):
+    """
+    Bind one session to each request.
+    Changes made through django-stdnet models are committed at once in response time,
+    and discarded when the view raises.
+    Every request is in a transaction of the default database, as ATOMIC_REQUESTS makes,
+    and the session is committed only after the transaction is, so it is discarded if the transaction fails.
+    """
+    def process_request(self, request):
+        request.stdnet_atomic = transaction.atomic()
+        request.stdnet_atomic.__enter__()
+        session = Session(models.mapper)
+        session.begin()
+        bind_session(session)
+        request.stdnet_session = session
+
+    def process_response(self, request, response):
+        # unbind first, signal handlers invoked by the commit use their own session
+        session = unbind_session()
+        pending = session is not None and session.transaction is not None
+        try:
+            self._exit_atomic(request, None, None, None)
+        except Exception:
+            if pending:
+                session.transaction.rollback()
+            raise
+        if pending:
+            session.commit()
+        return response
+
+    def process_exception(self, request, exception):
+        session = unbind_session()
+        if session is not None and session.transaction is not None:
+            session.transaction.rollback()
+        self._exit_atomic(request, type(exception), exception, None)
+
+    def _exit_atomic(self, request, exc_type, exc_value, traceback):
+        # rolled back by an exception
+        atomic = getattr(request, 'stdnet_atomic', None)
+        if atomic is not None:
+            request.stdnet_atomic = None
+            atomic.__exit__(exc_type, exc_value, traceback)
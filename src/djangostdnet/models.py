@@ -11,8 +11,14 @@ from django.db.models import signals
 from six import with_metaclass
 from stdnet import odm
 from . import DJANGO_VERSION
+from .loading import BLOB
+from .manager import Manager
 from .mapper import Mapper
-from .fields import OneToOneField, ImageField, IPAddressField, DecimalField, DateTimeField
+from .prefixes import parse_prefix_indexes, update_prefix_indexes, remove_from_prefix_indexes
+from .ranges import parse_range_indexes
+from .relations import register_relation_counts
+from .sortedviews import parse_sorted_views, update_sorted_views, remove_from_sorted_views
+from .fields import OneToOneField, ImageField, IPAddressField, DecimalField, DateTimeField, CompressedTextField
 
 
 logger = logging.getLogger(__name__)
@@ -20,6 +26,8 @@ logger = logging.getLogger(__name__)
 
 mapper = Mapper(install_global=True)
 
+DELETE_CHUNK_SIZE = 1000
+
 
 _mapping = {
     models.AutoField: odm.AutoIdField,
@@ -37,6 +45,10 @@ _mapping = {
 }
 
 
+# generated fields of which db_index makes range indexes
+_range_indexed = (models.IntegerField, models.FloatField, models.DateField)
+
+
 def register_field_mapping(django_field, stdnet_field_or_callable):
     _mapping[django_field] = stdnet_field_or_callable
 
@@ -86,9 +98,27 @@ else:
         return opts.fields + opts.many_to_many
 
 
+def is_deferred_attr(instance, name):
+    """whether name is attribute of a field not loaded to the persistent instance by load_only or defer"""
+    # refer __dict__ directly, getattr would recurse
+    if name.startswith('_') or instance.__dict__.get('_loadedfields') is None:
+        return False
+    return any(field.attname == name for field in instance._meta.scalarfields)
+
+
+def load_deferred_attr(instance, name):
+    mapper[instance.__class__].load_deferred_fields(instance)
+    if name not in instance.__dict__:
+        raise AttributeError(name)
+    # through the descriptor of the field if any
+    return getattr(instance, name)
+
+
 class ModelMeta(odm.ModelType):
     @staticmethod
     def proxy__getattr__(instance, name):
+        if is_deferred_attr(instance, name):
+            return load_deferred_attr(instance, name)
         django_meta = getattr(instance, '_django_meta', None)
         # retrieve from instance dict first for descriptor which may raise AttributeError
         attr = (django_meta.model.__dict__.get(name)
@@ -112,6 +142,9 @@ class ModelMeta(odm.ModelType):
         meta = dct.get('Meta', None)
         meta_model = getattr(meta, 'django_model', None)
         meta_through = {}
+        meta_range_indexes = list(getattr(meta, 'range_indexes', ()))
+        if hasattr(meta, 'range_indexes'):
+            del meta.range_indexes
         if meta_model:
             class Meta(object):
                 model = meta_model
@@ -164,6 +197,10 @@ class ModelMeta(odm.ModelType):
                             callable_obj = odm_field_or_callable
                             odm_field = callable_obj(field)
                         dct[field.name] = odm_field(**field_params)
+                        if field.db_index and not field.primary_key and isinstance(field, _range_indexed) \
+                                and dct[field.name].internal_type == 'numeric' \
+                                and field.name not in meta_range_indexes:
+                            meta_range_indexes.append(field.name)
                 else:
                     logger.warn("not supported for field type: %s", field.__class__.__name__)
 
@@ -175,6 +212,18 @@ class ModelMeta(odm.ModelType):
             del meta.read_backend
         if meta_read_backend is None:
             meta_read_backend = meta_backend
+        meta_sorted_views = getattr(meta, 'sorted_views', ())
+        if hasattr(meta, 'sorted_views'):
+            del meta.sorted_views
+        meta_prefix_indexes = getattr(meta, 'prefix_indexes', ())
+        if hasattr(meta, 'prefix_indexes'):
+            del meta.prefix_indexes
+        meta_relation_counts = getattr(meta, 'relation_counts', ())
+        if hasattr(meta, 'relation_counts'):
+            del meta.relation_counts
+        meta_storage = getattr(meta, 'storage', 'fields')
+        if hasattr(meta, 'storage'):
+            del meta.storage
 
         if meta_backend in settings.STDNET_BACKENDS:
             value = settings.STDNET_BACKENDS[meta_backend]
@@ -193,8 +242,47 @@ class ModelMeta(odm.ModelType):
 
         model = odm.ModelType.__new__(mcs, name, bases, dct)
         model._meta.object_name = name
+        if meta_storage != 'fields':
+            # msgpack is required only by models packing fields
+            from .storage import setup_storage
+            setup_storage(model, meta_storage)
         mapper.register(model, meta_backend, meta_read_backend)
 
+        if meta_relation_counts:
+            register_relation_counts(model, meta_relation_counts)
+
+        if meta_prefix_indexes:
+            model._prefix_indexes = parse_prefix_indexes(model._meta, meta_prefix_indexes)
+
+            def post_commit_handle_prefix_indexes(_ev, _model, instances=(), synced=(), **kwargs):
+                update_prefix_indexes(mapper[model], instances, synced)
+
+            def post_delete_handle_prefix_indexes(_ev, _model, instances=(), **kwargs):
+                remove_from_prefix_indexes(mapper[model], instances)
+
+            mapper.post_commit.bind(post_commit_handle_prefix_indexes, sender=model)
+            mapper.post_delete.bind(post_delete_handle_prefix_indexes, sender=model)
+
+        # range indexes are kept as ascending sorted views
+        range_indexes = parse_range_indexes(model._meta, meta_range_indexes)
+        sorted_views = parse_sorted_views(model._meta, meta_sorted_views)
+        sorted_views.extend((field, False) for field in range_indexes
+                            if field not in [view_field for view_field, _ in sorted_views])
+        if range_indexes:
+            model._range_indexes = range_indexes
+
+        if sorted_views:
+            model._sorted_views = sorted_views
+
+            def post_commit_handle_sorted_views(_ev, _model, instances=(), synced=(), **kwargs):
+                update_sorted_views(mapper[model], instances, synced)
+
+            def post_delete_handle_sorted_views(_ev, _model, instances=(), **kwargs):
+                remove_from_sorted_views(mapper[model], instances)
+
+            mapper.post_commit.bind(post_commit_handle_sorted_views, sender=model)
+            mapper.post_delete.bind(post_delete_handle_sorted_views, sender=model)
+
         if meta_model:
             registry.register(meta_model, model)
 
@@ -203,12 +291,24 @@ class ModelMeta(odm.ModelType):
                 manager = mapper[model]
                 manager.session().add_from_django_object(manager, instance)
 
+            # deletion mirrored by one side must not echo back per row
+            delete_gate = ThreadGate()
+            model._delete_gate = delete_gate
+
             def post_delete_handle_from_django(instance, **kwargs):
-                manager = mapper[model]
-                manager.session().delete_from_django_object(manager, instance)
+                with delete_gate as already_in_gate:
+                    if already_in_gate:
+                        return
+                    manager = mapper[model]
+                    manager.session().delete_from_django_object(manager, instance)
 
             def post_delete_handle_from_stdnet(_ev, _model, instances=(), **kwargs):
-                meta_model.objects.filter(pk__in=instances).delete()
+                with delete_gate as already_in_gate:
+                    if already_in_gate:
+                        return
+                    instances = list(instances)
+                    for i in range(0, len(instances), DELETE_CHUNK_SIZE):
+                        meta_model.objects.filter(pk__in=instances[i:i + DELETE_CHUNK_SIZE]).delete()
 
             signals.post_save.connect(post_save_handle_from_django, sender=meta_model, weak=False)
             # XXX Why not this is pre_delete?
@@ -290,11 +390,55 @@ class ModelMeta(odm.ModelType):
         return model
 
 
+def delete_django_queryset(queryset, chunk_size=DELETE_CHUNK_SIZE):
+    """
+    Delete rows of a queryset of a mapped Django model and their mirrored objects chunk by chunk,
+    without mirroring back per row.
+    """
+    model = registry.get_stdnet_model(queryset.model)
+    manager = mapper[model]
+    pk = model._meta.pk
+    deleted = 0
+    while True:
+        pks = list(queryset.values_list('pk', flat=True)[:chunk_size])
+        if not pks:
+            return deleted
+        with model._delete_gate:
+            queryset.model.objects.filter(pk__in=pks).delete()
+            manager.filter(**{'%s__in' % pk.name: pks}).delete()
+        deleted += len(pks)
+
+
 class DjangoStdnetModel(with_metaclass(ModelMeta, odm.StdModel)):
+    manager_class = Manager
+
+    def __getattr__(self, name):
+        if is_deferred_attr(self, name):
+            return load_deferred_attr(self, name)
+        raise AttributeError(name)
+
+    def fieldvalue_pairs(self, exclude_cache=False):
+        packed_fields = getattr(self.__class__, '_packed_fields', ())
+        # the blob is written as a whole, so all of packed fields are loaded
+        for field in packed_fields:
+            getattr(self, field.attname, None)
+        # not by hasattr, which loads deferred fields
+        for field in self._meta.scalarfields:
+            if exclude_cache and field.as_cache:
+                continue
+            if field.attname == BLOB:
+                continue
+            if field.attname in self.__dict__:
+                yield field, self.__dict__[field.attname]
+        # after packed fields, which it packs
+        if packed_fields:
+            yield self._meta.dfields[BLOB], None
+
     class Meta:
         abstract = True
 
 
 Model = DjangoStdnetModel
 
-__all__ = ('Model', 'OneToOneField', 'ImageField', 'IPAddressField', 'DecimalField', 'DateTimeField')
+__all__ = ('Model', 'delete_django_queryset', 'OneToOneField', 'ImageField', 'IPAddressField', 'DecimalField',
+           'DateTimeField', 'CompressedTextField')
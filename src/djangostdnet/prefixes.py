@@ -0,0 +1,107 @@
+from stdnet import odm, FieldError, ImproperlyConfigured
+from stdnet.utils import zip
+from . import scripts  # noqa, registers lua scripts
+
+
+PREFIX = 'prefix'
+# separates a value and an id in a member of a prefix index, as ids sharing a value
+SEPARATOR = b'\x00'
+DEFAULT_COMPLETE_COUNT = 10
+
+
+# fields of which stored values are text, as bytes, pickles, JSON and compressed text are not
+PREFIX_INDEX_FIELDS = (odm.SymbolField, odm.CharField)
+
+
+def parse_prefix_indexes(meta, names):
+    fields = []
+    for name in names:
+        field = meta.dfields.get(name)
+        if field is None:
+            raise FieldError('Field "%s" can not be a prefix index' % name)
+        if type(field) not in PREFIX_INDEX_FIELDS:
+            raise ImproperlyConfigured('Field "%s" of %s can not be a prefix index, which is not a text field'
+                                       % (name, type(field).__name__))
+        fields.append(field)
+    return fields
+
+
+def prefix_key(backend, meta, field):
+    return backend.basekey(meta, PREFIX, field.attname)
+
+
+def prefix_values_key(backend, meta, field):
+    return backend.basekey(meta, PREFIX, field.attname, 'values')
+
+
+def encode_value(value):
+    if isinstance(value, bytes):
+        return value
+    return value.encode('utf-8')
+
+
+def queue_prefix_updates(pipe, backend, meta, field, ids, values):
+    """queue maintaining the prefix index of field for ids having values, None to remove"""
+    args = []
+    for id, value in zip(ids, values):
+        if value is None:
+            args.extend((id, 'del', ''))
+        else:
+            args.extend((id, 'set', value))
+    if args:
+        pipe.execute_script('djangostdnet_prefix_index',
+                            (prefix_key(backend, meta, field), prefix_values_key(backend, meta, field)), *args)
+
+
+def update_prefix_indexes(manager, instances, synced=()):
+    """put values of committed instances to prefix indexes of their model but ones of fields synced already,
+    in a pipeline"""
+    meta = manager._meta
+    fields = [field for field in getattr(manager.model, '_prefix_indexes', ()) if field not in synced]
+    if not fields or not instances:
+        return
+    backend = manager.backend
+    pipe = backend.client.pipeline()
+    ids = [instance.pkvalue() for instance in instances]
+    for field in fields:
+        values = [getattr(instance, field.attname, None) for instance in instances]
+        queue_prefix_updates(pipe, backend, meta, field, ids, values)
+    pipe.execute()
+
+
+def remove_from_prefix_indexes(manager, ids):
+    meta = manager._meta
+    fields = getattr(manager.model, '_prefix_indexes', ())
+    if not fields or not ids:
+        return
+    backend = manager.backend
+    pipe = backend.client.pipeline()
+    for field in fields:
+        queue_prefix_updates(pipe, backend, meta, field, ids, [None] * len(ids))
+    pipe.execute()
+
+
+def get_prefix_field(model, name):
+    for field in getattr(model, '_prefix_indexes', ()):
+        if field.name == name:
+            return field
+    raise FieldError('Field "%s" has no prefix index' % name)
+
+
+def prefix_bounds(manager, name, prefix):
+    """lexicographic sorted set of the prefix index of field, and bounds of members of values starting with prefix"""
+    field = get_prefix_field(manager.model, name)
+    prefix = encode_value(prefix)
+    return prefix_key(manager.read_backend, manager._meta, field), b'[' + prefix, b'(' + prefix + b'\xff'
+
+
+def prefix_ids(manager, name, prefix, count=None):
+    """ids of which values of field start with prefix, in order of the values, at most count of them"""
+    meta = manager._meta
+    backend = manager.read_backend
+    key, min, max = prefix_bounds(manager, name, prefix)
+    args = ['ZRANGEBYLEX', key, min, max]
+    if count is not None:
+        args.extend(('LIMIT', 0, count))
+    members = backend.client.execute_command(*args)
+    return [meta.pk.to_python(member.rsplit(SEPARATOR, 1)[1], backend) for member in members]
@@ -0,0 +1,714 @@
+import base64
+from collections import namedtuple
+import json
+import re
+
+from stdnet import odm, QuerySetError
+from stdnet.backends.redisb import MIN_FLOAT
+from stdnet.odm.query import EmptyQuery, QueryElement, difference, intersect, queryset, union
+from stdnet.utils import native_str, string_type, zip, EMPTYJSON
+from stdnet.utils.structures import OrderedDict
+from .fields import OneToOneField
+from .prefixes import prefix_bounds, queue_prefix_updates
+from .ranges import RANGE_LOOKUPS, range_bounds
+from .session import Session
+from .sortedviews import queue_view_updates
+from .loading import (BLOB, id_set_key, is_packed, object_key, load_fields, make_instances, queue_command,
+                      queue_hashes, queue_load, storage_attributes, stored_value)
+from . import scripts  # noqa, registers lua scripts
+
+
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_PAGE_SIZE = 50
+
+
+def encode_cursor(score, id):
+    data = json.dumps([native_str(score), native_str(id)])
+    return native_str(base64.urlsafe_b64encode(data.encode('utf-8')))
+
+
+def decode_cursor(cursor):
+    try:
+        score, id = json.loads(base64.urlsafe_b64decode(str(cursor)).decode('utf-8'))
+        return repr(float(score)), id
+    except (TypeError, ValueError):
+        raise QuerySetError('Invalid cursor: %s' % cursor)
+
+
+def glob_escape(pattern):
+    return re.sub(r'([*?\[\]\\])', r'\\\1', pattern)
+
+
+def json_converter(field, pk, backend):
+    """function converting a stored value of field to JSON-ready one"""
+    if field is pk:
+        # already converted
+        return lambda value: value
+    elif field.json_serialise == field.to_python:
+        return lambda value: field.to_python(value, backend)
+    else:
+        return lambda value: field.json_serialise(field.to_python(value, backend))
+
+
+_row_classes = {}
+
+
+def get_row_class(meta, names):
+    key = (meta, tuple(names))
+    if key not in _row_classes:
+        _row_classes[key] = namedtuple('%sRow' % meta.model.__name__, names)
+    return _row_classes[key]
+
+
+class Page(list):
+    """instances of a page, and the cursor to resume after them which is None at the end"""
+    def __init__(self, items, cursor=None):
+        super(Page, self).__init__(items)
+        self.cursor = cursor
+
+
+class IndexedIds(QueryElement):
+    """ids of which values are in a range of a range or prefix index, stored by the server when the query is built"""
+    def __init__(self, qs, kind, key, low, high):
+        super(IndexedIds, self).__init__(qs._meta, qs.session, keyword='set', name=qs._meta.pkname())
+        self.index = (kind, key, low, high)
+        self._backend_query = None
+
+    def backend_query(self, pipe=None, timeout=0, **kwargs):
+        if self._backend_query is None:
+            self._backend_query = IndexedIdsQuery(self, pipe, timeout)
+        return self._backend_query
+
+
+class IndexedIdsQuery(object):
+    """temporary key of ids of an IndexedIds, queued on the pipeline building the query which intersects it"""
+    def __init__(self, queryelem, pipe=None, timeout=0):
+        backend = queryelem.backend
+        client = pipe if pipe is not None else backend.client
+        kind, key, low, high = queryelem.index
+        self.queryelem = queryelem
+        self.query_key = backend.tempkey(queryelem.meta)
+        client.execute_script('djangostdnet_index_ids', (self.query_key, key),
+                              kind, low, high, 1 if queryelem.meta.ordering else 0)
+        client.expire(self.query_key, max(timeout, 10))
+
+
+class Query(odm.Query):
+    # lookups resolved by prefix and range indexes, as tuples of field name, lookup and value
+    resolved_lookups = ()
+
+    def filter(self, **kwargs):
+        """
+        __startswith lookups by fields with prefix index, and range lookups by fields with range index,
+        are resolved by the indexes
+        """
+        resolved = tuple(self._pop_resolved_lookups(kwargs))
+        q = super(Query, self).filter(**kwargs)
+        if resolved:
+            q = q._clone() if q is self else q
+            q.resolved_lookups = self.resolved_lookups + resolved
+        return q
+
+    def _pop_resolved_lookups(self, kwargs):
+        prefix_indexes = set(field.name for field in getattr(self.model, '_prefix_indexes', ()))
+        range_indexes = set(field.name for field in getattr(self.model, '_range_indexes', ()))
+        for name in sorted(kwargs):
+            field_name, _, lookup = name.rpartition('__')
+            if (lookup == 'startswith' and field_name in prefix_indexes) or \
+               (lookup in RANGE_LOOKUPS and field_name in range_indexes):
+                yield field_name, lookup, kwargs.pop(name)
+
+    def _construct(self):
+        if not self.resolved_lookups:
+            return self._construct_base()
+        # intersected on the server with ids matched by the indexes, as other lookups are
+        manager = self.session.router[self.model]
+        q = self._clone()
+        q.resolved_lookups = ()
+        for name, lookup, value in self.resolved_lookups:
+            if lookup == 'startswith':
+                index = IndexedIds(self, 'lex', *prefix_bounds(manager, name, value))
+            else:
+                index = IndexedIds(self, 'score', *range_bounds(manager, name, lookup, value))
+            q.intersections += (index,)
+        return q._construct_base()
+
+    def load_only(self, *fields):
+        """the blob is loaded along with packed fields"""
+        if any(is_packed(self._meta.dfields.get(name)) for name in fields):
+            fields += (BLOB,)
+        return super(Query, self).load_only(*fields)
+
+    def sort_by(self, ordering):
+        if isinstance(ordering, string_type) and is_packed(self._meta.dfields.get(ordering.lstrip('-'))):
+            raise QuerySetError('Field "%s" is packed in the blob and can not be sorted by' % ordering.lstrip('-'))
+        return super(Query, self).sort_by(ordering)
+
+    def defer(self, *fields):
+        """load all fields except fields, which are loaded on first access"""
+        return self.dont_load(*fields)
+
+    def iterator(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Iterate over matched instances, loading chunk_size of them at a time in a pipeline.
+        Without ordering the id set is scanned, so an instance can be yielded more than once
+        if the set is modified on the way.
+        """
+        backend_query = self.backend_query()
+        if isinstance(backend_query, EmptyQuery) or not backend_query.execute_query():
+            return
+
+        ordering = backend_query.queryelem.ordering
+        if ordering and not backend_query.order(ordering)['nested']:
+            # sorted once into a list, as SORT with LIMIT sorts the whole set again for each chunk
+            chunks = self._iter_hashed_chunks(backend_query, chunk_size, self._iter_sorted_hashes)
+        elif ordering or self._meta.ordering:
+            chunks = self._iter_ordered_chunks(backend_query, chunk_size)
+        else:
+            chunks = self._iter_hashed_chunks(backend_query, chunk_size, self._iter_scanned_hashes)
+
+        for chunk in chunks:
+            for instance in self._accept(backend_query, chunk):
+                yield instance
+
+    def values(self, *fields, **kwargs):
+        """
+        Iterate over read-only rows of fields as named tuples, without making instances.
+        Rows have the primary key and all scalar fields if no field is given.
+        """
+        names = [field.name for field in self._row_fields(fields)]
+        row_class = get_row_class(self._meta, names)
+        return (row_class._make(row) for row in self.values_list(*fields, **kwargs))
+
+    def values_list(self, *fields, **kwargs):
+        """
+        Iterate over read-only rows of fields as tuples, without making instances.
+        Rows are loaded chunk_size of them at a time as iterator does.
+        """
+        flat = kwargs.pop('flat', False)
+        chunk_size = kwargs.pop('chunk_size', DEFAULT_CHUNK_SIZE)
+        if kwargs:
+            raise TypeError('Unexpected keyword arguments: %s' % ', '.join(kwargs))
+        if flat and len(fields) != 1:
+            raise TypeError('flat is available only with a field')
+        rows = self._iter_rows(self._row_fields(fields), chunk_size)
+        if flat:
+            return (row[0] for row in rows)
+        return rows
+
+    def _row_fields(self, names):
+        meta = self._meta
+        if not names:
+            return [meta.pk] + [field for field in meta.scalarfields if field.attname != BLOB]
+        fields = []
+        for name in names:
+            field = meta.pk if name == meta.pkname() else meta.dfields.get(name)
+            if field is None or (field is not meta.pk and field not in meta.scalarfields) or name == BLOB:
+                raise QuerySetError('Model "%s" has no scalar field "%s"' % (meta, name))
+            fields.append(field)
+        return fields
+
+    def _construct_base(self):
+        """
+        construction of the base class, whose lookups are aggregated by its own method,
+        as aggregate of this class is the public API of aggregates
+        """
+        if self.fargs:
+            fargs = odm.Query.aggregate(self, self.fargs)
+            if not all(f.valid for f in fargs):
+                # no values to filter on
+                return EmptyQuery(self._meta, self.session)
+        else:
+            fargs = None
+        if not fargs:
+            q = queryset(self)
+        elif len(fargs) > 1:
+            q = intersect(fargs)
+        else:
+            q = fargs[0]
+        eargs = None
+        if self.eargs:
+            eargs = [a for a in odm.Query.aggregate(self, self.eargs) if a.valid]
+            if len(eargs) > 1:
+                eargs = [union(eargs)]
+        if eargs:
+            q = difference([q] + eargs)
+        if self.intersections:
+            q = intersect((q,) + self.intersections)
+        if self.unions:
+            q = union((q,) + self.unions)
+        q = self.search_queries(q)
+        data = self.data.copy()
+        if self.exclude_fields:
+            fields = data['fields'] or tuple(f.name for f in self._meta.scalarfields)
+            data['fields'] = tuple(f for f in fields if f not in self.exclude_fields)
+        q.data = data
+        return q
+
+    def aggregate(self, *args, **kwargs):
+        """
+        Dict of aggregates of numeric fields computed by the server, without loading objects.
+        Values are reduced in double precision, then converted to type of the field.
+        """
+        meta = self._meta
+        aggregates = OrderedDict((aggregate.default_alias, aggregate) for aggregate in args)
+        aggregates.update(sorted(kwargs.items()))
+        fields = self._row_fields([aggregate.field for aggregate in aggregates.values()])
+        for field, aggregate in zip(fields, aggregates.values()):
+            if is_packed(field):
+                raise QuerySetError('Field "%s" is packed in the blob and can not be aggregated' % field.name)
+            if field is not meta.pk and field.internal_type != 'numeric' and aggregate.function != 'count':
+                raise QuerySetError('Field "%s" is not numeric for %s' % (field.name, aggregate.function))
+
+        backend_query = self.backend_query()
+        if isinstance(backend_query, EmptyQuery):
+            return dict((alias, 0 if aggregate.function == 'count' else None)
+                        for alias, aggregate in aggregates.items())
+
+        backend = backend_query.backend
+        # builds a temporary key of the query if any
+        backend_query.execute_query()
+        ttl_field = getattr(backend_query, '_ttl_field', None)
+        args = [object_key(backend, meta, ''), ttl_field.attname if ttl_field is not None else '']
+        for field, aggregate in zip(fields, aggregates.values()):
+            args.extend((aggregate.function, '' if field is meta.pk else field.attname))
+        values = backend.client.execute_script('djangostdnet_aggregate', (backend_query.query_key,), *args)
+        return dict((alias, aggregate.convert(field, value, backend))
+                    for (alias, aggregate), field, value in zip(aggregates.items(), fields, values))
+
+    def facets(self, *fields):
+        """
+        Dict of counts of matched instances by value, of each of indexed fields.
+        Counted by index sets on the server without loading objects, and expired ones by TTL are
+        counted until purged.
+        """
+        meta = self._meta
+        fields = self._row_fields(fields)
+        for field in fields:
+            if not field.index or field.unique or field is meta.pk:
+                raise QuerySetError('Field "%s" is not indexed for facets' % field.name)
+
+        backend_query = self.backend_query()
+        if isinstance(backend_query, EmptyQuery):
+            return dict((field.name, {}) for field in fields)
+
+        backend = backend_query.backend
+        # builds a temporary key of the query if any
+        if not backend_query.execute_query():
+            return dict((field.name, {}) for field in fields)
+        counts = [{} for _ in fields]
+        prefixes = [backend.basekey(meta, 'idx', field.attname, '') for field in fields]
+        pattern = glob_escape(backend.basekey(meta, 'idx', '')) + '*'
+        # index keys are listed by scanning in batches, so the server is not blocked over the keyspace
+        cursor = 0
+        while True:
+            cursor, keys = backend.client.scan(cursor, match=pattern, count=DEFAULT_CHUNK_SIZE)
+            self._count_facets(backend_query, [native_str(key) for key in keys], prefixes, counts)
+            if not cursor:
+                break
+        return dict((field.name, dict((field.to_python(value, backend), count)
+                                      for value, count in field_counts.items() if count))
+                    for field, field_counts in zip(fields, counts))
+
+    def _count_facets(self, backend_query, keys, prefixes, counts):
+        """count ids of the query in index keys by their values, of the prefix of each field, in a pipeline"""
+        backend = backend_query.backend
+        meta = self._meta
+        key = backend_query.query_key
+        temp_key = backend.tempkey(meta)
+        matched = []
+        pipe = backend.client.pipeline()
+        self._keep_query_key(pipe, backend_query)
+        for idxkey in keys:
+            for field_counts, prefix in zip(counts, prefixes):
+                if not idxkey.startswith(prefix):
+                    continue
+                if key == id_set_key(backend, meta):
+                    index = queue_command(pipe, pipe.zcard if meta.ordering else pipe.scard, idxkey)
+                else:
+                    # the size of the intersection, of sets or sorted sets
+                    index = queue_command(pipe, pipe.zinterstore, temp_key, (key, idxkey))
+                matched.append((field_counts, idxkey[len(prefix):], index))
+        if not matched:
+            return
+        pipe.delete(temp_key)
+        results = pipe.execute()
+        for field_counts, value, index in matched:
+            field_counts[value] = results[index]
+
+    def update(self, **kwargs):
+        """
+        Update fields of matched objects by a script on the server, maintaining their indexes,
+        then the mapped Django objects by chunks of primary keys. Returns the number of updated objects.
+        As Django's update, neither validation nor signal runs.
+        """
+        meta = self._meta
+        fields = self._row_fields(sorted(kwargs))
+        # serialise as a commit does, by a bare instance
+        instance = meta.make_object()
+        updates = []
+        score = ''
+        for field in fields:
+            if field is meta.pk or field.unique:
+                raise QuerySetError('Field "%s" is unique and can not be updated in bulk' % field.name)
+            if is_packed(field):
+                raise QuerySetError('Field "%s" is packed in the blob and can not be updated in bulk' % field.name)
+            value = field.set_get_value(instance, kwargs[field.name])
+            if isinstance(value, dict):
+                raise QuerySetError('Field "%s" can not be updated in bulk' % field.name)
+            if value is None:
+                updates.extend((field.attname, 'del', ''))
+            else:
+                updates.extend((field.attname, 'set', value))
+            if meta.ordering and not meta.ordering.auto and meta.ordering.name == field.name:
+                score = MIN_FLOAT if kwargs[field.name] is None else field.scorefun(kwargs[field.name])
+
+        backend_query = self.backend_query()
+        if isinstance(backend_query, EmptyQuery) or not updates:
+            return 0
+
+        backend = backend_query.backend
+        # builds a temporary key of the query if any
+        backend_query.execute_query()
+        indices = [field.attname for field in meta.indices if not field.unique]
+        args = [object_key(backend, meta, ''), backend.basekey(meta, 'idx', ''),
+                1 if meta.ordering else 0, score, len(indices)]
+        args.extend(indices)
+        args.extend(updates)
+        ids = backend.client.execute_script('djangostdnet_update',
+                                            (backend_query.query_key, id_set_key(backend, meta)), *args)
+        ids = [meta.pk.to_python(id, backend) for id in ids]
+        self._update_derived_keys(backend, ids, fields, kwargs)
+
+        if hasattr(self.model, '_django_meta'):
+            self._update_django_objects(ids, fields, kwargs)
+        return len(ids)
+
+    def _update_derived_keys(self, backend, ids, fields, kwargs):
+        """sorted views and prefix indexes of updated fields, which the update script does not maintain"""
+        views = [field for field, _ in getattr(self.model, '_sorted_views', ()) if field in fields]
+        prefix_indexes = [field for field in getattr(self.model, '_prefix_indexes', ()) if field in fields]
+        if not (views or prefix_indexes) or not ids:
+            return
+        pipe = backend.client.pipeline()
+        for field in views:
+            queue_view_updates(pipe, backend, self._meta, field, ids, [kwargs[field.name]] * len(ids))
+        for field in prefix_indexes:
+            queue_prefix_updates(pipe, backend, self._meta, field, ids, [kwargs[field.name]] * len(ids))
+        pipe.execute()
+
+    def _update_django_objects(self, ids, fields, kwargs):
+        from .models import registry
+
+        django_model = registry.get_django_model(self.model)
+        django_kwargs = {}
+        for field in fields:
+            value = kwargs[field.name]
+            if isinstance(field, (odm.ForeignKey, OneToOneField)):
+                django_kwargs['%s_id' % field.name] = value.pkvalue() if hasattr(value, '_meta') else value
+            else:
+                django_kwargs[field.name] = value
+        for i in range(0, len(ids), DEFAULT_CHUNK_SIZE):
+            django_model.objects.filter(pk__in=ids[i:i + DEFAULT_CHUNK_SIZE]).update(**django_kwargs)
+
+    def bulk_delete(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Delete matched objects chunk_size of them at a time, each chunk committed in a pipeline,
+        so that a large deletion does not block the server for long. Returns the number of deleted objects.
+        """
+        meta = self._meta
+        backend_query = self.backend_query()
+        if isinstance(backend_query, EmptyQuery) or not backend_query.execute_query():
+            return 0
+
+        backend = backend_query.backend
+        key = backend_query.query_key
+        temp_key = key != id_set_key(backend, meta)
+        deleted = 0
+        while True:
+            pipe = backend.client.pipeline()
+            self._keep_query_key(pipe, backend_query)
+            if meta.ordering:
+                index = queue_command(pipe, pipe.zrange, key, 0, chunk_size - 1)
+            else:
+                index = queue_command(pipe, pipe.srandmember, key, chunk_size)
+            ids = pipe.execute()[index]
+            if not ids:
+                return deleted
+            # committed by itself even if a session is bound
+            session = Session(self.session.router)
+            pks = [meta.pk.to_python(id, backend) for id in ids]
+            deleted += len(session.query(self.model).filter(**{'%s__in' % meta.pk.name: pks}).delete() or ())
+            if temp_key:
+                # remaining ones are left in the result of the query
+                remove = backend.client.zrem if meta.ordering else backend.client.srem
+                remove(key, *ids)
+
+    def tojson(self, *fields, **kwargs):
+        """
+        Iterate over JSON-ready dicts of fields as instance.tojson makes,
+        straight from stored values without making instances.
+        """
+        chunk_size = kwargs.pop('chunk_size', DEFAULT_CHUNK_SIZE)
+        if kwargs:
+            raise TypeError('Unexpected keyword arguments: %s' % ', '.join(kwargs))
+        if fields:
+            fields = self._row_fields(fields)
+        else:
+            fields = [field for field in self._row_fields(fields) if not field.as_cache]
+        return self._iter_json(fields, chunk_size)
+
+    def _iter_json(self, fields, chunk_size):
+        converters = None
+        for backend, rows in self._iter_row_chunks(fields, chunk_size):
+            if converters is None:
+                converters = [json_converter(field, self._meta.pk, backend) for field in fields]
+            for row in rows:
+                data = {}
+                for field, convert, value in zip(fields, converters, row):
+                    value = convert(value)
+                    if value not in EMPTYJSON:
+                        data[field.name] = value
+                yield data
+
+    def columns(self, *fields, **kwargs):
+        """
+        Arrays of fields by name, converted chunk_size of rows at a time by NumPy.
+        See columns.build_columns for types of arrays.
+        """
+        from .columns import build_columns
+
+        chunk_size = kwargs.pop('chunk_size', DEFAULT_CHUNK_SIZE)
+        if kwargs:
+            raise TypeError('Unexpected keyword arguments: %s' % ', '.join(kwargs))
+        fields = self._row_fields(fields)
+        return build_columns(fields, self._iter_row_chunks(fields, chunk_size), self._meta.pk)
+
+    def _iter_rows(self, fields, chunk_size):
+        for backend, rows in self._iter_row_chunks(fields, chunk_size):
+            for row in rows:
+                yield tuple(value if field is self._meta.pk else field.to_python(value, backend)
+                            for field, value in zip(fields, row))
+
+    def _iter_row_chunks(self, fields, chunk_size):
+        """chunks of rows of fields in serialised values except the primary key, with the backend"""
+        backend_query = self.backend_query()
+        if isinstance(backend_query, EmptyQuery) or not backend_query.execute_query():
+            return
+
+        backend = backend_query.backend
+        meta = self._meta
+        loading_fields = [field for field in fields if field is not meta.pk]
+        ttl_field = getattr(backend_query, '_ttl_field', None)
+        if ttl_field is not None and ttl_field not in loading_fields:
+            loading_fields.append(ttl_field)
+        attributes = storage_attributes(loading_fields)
+
+        if backend_query.queryelem.ordering or meta.ordering:
+            chunks = self._iter_sorted_hashes(backend_query, attributes, chunk_size)
+        else:
+            chunks = self._iter_scanned_hashes(backend_query, attributes, chunk_size)
+
+        for ids, hashes in chunks:
+            rows = []
+            for id, values in zip(ids, hashes):
+                data = dict(zip(attributes, values or ()))
+                if ttl_field is not None:
+                    ttl_value = ttl_field.to_python(data[ttl_field.attname], backend)
+                    if ttl_value is not None and ttl_value < 0:
+                        continue
+                rows.append(tuple(id if field is meta.pk else stored_value(field, data) for field in fields))
+            yield backend, rows
+
+    def page(self, cursor=None, count=DEFAULT_PAGE_SIZE):
+        """
+        Page of count instances after cursor, in ordering of the model.
+        It resumes from the sort key and id of the last instance, not an offset,
+        so a page deep in the query costs as much as the first one.
+        """
+        meta = self._meta
+        if not meta.ordering:
+            raise QuerySetError('Cursor pagination requires ordering of model %s' % meta)
+        backend_query = self.backend_query()
+        if isinstance(backend_query, EmptyQuery):
+            return Page([])
+        if backend_query.queryelem.ordering:
+            raise QuerySetError('Cursor pagination is only in ordering of the model, not sort_by')
+
+        backend = backend_query.backend
+        score, member = decode_cursor(cursor) if cursor else ('', '')
+        # builds a temporary key of the query if any
+        backend_query.execute_query()
+        scored_ids = backend.client.execute_script(
+            'djangostdnet_page', (backend_query.query_key,),
+            score, member, count, 1 if meta.ordering.desc else 0)
+        if not scored_ids:
+            return Page([])
+
+        fields, fields_attributes = load_fields(backend_query)
+        ids = [meta.pk.to_python(id, backend) for id, _ in scored_ids]
+        if fields_attributes == (meta.pk.name,):
+            hashes = [None] * len(ids)
+        else:
+            pipe = backend.client.pipeline()
+            hash_indexes = queue_hashes(pipe, backend, meta, ids, fields_attributes)
+            results = pipe.execute()
+            hashes = [results[index] for index in hash_indexes]
+            if not fields:
+                # skip objects deleted on the way
+                found = [(id, values) for id, values in zip(ids, hashes) if values]
+                ids = [id for id, _ in found]
+                hashes = [values for _, values in found]
+
+        last_id, last_score = scored_ids[-1]
+        next_cursor = encode_cursor(last_score, last_id) if len(scored_ids) == count else None
+        instances = make_instances(backend, meta, ids, hashes, fields, fields_attributes)
+        return Page(self._accept(backend_query, instances), next_cursor)
+
+    def _accept(self, backend_query, instances):
+        session = self.session
+        for instance in instances:
+            session.add(instance, modified=False)
+        # expired items are deleted through their session
+        purge_expired_items = getattr(backend_query, '_purge_expired_items', None)
+        if purge_expired_items is not None:
+            instances = purge_expired_items(instances)
+        return instances
+
+    def _iter_ordered_chunks(self, backend_query, chunk_size):
+        backend = backend_query.backend
+        start = 0
+        while True:
+            pipe = backend.client.pipeline()
+            self._keep_query_key(pipe, backend_query)
+            index = queue_load(pipe, backend_query, start, chunk_size)
+            chunk = pipe.execute()[index]
+            if not chunk:
+                return
+            yield chunk
+            if len(chunk) < chunk_size:
+                return
+            start += chunk_size
+
+    def _iter_hashed_chunks(self, backend_query, chunk_size, iter_hashes):
+        """instances of chunks of ids and their hashes given by iter_hashes"""
+        backend = backend_query.backend
+        meta = self._meta
+        fields, fields_attributes = load_fields(backend_query)
+        if fields_attributes == (meta.pk.name,):
+            attributes = ()
+        else:
+            attributes = fields_attributes
+        for ids, hashes in iter_hashes(backend_query, attributes, chunk_size):
+            if not fields:
+                # skip objects deleted on the way
+                found = [(id, values) for id, values in zip(ids, hashes) if values]
+                ids = [id for id, _ in found]
+                hashes = [values for _, values in found]
+            yield make_instances(backend, meta, ids, hashes, fields, fields_attributes)
+
+    def _iter_scanned_hashes(self, backend_query, attributes, chunk_size):
+        """
+        ids scanned in chunks, and their hashes of attributes, or all of them if None.
+        hashes are None if attributes are empty.
+        """
+        backend = backend_query.backend
+        meta = self._meta
+        key = backend_query.query_key
+        cursor, ids = self._scan(backend, key, 0, chunk_size)
+        while ids:
+            # fetch the chunk along with scanning the next one
+            pipe = backend.client.pipeline()
+            self._keep_query_key(pipe, backend_query)
+            ids = [meta.pk.to_python(id, backend) for id in ids]
+            if attributes is None or attributes:
+                hash_indexes = queue_hashes(pipe, backend, meta, ids, attributes)
+            else:
+                hash_indexes = None
+            scan_index = queue_command(pipe, pipe.sscan, key, cursor, count=chunk_size) if cursor else None
+            results = pipe.execute()
+            if hash_indexes is not None:
+                yield ids, [results[index] for index in hash_indexes]
+            else:
+                yield ids, [None] * len(ids)
+            if scan_index is None:
+                return
+            cursor, ids = results[scan_index]
+            if not ids and cursor:
+                cursor, ids = self._scan(backend, key, cursor, chunk_size)
+
+    def _iter_sorted_hashes(self, backend_query, attributes, chunk_size):
+        """
+        ids sorted in chunks, and their hashes of attributes, or all of them if None.
+        hashes are None if attributes are empty.
+        Ids sorted by a field are sorted once into a temporary list paged by offsets,
+        and ids in the sorted set of ordering of the model are paged by ranks.
+        """
+        backend = backend_query.backend
+        meta = self._meta
+        if backend_query.queryelem.ordering:
+            key = self._store_sorted(backend_query)
+
+            def queue_range(pipe, start, stop):
+                return queue_command(pipe, pipe.lrange, key, start, stop)
+        else:
+            key = backend_query.query_key
+
+            def queue_range(pipe, start, stop):
+                return queue_command(pipe, pipe.zrange, key, start, stop, desc=meta.ordering.desc)
+        pipe = backend.client.pipeline()
+        index = queue_range(pipe, 0, chunk_size - 1)
+        ids = pipe.execute()[index]
+        start = 0
+        while ids:
+            # fetch the chunk along with the ids of the next one
+            start += chunk_size
+            pipe = backend.client.pipeline()
+            if key == backend_query.query_key:
+                self._keep_query_key(pipe, backend_query)
+            else:
+                pipe.expire(key, backend_query.expire)
+            ids = [meta.pk.to_python(id, backend) for id in ids]
+            if attributes is None or attributes:
+                hash_indexes = queue_hashes(pipe, backend, meta, ids, attributes)
+            else:
+                hash_indexes = None
+            next_index = queue_range(pipe, start, start + chunk_size - 1) if len(ids) == chunk_size else None
+            results = pipe.execute()
+            if hash_indexes is not None:
+                yield ids, [results[index] for index in hash_indexes]
+            else:
+                yield ids, [None] * len(ids)
+            ids = results[next_index] if next_index is not None else ()
+        if key != backend_query.query_key:
+            backend.client.delete(key)
+
+    def _store_sorted(self, backend_query):
+        """sort ids of the query by its ordering into a temporary list, which the iteration pages as a snapshot"""
+        backend = backend_query.backend
+        meta = self._meta
+        order = backend_query.order(backend_query.queryelem.ordering)
+        if order['nested']:
+            raise QuerySetError('Rows can not be sorted by a field of related model')
+        options = {'alpha': order['method'] == 'ALPHA', 'desc': order['desc']}
+        if order['field']:
+            options['by'] = object_key(backend, meta, '*->' + order['field'])
+        key = backend.tempkey(meta)
+        pipe = backend.client.pipeline()
+        self._keep_query_key(pipe, backend_query)
+        pipe.sort(backend_query.query_key, store=key, **options)
+        pipe.expire(key, backend_query.expire)
+        pipe.execute()
+        return key
+
+    def _scan(self, backend, key, cursor, chunk_size):
+        # scan can return no element in a step before the end
+        while True:
+            cursor, ids = backend.client.sscan(key, cursor, count=chunk_size)
+            if ids or not cursor:
+                return cursor, ids
+
+    def _keep_query_key(self, pipe, backend_query):
+        # temporary key of the query must outlive the iteration
+        if backend_query.query_key != id_set_key(backend_query.backend, self._meta):
+            pipe.expire(backend_query.query_key, backend_query.expire)
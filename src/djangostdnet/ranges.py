@@ -0,0 +1,47 @@
+from stdnet import FieldError
+from .sortedviews import view_key, view_score
+
+
+# Django's names and stdnet's ones
+RANGE_LOOKUPS = ('gt', 'gte', 'ge', 'lt', 'lte', 'le', 'range')
+
+
+def parse_range_indexes(meta, names):
+    fields = []
+    for name in names:
+        field = meta.dfields.get(name)
+        if field is None or field is meta.pk or field.internal_type != 'numeric':
+            raise FieldError('Field "%s" can not be a range index' % name)
+        fields.append(field)
+    return fields
+
+
+def get_range_field(model, name):
+    for field in getattr(model, '_range_indexes', ()):
+        if field.name == name:
+            return field
+    raise FieldError('Field "%s" has no range index' % name)
+
+
+def score_bounds(field, lookup, value):
+    """min and max arguments of ZRANGEBYSCORE for a range lookup"""
+    if lookup == 'range':
+        low, high = value
+        return view_score(field, low), view_score(field, high)
+    score = view_score(field, value)
+    if lookup == 'gt':
+        return '(%r' % score, '+inf'
+    elif lookup in ('gte', 'ge'):
+        return score, '+inf'
+    elif lookup == 'lt':
+        return '-inf', '(%r' % score
+    elif lookup in ('lte', 'le'):
+        return '-inf', score
+    raise FieldError('Unsupported range lookup "%s"' % lookup)
+
+
+def range_bounds(manager, name, lookup, value):
+    """sorted set of the range index of field, and bounds of scores matching a range lookup"""
+    field = get_range_field(manager.model, name)
+    min, max = score_bounds(field, lookup, value)
+    return view_key(manager.read_backend, manager._meta, field), min, max
@@ -0,0 +1,165 @@
+from itertools import chain
+
+from stdnet import FieldError
+from stdnet.utils import gen_unique_id, native_str, zip
+from .loading import id_set_key, object_key, storage_attributes, stored_value
+from . import scripts  # noqa, registers lua scripts
+
+
+REINDEX = 'reindex'
+DEFAULT_REINDEX_CHUNK_SIZE = 1000
+
+
+def get_index_field(meta, name):
+    field = meta.dfields.get(name)
+    if field is None or field not in meta.indices or field.unique:
+        raise FieldError('Field "%s" is not a non-unique index' % name)
+    return field
+
+
+def scan_chunks(client, key, sorted, chunk_size):
+    """members of a set or a sorted set by chunks, ones present all the time at least once"""
+    cursor = 0
+    while True:
+        if sorted:
+            cursor, members = client.zscan(key, cursor, count=chunk_size)
+            members = [member for member, _ in members]
+        else:
+            cursor, members = client.sscan(key, cursor, count=chunk_size)
+        if members:
+            yield members
+        if not cursor:
+            return
+
+
+def scan_hash_chunks(client, key, chunk_size):
+    cursor = 0
+    while True:
+        cursor, data = client.hscan(key, cursor, count=chunk_size)
+        if data:
+            yield list(data)
+        if not cursor:
+            return
+
+
+def scan_key_chunks(client, pattern, chunk_size):
+    cursor = 0
+    while True:
+        cursor, keys = client.scan(cursor, match=pattern, count=chunk_size)
+        if keys:
+            yield keys
+        if not cursor:
+            return
+
+
+def scan_keys(client, pattern, chunk_size):
+    return chain.from_iterable(scan_key_chunks(client, pattern, chunk_size))
+
+
+def reindex(manager, name, chunk_size=DEFAULT_REINDEX_CHUNK_SIZE):
+    """
+    Build or rebuild index sets of a field online, while writes continue. Returns the number of objects.
+    New index sets are built from objects scanned by chunks, caught up with objects written meanwhile,
+    then swapped in by chunks of values of the new sets, recorded as they are built.
+    Objects written during the swap are reconciled at last.
+    """
+    from .query import glob_escape
+
+    meta = manager._meta
+    field = get_index_field(meta, name)
+    backend = manager.backend
+    client = backend.client
+    sorted = 1 if meta.ordering else 0
+    idset = id_set_key(backend, meta)
+    token = gen_unique_id()
+    scanned = backend.basekey(meta, REINDEX, token, 'scanned')
+    values = backend.basekey(meta, REINDEX, token, 'values')
+    temp_prefix = backend.basekey(meta, REINDEX, token, 'idx', '')
+    live_prefix = backend.basekey(meta, 'idx', field.attname, '')
+    args = [object_key(backend, meta, ''), field.attname, sorted]
+
+    def reconcile(index_prefix):
+        # objects written since scanned, and ones deleted
+        for ids in chain(scan_chunks(client, idset, sorted, chunk_size), scan_hash_chunks(client, scanned, chunk_size)):
+            client.execute_script('djangostdnet_reindex_reconcile', (idset, scanned, values),
+                                  index_prefix, *(args + ids))
+
+    for ids in scan_chunks(client, idset, sorted, chunk_size):
+        client.execute_script('djangostdnet_reindex_build', (idset, scanned, values), temp_prefix, *(args + ids))
+    reconcile(temp_prefix)
+
+    for keys in scan_key_chunks(client, glob_escape(live_prefix) + '*', chunk_size):
+        client.execute_script('djangostdnet_reindex_prune', (values,), live_prefix,
+                              *[key[len(live_prefix):] for key in keys])
+    for chunk in scan_chunks(client, values, 0, chunk_size):
+        client.execute_script('djangostdnet_reindex_swap', (), temp_prefix, live_prefix, *chunk)
+
+    reconcile(live_prefix)
+    client.delete(scanned, values)
+    return client.zcard(idset) if sorted else client.scard(idset)
+
+
+def view_updates(manager, data):
+    """updates of sorted views and prefix indexes of the model for fetched data of an object, as the script takes"""
+    from .prefixes import prefix_key, prefix_values_key
+    from .sortedviews import view_key, view_score
+
+    meta = manager._meta
+    backend = manager.backend
+    updates = []
+    for field, _ in getattr(manager.model, '_sorted_views', ()):
+        score = view_score(field, None if data is None else field.to_python(stored_value(field, data), backend))
+        updates.extend(('zrem', view_key(backend, meta, field), '', '') if score is None else
+                       ('zadd', view_key(backend, meta, field), '', score))
+    for field in getattr(manager.model, '_prefix_indexes', ()):
+        value = None if data is None else field.to_python(stored_value(field, data), backend)
+        updates.extend(('prefix' if value is not None else 'prefix_del', prefix_key(backend, meta, field),
+                        prefix_values_key(backend, meta, field), '' if value is None else value))
+    return updates
+
+
+def rebuild_views(manager, chunk_size=DEFAULT_REINDEX_CHUNK_SIZE):
+    """
+    Rebuild sorted views, range indexes and prefix indexes of a model online. Returns the number of objects.
+    They are updated after commits, so ones of an object can be missing after a crash in between,
+    and range indexes or prefix indexes added to a model have no entries of existing objects.
+    An object written meanwhile is skipped, which is updated by the commit.
+    """
+    from .prefixes import prefix_values_key
+    from .sortedviews import view_key
+
+    meta = manager._meta
+    views = [field for field, _ in getattr(manager.model, '_sorted_views', ())]
+    prefix_fields = list(getattr(manager.model, '_prefix_indexes', ()))
+    if not views and not prefix_fields:
+        raise FieldError('Model "%s" has neither sorted views nor prefix indexes' % meta)
+    backend = manager.backend
+    client = backend.client
+    sorted = 1 if meta.ordering else 0
+    idset = id_set_key(backend, meta)
+    attributes = storage_attributes(views + [field for field in prefix_fields if field not in views])
+    head = [object_key(backend, meta, ''), sorted, len(attributes)] + attributes
+
+    count = 0
+    for ids in scan_chunks(client, idset, sorted, chunk_size):
+        pipe = client.pipeline()
+        for id in ids:
+            pipe.hmget(object_key(backend, meta, native_str(id)), *attributes)
+        args = []
+        for id, values in zip(ids, pipe.execute()):
+            updates = view_updates(manager, dict(zip(attributes, values)))
+            args.extend([id, 1] + ['0' if value is None else b'1' + value for value in values])
+            args.extend([len(updates) // 4] + updates)
+        count += client.execute_script('djangostdnet_rebuild_views', (idset,), *(head + args))
+
+    # entries of deleted objects
+    removals = view_updates(manager, None)
+    chunks = [scan_chunks(client, view_key(backend, meta, field), 1, chunk_size) for field in views]
+    chunks += [scan_hash_chunks(client, prefix_values_key(backend, meta, field), chunk_size)
+               for field in prefix_fields]
+    for ids in chain(*chunks):
+        args = []
+        for id in ids:
+            args.extend([id, 0, len(removals) // 4] + removals)
+        client.execute_script('djangostdnet_rebuild_views', (idset,), *(head + args))
+    return count
@@ -0,0 +1,41 @@
+from stdnet import odm, FieldError
+from .loading import queue_command
+
+
+def get_relation_field(meta, name):
+    field = meta.dfields.get(name)
+    if not isinstance(field, odm.ForeignKey) or not field.index:
+        raise FieldError('Field "%s" is not an indexed relation' % name)
+    return field
+
+
+def relation_counts(manager, name, instances_or_ids):
+    """
+    Numbers of objects related to each of instances or ids by a relation field,
+    read from cardinalities of the index sets of the field maintained by commits, in a request.
+    """
+    meta = manager._meta
+    field = get_relation_field(meta, name)
+    backend = manager.read_backend
+    pipe = backend.client.pipeline()
+    command = pipe.zcard if meta.ordering else pipe.scard
+    indexes = []
+    for instance_or_id in instances_or_ids:
+        id = getattr(instance_or_id, 'pkvalue', lambda: instance_or_id)()
+        indexes.append(queue_command(pipe, command, backend.basekey(meta, 'idx', field.attname, id)))
+    results = pipe.execute() if indexes else []
+    return [results[index] for index in indexes]
+
+
+def relation_count_property(model, name):
+    """property of the related model counting objects of the model related to it"""
+    def count(instance):
+        return relation_counts(model.objects, name, [instance])[0]
+    return property(count)
+
+
+def register_relation_counts(model, names):
+    """add <related_name>_count properties to models related by fields of names"""
+    for name in names:
+        field = get_relation_field(model._meta, name)
+        setattr(field.relmodel, '%s_count' % field.related_name, relation_count_property(model, name))
@@ -0,0 +1,690 @@
+from stdnet.backends.redisb import RedisScript
+from stdnet.utils import native_str, zip
+
+
+class djangostdnet_page(RedisScript):
+    """ids with scores of a sorted set following the position of the cursor"""
+    script = '''\
+local key, score, member, count, desc = KEYS[1], ARGV[1], ARGV[2], tonumber(ARGV[3]), ARGV[4] == '1'
+local start = 0
+if member ~= '' then
+    -- the position just after the cursor, even if the member is gone or moved
+    local ties = redis.call('zrangebyscore', key, score, score)
+    if desc then
+        start = redis.call('zcount', key, '(' .. score, '+inf')
+    else
+        start = redis.call('zcount', key, '-inf', '(' .. score)
+    end
+    for _, m in ipairs(ties) do
+        if (desc and m >= member) or (not desc and m <= member) then
+            start = start + 1
+        end
+    end
+end
+if desc then
+    return redis.call('zrevrange', key, start, start + count - 1, 'WITHSCORES')
+else
+    return redis.call('zrange', key, start, start + count - 1, 'WITHSCORES')
+end
+'''
+
+    def callback(self, response, **options):
+        return list(zip(response[::2], response[1::2]))
+
+
+class djangostdnet_aggregate(RedisScript):
+    """aggregates over attributes of objects in a set of ids, skipping ones expired by ttl attribute"""
+    script = '''\
+local key, prefix, ttl_attribute = KEYS[1], ARGV[1], ARGV[2]
+local functions, attributes = {}, {}
+for i = 3, # ARGV, 2 do
+    table.insert(functions, ARGV[i])
+    table.insert(attributes, ARGV[i + 1])
+end
+local fetching = {}
+for _, attribute in ipairs(attributes) do
+    table.insert(fetching, attribute)
+end
+if ttl_attribute ~= '' then
+    table.insert(fetching, ttl_attribute)
+end
+local now = tonumber(redis.call('time')[1])
+local ids
+if redis.call('type', key)['ok'] == 'zset' then
+    ids = redis.call('zrange', key, 0, -1)
+else
+    ids = redis.call('smembers', key)
+end
+local sums, counts, mins, maxs = {}, {}, {}, {}
+for i = 1, # functions do
+    sums[i] = 0
+    counts[i] = 0
+end
+for _, id in ipairs(ids) do
+    local values = {}
+    if # fetching > 0 then
+        values = redis.call('hmget', prefix .. id, unpack(fetching))
+    end
+    local expired = false
+    if ttl_attribute ~= '' and values[# fetching] then
+        local t, delta = string.match(values[# fetching], '^(%-?%d+):(%-?%d+)$')
+        expired = t ~= nil and tonumber(t) + tonumber(delta) - now < 0
+    end
+    if not expired then
+        for i, attribute in ipairs(attributes) do
+            local value
+            if attribute == '' then
+                value = tonumber(id) or 0
+            else
+                value = tonumber(values[i])
+            end
+            if value then
+                sums[i] = sums[i] + value
+                counts[i] = counts[i] + 1
+                if mins[i] == nil or value < mins[i] then
+                    mins[i] = value
+                end
+                if maxs[i] == nil or value > maxs[i] then
+                    maxs[i] = value
+                end
+            end
+        end
+    end
+end
+local result = {}
+for i, func in ipairs(functions) do
+    local value
+    if func == 'count' then
+        value = counts[i]
+    elseif counts[i] == 0 then
+        value = nil
+    elseif func == 'sum' then
+        value = sums[i]
+    elseif func == 'avg' then
+        value = sums[i] / counts[i]
+    elseif func == 'min' then
+        value = mins[i]
+    elseif func == 'max' then
+        value = maxs[i]
+    end
+    -- as string, numbers are truncated to integers in reply
+    table.insert(result, value and string.format('%.17g', value) or '')
+end
+return result
+'''
+
+
+class djangostdnet_update(RedisScript):
+    """set attributes of objects in a set of ids, maintaining their indexes. returns the updated ids"""
+    script = '''\
+local key, idset = KEYS[1], KEYS[2]
+local prefix, idx_prefix, sorted, score = ARGV[1], ARGV[2], ARGV[3] == '1', ARGV[4]
+local num_indices = tonumber(ARGV[5])
+local indices = {}
+for i = 1, num_indices do
+    indices[i] = ARGV[5 + i]
+end
+local updates = {}
+for i = 6 + num_indices, # ARGV, 3 do
+    table.insert(updates, {ARGV[i], ARGV[i + 1], ARGV[i + 2]})
+end
+-- indexes affected by the update, all of them if the score changes
+local affected = {}
+for _, attribute in ipairs(indices) do
+    local hit = score ~= ''
+    for _, update in ipairs(updates) do
+        if update[1] == attribute then
+            hit = true
+        end
+    end
+    if hit then
+        table.insert(affected, attribute)
+    end
+end
+local function index_key(attribute, value)
+    return idx_prefix .. attribute .. ':' .. (value or '')
+end
+local ids
+if redis.call('type', key)['ok'] == 'zset' then
+    ids = redis.call('zrange', key, 0, -1)
+else
+    ids = redis.call('smembers', key)
+end
+local updated = {}
+for _, id in ipairs(ids) do
+    local okey = prefix .. id
+    if redis.call('exists', okey) == 1 then
+        local id_score = score
+        if sorted and id_score == '' then
+            id_score = redis.call('zscore', idset, id)
+        end
+        for _, attribute in ipairs(affected) do
+            local idxkey = index_key(attribute, redis.call('hget', okey, attribute))
+            if sorted then
+                redis.call('zrem', idxkey, id)
+            else
+                redis.call('srem', idxkey, id)
+            end
+        end
+        for _, update in ipairs(updates) do
+            if update[2] == 'set' then
+                redis.call('hset', okey, update[1], update[3])
+            else
+                redis.call('hdel', okey, update[1])
+            end
+        end
+        for _, attribute in ipairs(affected) do
+            local idxkey = index_key(attribute, redis.call('hget', okey, attribute))
+            if sorted then
+                redis.call('zadd', idxkey, id_score, id)
+            else
+                redis.call('sadd', idxkey, id)
+            end
+        end
+        if sorted and score ~= '' then
+            redis.call('zadd', idset, score, id)
+        end
+        table.insert(updated, id)
+    end
+end
+return updated
+'''
+
+
+class djangostdnet_sync(RedisScript):
+    """set attributes of the hash of an object if they differ, and delete ones given, leaving the others,
+    maintaining its indexes and the set of ids. Counters given are set with their deltas pending in hashes of KEYS,
+    and sorted views and prefix indexes given are updated as well.
+    returns whether anything changed, the error of a violated unique constraint if any, and the stored hash"""
+    script = '''\
+local idset, okey = KEYS[1], KEYS[2]
+local idx_prefix, uni_prefix, id, sorted, score = ARGV[1], ARGV[2], ARGV[3], ARGV[4] == '1', ARGV[5]
+local num_indices = tonumber(ARGV[6])
+local indices = {}
+for i = 7, 6 + 2 * num_indices, 2 do
+    table.insert(indices, {ARGV[i], ARGV[i + 1] == '1'})
+end
+local p = 7 + 2 * num_indices
+local num_deletes = tonumber(ARGV[p])
+local current, data = {}, {}
+local stored = redis.call('hgetall', okey)
+for i = 1, # stored, 2 do
+    current[stored[i]] = stored[i + 1]
+    data[stored[i]] = stored[i + 1]
+end
+local sets, deletes = {}, {}
+for i = p + 1, p + num_deletes do
+    if current[ARGV[i]] then
+        table.insert(deletes, ARGV[i])
+        data[ARGV[i]] = nil
+    end
+end
+local c = p + 1 + num_deletes
+local num_counters = tonumber(ARGV[c])
+local counters = {}
+for i = 1, num_counters do
+    local delta = redis.call('hget', KEYS[2 + i], id)
+    if delta then
+        counters[ARGV[c + 2 * i - 1]] = {delta, ARGV[c + 2 * i] == '1'}
+    end
+end
+local v = c + 1 + 2 * num_counters
+local num_views = tonumber(ARGV[v])
+local x = v + 1 + 2 * num_views
+local num_prefixes = tonumber(ARGV[x])
+for i = x + 1 + 2 * num_prefixes, # ARGV, 2 do
+    local attribute, value = ARGV[i], ARGV[i + 1]
+    local counter = counters[attribute]
+    if counter then
+        -- increments not written back to django yet
+        value = string.format('%.17g', tonumber(value) + tonumber(counter[1]))
+        if counter[2] then
+            score = value
+        end
+    end
+    if current[attribute] ~= value then
+        table.insert(sets, attribute)
+        table.insert(sets, value)
+        data[attribute] = value
+    end
+end
+local function is_member(member)
+    if sorted then
+        return redis.call('zscore', idset, member) ~= false
+    end
+    return redis.call('sismember', idset, member) == 1
+end
+local exists, rescored = is_member(id), false
+if sorted then
+    local current_score = redis.call('zscore', idset, id)
+    rescored = not current_score or tonumber(current_score) ~= tonumber(score)
+end
+if exists and not rescored and # sets == 0 and # deletes == 0 then
+    return {0, '', stored}
+end
+-- indexes affected by the change, all of them if the score changes or the object is new
+local affected = {}
+for _, index in ipairs(indices) do
+    local attribute, unique = index[1], index[2]
+    if not exists or current[attribute] ~= data[attribute] or (rescored and not unique) then
+        table.insert(affected, index)
+    end
+end
+local function index_key(attribute, value)
+    return idx_prefix .. attribute .. ':' .. (value or '')
+end
+for _, index in ipairs(affected) do
+    local attribute, unique, value = index[1], index[2], data[index[1]]
+    if unique and value then
+        local owner = redis.call('hget', uni_prefix .. attribute, value)
+        if owner and owner ~= id and is_member(owner) then
+            return {0, 'Unique constraint "' .. attribute .. '" violated: "' .. value .. '" is already in database.',
+                    stored}
+        end
+    end
+end
+for _, index in ipairs(affected) do
+    local attribute, unique, value = index[1], index[2], current[index[1]]
+    if unique then
+        if value and redis.call('hget', uni_prefix .. attribute, value) == id then
+            redis.call('hdel', uni_prefix .. attribute, value)
+        end
+    elseif sorted then
+        redis.call('zrem', index_key(attribute, value), id)
+    else
+        redis.call('srem', index_key(attribute, value), id)
+    end
+end
+if # sets > 0 then
+    redis.call('hmset', okey, unpack(sets))
+end
+if # deletes > 0 then
+    redis.call('hdel', okey, unpack(deletes))
+end
+for _, index in ipairs(affected) do
+    local attribute, unique, value = index[1], index[2], data[index[1]]
+    if unique then
+        if value then
+            redis.call('hset', uni_prefix .. attribute, value, id)
+        end
+    elseif sorted then
+        redis.call('zadd', index_key(attribute, value), score, id)
+    else
+        redis.call('sadd', index_key(attribute, value), id)
+    end
+end
+if sorted then
+    redis.call('zadd', idset, score, id)
+else
+    redis.call('sadd', idset, id)
+end
+local k = 2 + num_counters
+for i = 1, num_views do
+    local view, attribute, view_score = KEYS[k + i], ARGV[v + 2 * i - 1], ARGV[v + 2 * i]
+    if counters[attribute] then
+        view_score = data[attribute]
+    end
+    if view_score == '' then
+        redis.call('zrem', view, id)
+    else
+        redis.call('zadd', view, view_score, id)
+    end
+end
+k = k + num_views
+for i = 1, num_prefixes do
+    local key, values = KEYS[k + 2 * i - 1], KEYS[k + 2 * i]
+    local action, value = ARGV[x + 2 * i - 1], ARGV[x + 2 * i]
+    local old = redis.call('hget', values, id)
+    if old then
+        redis.call('zrem', key, old .. '\\0' .. id)
+    end
+    if action == 'set' then
+        redis.call('zadd', key, 0, value .. '\\0' .. id)
+        redis.call('hset', values, id, value)
+    else
+        redis.call('hdel', values, id)
+    end
+end
+return {1, '', redis.call('hgetall', okey)}
+'''
+
+    def callback(self, response, **options):
+        changed, error, stored = response
+        return bool(changed), native_str(error) if error else None, dict(zip(stored[::2], stored[1::2]))
+
+
+class djangostdnet_incr(RedisScript):
+    """increment an attribute of an object maintaining its indexes and sorted views, and its pending delta if any.
+    returns the new value, nil if the object does not exist"""
+    script = '''\
+local idset = KEYS[1]
+local okey, idx_prefix, id, attribute, amount = ARGV[1], ARGV[2], ARGV[3], ARGV[4], ARGV[5]
+local float, sorted, ordering = ARGV[6] == '1', ARGV[7] == '1', ARGV[8] == '1'
+local num_views = tonumber(ARGV[9])
+local views = {}
+for i = 1, num_views do
+    views[i] = KEYS[1 + i]
+end
+local pending = KEYS[2 + num_views]
+-- indexes affected by the increment, all of them if the score changes
+local affected = {}
+for i = 10, # ARGV do
+    if ordering or ARGV[i] == attribute then
+        table.insert(affected, ARGV[i])
+    end
+end
+local function index_key(attribute, value)
+    return idx_prefix .. attribute .. ':' .. (value or '')
+end
+local score
+if sorted then
+    score = redis.call('zscore', idset, id)
+    if not score then
+        return false
+    end
+elseif redis.call('sismember', idset, id) == 0 then
+    return false
+end
+for _, attribute in ipairs(affected) do
+    local idxkey = index_key(attribute, redis.call('hget', okey, attribute))
+    if sorted then
+        redis.call('zrem', idxkey, id)
+    else
+        redis.call('srem', idxkey, id)
+    end
+end
+local value
+if float then
+    value = redis.call('hincrbyfloat', okey, attribute, amount)
+else
+    value = tostring(redis.call('hincrby', okey, attribute, amount))
+end
+if ordering then
+    score = value
+    redis.call('zadd', idset, score, id)
+end
+for _, attribute in ipairs(affected) do
+    local idxkey = index_key(attribute, redis.call('hget', okey, attribute))
+    if sorted then
+        redis.call('zadd', idxkey, score, id)
+    else
+        redis.call('sadd', idxkey, id)
+    end
+end
+for _, view in ipairs(views) do
+    redis.call('zadd', view, value, id)
+end
+if pending then
+    if float then
+        redis.call('hincrbyfloat', pending, id, amount)
+    else
+        redis.call('hincrby', pending, id, amount)
+    end
+end
+return value
+'''
+
+
+class djangostdnet_prefix_index(RedisScript):
+    """set or delete values of ids in a lexicographic sorted set of value and id, and a hash of the values"""
+    script = '''\
+local key, values = KEYS[1], KEYS[2]
+for i = 1, # ARGV, 3 do
+    local id, action, value = ARGV[i], ARGV[i + 1], ARGV[i + 2]
+    local old = redis.call('hget', values, id)
+    if old then
+        redis.call('zrem', key, old .. '\\0' .. id)
+    end
+    if action == 'set' then
+        redis.call('zadd', key, 0, value .. '\\0' .. id)
+        redis.call('hset', values, id, value)
+    else
+        redis.call('hdel', values, id)
+    end
+end
+'''
+
+
+class djangostdnet_index_ids(RedisScript):
+    """store ids in a range of a range or prefix index into a set, or a sorted set of zero scores if sorted"""
+    script = '''\
+local dest, key, kind, min, max, sorted = KEYS[1], KEYS[2], ARGV[1], ARGV[2], ARGV[3], ARGV[4] == '1'
+local members
+if kind == 'lex' then
+    members = redis.call('zrangebylex', key, min, max)
+else
+    members = redis.call('zrangebyscore', key, min, max)
+end
+redis.call('del', dest)
+for _, member in ipairs(members) do
+    local id = member
+    if kind == 'lex' then
+        -- the id follows the last separator of the value and the id
+        local position = 0
+        repeat
+            local found = string.find(member, '\\0', position + 1, true)
+            if found then
+                position = found
+            end
+        until not found
+        id = string.sub(member, position + 1)
+    end
+    if sorted then
+        redis.call('zadd', dest, 0, id)
+    else
+        redis.call('sadd', dest, id)
+    end
+end
+return # members
+'''
+
+
+class djangostdnet_reindex_build(RedisScript):
+    """put objects of ids to new index sets of their current values, recording the values"""
+    script = '''\
+local idset, scanned, values = KEYS[1], KEYS[2], KEYS[3]
+local temp_prefix, prefix, attribute, sorted = ARGV[1], ARGV[2], ARGV[3], ARGV[4] == '1'
+for i = 5, # ARGV do
+    local id = ARGV[i]
+    local score
+    if sorted then
+        score = redis.call('zscore', idset, id)
+    elseif redis.call('sismember', idset, id) == 1 then
+        score = true
+    end
+    if score then
+        local value = redis.call('hget', prefix .. id, attribute) or ''
+        if sorted then
+            redis.call('zadd', temp_prefix .. value, score, id)
+        else
+            redis.call('sadd', temp_prefix .. value, id)
+        end
+        redis.call('sadd', values, value)
+        redis.call('hset', scanned, id, value)
+    end
+end
+'''
+
+
+class djangostdnet_reindex_prune(RedisScript):
+    """delete live index sets of values not recorded for new ones"""
+    script = '''\
+local values = KEYS[1]
+local live_prefix = ARGV[1]
+for i = 2, # ARGV do
+    if redis.call('sismember', values, ARGV[i]) == 0 then
+        redis.call('del', live_prefix .. ARGV[i])
+    end
+end
+'''
+
+
+class djangostdnet_reindex_swap(RedisScript):
+    """replace live index sets of values by new ones, deleting ones emptied since built"""
+    script = '''\
+local temp_prefix, live_prefix = ARGV[1], ARGV[2]
+for i = 3, # ARGV do
+    local value = ARGV[i]
+    if redis.call('exists', temp_prefix .. value) == 1 then
+        redis.call('rename', temp_prefix .. value, live_prefix .. value)
+    else
+        redis.call('del', live_prefix .. value)
+    end
+end
+'''
+
+
+class djangostdnet_reindex_reconcile(RedisScript):
+    """
+    put objects of ids to index sets of their current values, removing them from ones of values recorded
+    if changed or deleted since, and record the current values
+    """
+    script = '''\
+local idset, scanned, values = KEYS[1], KEYS[2], KEYS[3]
+local index_prefix, prefix, attribute, sorted = ARGV[1], ARGV[2], ARGV[3], ARGV[4] == '1'
+local function remove(key, id)
+    if sorted then
+        redis.call('zrem', key, id)
+    else
+        redis.call('srem', key, id)
+    end
+end
+for i = 5, # ARGV do
+    local id = ARGV[i]
+    local old = redis.call('hget', scanned, id)
+    local score, value
+    if sorted then
+        score = redis.call('zscore', idset, id)
+    elseif redis.call('sismember', idset, id) == 1 then
+        score = true
+    end
+    if score then
+        value = redis.call('hget', prefix .. id, attribute) or ''
+        if sorted then
+            redis.call('zadd', index_prefix .. value, score, id)
+        else
+            redis.call('sadd', index_prefix .. value, id)
+        end
+        redis.call('sadd', values, value)
+        redis.call('hset', scanned, id, value)
+    else
+        redis.call('hdel', scanned, id)
+    end
+    if old and old ~= value then
+        remove(index_prefix .. old, id)
+    end
+end
+'''
+
+
+class djangostdnet_rebuild_views(RedisScript):
+    """
+    apply updates of sorted views and prefix indexes to ids, ones present of which attributes are unchanged
+    since read, or ones missing. returns the number of ids updated
+    """
+    script = '''\
+local idset = KEYS[1]
+local prefix, sorted, num_attributes = ARGV[1], ARGV[2] == '1', tonumber(ARGV[3])
+local attributes = {}
+for i = 1, num_attributes do
+    attributes[i] = ARGV[3 + i]
+end
+local function is_member(id)
+    if sorted then
+        return redis.call('zscore', idset, id) ~= false
+    end
+    return redis.call('sismember', idset, id) == 1
+end
+local updated = 0
+local i = 4 + num_attributes
+while i <= # ARGV do
+    local id, present = ARGV[i], ARGV[i + 1] == '1'
+    i = i + 2
+    local apply = is_member(id) == present
+    if present then
+        -- values read as '1' .. value, or '0' if missing
+        local values = redis.call('hmget', prefix .. id, unpack(attributes))
+        for j = 1, num_attributes do
+            if (values[j] and '1' .. values[j] or '0') ~= ARGV[i + j - 1] then
+                apply = false
+            end
+        end
+        i = i + num_attributes
+    end
+    local num_updates = tonumber(ARGV[i])
+    i = i + 1
+    if apply then
+        for j = i, i + 4 * num_updates - 1, 4 do
+            local action, key, values_key, value = ARGV[j], ARGV[j + 1], ARGV[j + 2], ARGV[j + 3]
+            if action == 'zadd' then
+                redis.call('zadd', key, value, id)
+            elseif action == 'zrem' then
+                redis.call('zrem', key, id)
+            else
+                local old = redis.call('hget', values_key, id)
+                if old then
+                    redis.call('zrem', key, old .. '\\0' .. id)
+                end
+                if action == 'prefix' then
+                    redis.call('zadd', key, 0, value .. '\\0' .. id)
+                    redis.call('hset', values_key, id, value)
+                else
+                    redis.call('hdel', values_key, id)
+                end
+            end
+        end
+        updated = updated + 1
+    end
+    i = i + 4 * num_updates
+end
+return updated
+'''
+
+
+class djangostdnet_storage_migrate(RedisScript):
+    """
+    move attributes of objects of ids into the blob packed by msgpack, or back from the blob to plain
+    attributes without attributes given. An existing blob, written by a commit meanwhile, is kept over
+    plain attributes.
+    """
+    script = '''\
+local prefix, blob = ARGV[1], ARGV[2]
+local num_attributes = tonumber(ARGV[3])
+local attributes = {}
+for i = 1, num_attributes do
+    attributes[i] = ARGV[3 + i]
+end
+local migrated = 0
+for i = 4 + num_attributes, # ARGV do
+    local okey = prefix .. ARGV[i]
+    if num_attributes > 0 then
+        local values = redis.call('hmget', okey, unpack(attributes))
+        local data, found = {}, false
+        for j, attribute in ipairs(attributes) do
+            if values[j] then
+                data[attribute] = values[j]
+                found = true
+            end
+        end
+        if found then
+            if redis.call('hexists', okey, blob) == 0 then
+                redis.call('hset', okey, blob, cmsgpack.pack(data))
+            end
+            redis.call('hdel', okey, unpack(attributes))
+            migrated = migrated + 1
+        end
+    else
+        local packed = redis.call('hget', okey, blob)
+        if packed then
+            for attribute, value in pairs(cmsgpack.unpack(packed)) do
+                if redis.call('hexists', okey, attribute) == 0 then
+                    redis.call('hset', okey, attribute, value)
+                end
+            end
+            redis.call('hdel', okey, blob)
+            migrated = migrated + 1
+        end
+    end
+end
+return migrated
+'''
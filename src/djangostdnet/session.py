@@ -1,18 +1,79 @@
 from datetime import datetime
+import json
+import threading
 from django.conf import settings
 from django.utils import timezone
-from stdnet import odm
+from stdnet import odm, CommitException, FieldValueError
+from stdnet.backends.redisb import MIN_FLOAT
 from stdnet.odm import session
 from . import fields as fields_mod
+from .counters import pending_deltas, pending_key, write_back_fields
+from .loading import BLOB, id_set_key, is_packed, make_instances, object_key
+from .prefixes import prefix_key, prefix_values_key
+from .sortedviews import view_key, view_score
+from . import scripts  # noqa, registers lua scripts
 
 
 UNDEFINED = object()
 
+_bound = threading.local()
+
+
+def bind_session(session):
+    _bound.session = session
+
+
+def unbind_session():
+    session = get_bound_session()
+    _bound.session = None
+    return session
+
+
+def get_bound_session():
+    return getattr(_bound, 'session', None)
+
+
+def flush_bound_session():
+    """commit changes pending in the bound session, then keep batching"""
+    session = get_bound_session()
+    if session is not None and session.transaction is not None:
+        session.commit()
+        session.begin()
+
+
+def mapped_fields(model):
+    """fields of the model mirrored from columns of its django model, other attributes are left as stored"""
+    from .models import get_fields
+
+    meta = model._meta
+    names = set(field.name for field in get_fields(model._django_meta.model._meta))
+    return [field for field in meta.fields if field is not meta.pk and field.attname != BLOB and field.name in names]
+
+
+def object_deltas(deltas, index):
+    """pending deltas of the object at index, by attname"""
+    return dict((attname, values[index]) for attname, values in deltas.items())
+
+
+def mirrored_fields(model, django_obj):
+    """
+    mapped fields, and the other fields whose values the django object carries,
+    as set by an instance saved through its django instance
+    """
+    names = vars(django_obj)
+    mapped = mapped_fields(model)
+    return mapped + [field for field in model._meta.fields if field.attname != BLOB and field not in mapped
+                     and field is not model._meta.pk and field.name in names]
+
 
 class Session(session.Session):
     def add(self, instance, modified=True, **params):
         from .models import Model
 
+        if not modified and self.transaction is not None and instance in self:
+            # loaded by a query while the pending changes of the same object must be kept
+            return instance
+
         if modified:
             self._check_auto_now_and_auto_now_add(instance)
 
@@ -23,6 +84,11 @@ class Session(session.Session):
            and hasattr(instance._django_meta, 'model'):
             created = self._ensure_django_instance(instance)
         if created:
+            if self.transaction is not None:
+                # mirrored by post_save of the django instance, but not committed yet
+                pending = self.model(instance)._new.get(instance.pkvalue())
+                if pending is not None:
+                    return pending
             return self.query(self.model(instance)).get(id=instance.id)
         else:
             return super(Session, self).add(instance, modified, **params)
@@ -50,10 +116,11 @@ class Session(session.Session):
             modified = True
             # primary key will be obtained from django model instance
             fields = [field for field in instance._meta.dfields.values()
-                      if field != instance._meta.pk]
+                      if field != instance._meta.pk and field.attname != BLOB]
         else:
             creation = False
-            fields = instance._meta.dfields.values()
+            fields = [field for field in instance._meta.dfields.values()
+                      if field.attname != BLOB]
 
         for field in fields:
             # pre set
@@ -100,8 +167,12 @@ class Session(session.Session):
         return creation
 
     def add_from_django_object(self, manager, django_obj):
+        """mirror the django object to its instance. Returns whether anything changed"""
         model = manager.model
         pk = model._meta.pk
+        if self._can_sync_on_server(model._meta):
+            return self._sync_from_django_object(manager, django_obj)
+
         modified = False
         try:
             instance = manager.get(**{pk.name: django_obj.pk})
@@ -111,8 +182,139 @@ class Session(session.Session):
             creation = True
             modified = True
 
-        fields = [field for field in model._meta.fields
-                  if field != pk]
+        deltas = pending_deltas(manager, [django_obj.pk])
+        if self._update_from_django_object(instance, django_obj, object_deltas(deltas, 0)):
+            modified = True
+
+        if creation:
+            pk.set_value(instance, django_obj.pk)
+
+        if modified:
+            # shortcut the add implementation
+            super(Session, self).add(instance)
+        return modified
+
+    def _can_sync_on_server(self, meta):
+        # changes batched in a transaction are committed together, and a score by a counter is given by commits.
+        # the blob is written as a whole, so all of packed fields must be mirrored
+        mapped = mapped_fields(meta.model)
+        return self.transaction is None and not meta.multifields and not (meta.ordering and meta.ordering.auto) \
+            and all(field in mapped for field in getattr(meta.model, '_packed_fields', ()))
+
+    def _sync_from_django_object(self, manager, django_obj):
+        """
+        compare and set attributes of the instance mirrored from the django object by a script at once,
+        keeping the other attributes, then signal post_commit as a commit does if anything changed
+        """
+        model = manager.model
+        meta = model._meta
+        backend = manager.backend
+        instance = manager()
+        meta.pk.set_value(instance, django_obj.pk)
+        self._update_from_django_object(instance, django_obj)
+        if not meta.is_valid(instance):
+            raise FieldValueError(json.dumps(instance._dbdata['errors']))
+
+        score = ''
+        if meta.ordering:
+            value = getattr(instance, meta.ordering.name, None)
+            score = MIN_FLOAT if value is None else meta.ordering.field.scorefun(value)
+        indices = [field for field in meta.indices if field is not meta.pk]
+        mirrored = mirrored_fields(model, django_obj)
+        attributes = [field.attname for field in mirrored if not is_packed(field)]
+        if getattr(model, '_packed_fields', ()):
+            attributes.append(BLOB)
+        cleaned_data = instance._dbdata['cleaned_data']
+        deletes = [attname for attname in attributes if attname not in cleaned_data]
+        args = [backend.basekey(meta, 'idx', ''), backend.basekey(meta, 'uni', ''), instance.pkvalue(),
+                1 if meta.ordering else 0, score, len(indices)]
+        for field in indices:
+            args.extend((field.attname, 1 if field.unique else 0))
+        args.append(len(deletes))
+        args.extend(deletes)
+        keys = [id_set_key(backend, meta), object_key(backend, meta, instance.pkvalue())]
+        counters = [field for field in write_back_fields(model) if field.attname in cleaned_data]
+        args.append(len(counters))
+        for field in counters:
+            keys.append(pending_key(backend, meta, field))
+            args.extend((field.attname, 1 if meta.ordering and meta.ordering.name == field.name else 0))
+        # in the script along with the hash, as a commit leaves them to post_commit
+        views = [field for field, _ in getattr(model, '_sorted_views', ()) if field in mirrored]
+        args.append(len(views))
+        for field in views:
+            keys.append(view_key(backend, meta, field))
+            view_value = view_score(field, getattr(instance, field.attname, None))
+            args.extend((field.attname, '' if view_value is None else view_value))
+        prefixes = [field for field in getattr(model, '_prefix_indexes', ()) if field in mirrored]
+        args.append(len(prefixes))
+        for field in prefixes:
+            keys.extend((prefix_key(backend, meta, field), prefix_values_key(backend, meta, field)))
+            prefix_value = getattr(instance, field.attname, None)
+            args.extend(('del', '') if prefix_value is None else ('set', prefix_value))
+        for attname in attributes:
+            if attname in cleaned_data:
+                args.extend((attname, cleaned_data[attname]))
+        changed, error, data = backend.client.execute_script('djangostdnet_sync', keys, *args)
+        if error:
+            raise CommitException(error)
+        if changed:
+            # as stored, with the attributes not mirrored
+            instance, = make_instances(backend, meta, [instance.pkvalue()], [data])
+            # views and prefix indexes of mirrored fields are updated by the script
+            self.router.post_commit.fire(model, instances=[instance], session=self, synced=views + prefixes)
+        return changed
+
+    def mirror_django_objects(self, manager, django_objs):
+        """create instances of django objects which are known as missing, at a commit"""
+        pk = manager.model._meta.pk
+        instances = []
+        django_objs = list(django_objs)
+        deltas = pending_deltas(manager, [django_obj.pk for django_obj in django_objs])
+        in_transaction = self.transaction is not None
+        if not in_transaction:
+            self.begin()
+        for i, django_obj in enumerate(django_objs):
+            instance = manager()
+            self._update_from_django_object(instance, django_obj, object_deltas(deltas, i))
+            pk.set_value(instance, django_obj.pk)
+            # shortcut the add implementation
+            instances.append(super(Session, self).add(instance))
+        if not in_transaction:
+            self.commit()
+        return instances
+
+    def sync_django_objects(self, manager, django_objs):
+        """
+        mirror django objects to their instances loaded in a pipeline, creating missing ones, at a commit.
+        Returns the number of created or modified instances.
+        """
+        pk = manager.model._meta.pk
+        django_objs = list(django_objs)
+        instances = manager.get_many([django_obj.pk for django_obj in django_objs])
+        deltas = pending_deltas(manager, [django_obj.pk for django_obj in django_objs])
+        synced = 0
+        in_transaction = self.transaction is not None
+        if not in_transaction:
+            self.begin()
+        for i, (django_obj, instance) in enumerate(zip(django_objs, instances)):
+            creation = instance is None
+            if creation:
+                instance = manager()
+                pk.set_value(instance, django_obj.pk)
+            if self._update_from_django_object(instance, django_obj, object_deltas(deltas, i)) or creation:
+                # shortcut the add implementation
+                super(Session, self).add(instance)
+                synced += 1
+        if not in_transaction:
+            self.commit()
+        return synced
+
+    def _update_from_django_object(self, instance, django_obj, deltas=None):
+        """set values of the django object to the instance, plus deltas of counters pending by attname"""
+        model = instance.__class__
+        modified = False
+
+        fields = mirrored_fields(model, django_obj)
 
         for field in fields:
             if isinstance(field, (odm.ForeignKey, fields_mod.OneToOneField)):
@@ -121,6 +323,8 @@ class Session(session.Session):
                 field_name = field.name
 
             django_field_value = getattr(django_obj, field_name)
+            if deltas and django_field_value is not None and deltas.get(field.attname) is not None:
+                django_field_value += deltas[field.attname]
             field_value = getattr(instance, field_name, UNDEFINED)
 
             if isinstance(field, odm.DateTimeField):
@@ -135,18 +339,10 @@ class Session(session.Session):
                 modified = True
                 setattr(instance, field_name, django_field_value)
 
-        if creation:
-            pk.set_value(instance, django_obj.pk)
-
-        if modified:
-            # shortcut the add implementation
-            super(Session, self).add(instance)
+        return modified
 
     def delete_from_django_object(self, manager, django_obj):
         model = manager.model
         pk = model._meta.pk
-        try:
-            instance = manager.get(**{pk.name: django_obj.pk})
-            self.delete(instance)
-        except model.DoesNotExist:
-            pass
+        # by a query, without loading the instance
+        self.delete(self.query(model).filter(**{pk.name: django_obj.pk}))
@@ -0,0 +1,161 @@
+import json
+import struct
+from time import time
+
+from stdnet.utils import native_str, zip
+from .loading import id_set_key
+from .reindex import scan_chunks, scan_keys
+
+
+MAGIC = b'DJANGOSTDNET-SNAPSHOT 1\n'
+DEFAULT_SNAPSHOT_CHUNK_SIZE = 1000
+# index of the model in the header, lengths of the key and the value, and TTL in milliseconds, -1 without
+FRAME = struct.Struct('>HIIq')
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def model_prefix(backend, meta):
+    return backend.basekey(meta, '')
+
+
+def dump(managers, fileobj, chunk_size=DEFAULT_SNAPSHOT_CHUNK_SIZE):
+    """
+    Write all keys of models of managers to fileobj, serialised by DUMP of the server in pipelines.
+    Keys are scanned while writes continue, so ones written after the start may or may not be included.
+    Returns the header, with the time of the start to catch up from.
+    """
+    from .query import glob_escape
+
+    header = {'time': time(), 'models': [str(manager._meta) for manager in managers]}
+    fileobj.write(MAGIC)
+    fileobj.write(json.dumps(header).encode('utf-8') + b'\n')
+    for index, manager in enumerate(managers):
+        backend = manager.backend
+        client = backend.client
+        prefix = model_prefix(backend, manager._meta)
+        keys = []
+        for key in scan_keys(client, glob_escape(prefix) + '*', chunk_size):
+            keys.append(native_str(key))
+            if len(keys) == chunk_size:
+                write_frames(fileobj, client, index, prefix, keys)
+                keys = []
+        write_frames(fileobj, client, index, prefix, keys)
+    return header
+
+
+def write_frames(fileobj, client, index, prefix, keys):
+    if not keys:
+        return
+    pipe = client.pipeline()
+    for key in keys:
+        pipe.dump(key)
+        pipe.pttl(key)
+    results = pipe.execute()
+    for key, value, ttl in zip(keys, results[::2], results[1::2]):
+        # deleted on the way
+        if value is None:
+            continue
+        key = key[len(prefix):].encode('utf-8')
+        fileobj.write(FRAME.pack(index, len(key), len(value), ttl if ttl and ttl > 0 else -1))
+        fileobj.write(key)
+        fileobj.write(value)
+
+
+def read_header(fileobj):
+    if fileobj.read(len(MAGIC)) != MAGIC:
+        raise SnapshotError('Not a snapshot of django-stdnet')
+    return json.loads(fileobj.readline().decode('utf-8'))
+
+
+def read_frames(fileobj):
+    while True:
+        frame = fileobj.read(FRAME.size)
+        if not frame:
+            return
+        if len(frame) < FRAME.size:
+            raise SnapshotError('Truncated snapshot')
+        index, key_length, value_length, ttl = FRAME.unpack(frame)
+        key = fileobj.read(key_length)
+        value = fileobj.read(value_length)
+        if len(key) < key_length or len(value) < value_length:
+            raise SnapshotError('Truncated snapshot')
+        yield index, native_str(key), value, ttl
+
+
+def clear(manager, chunk_size=DEFAULT_SNAPSHOT_CHUNK_SIZE):
+    """delete all keys of the model of manager"""
+    from .query import glob_escape
+
+    backend = manager.backend
+    client = backend.client
+    keys = list(scan_keys(client, glob_escape(model_prefix(backend, manager._meta)) + '*', chunk_size))
+    for i in range(0, len(keys), chunk_size):
+        client.delete(*keys[i:i + chunk_size])
+
+
+def load(managers, fileobj, chunk_size=DEFAULT_SNAPSHOT_CHUNK_SIZE):
+    """
+    Restore keys written by dump to the models of managers, matched by name, in pipelines of chunk_size keys.
+    Existing keys of the models are deleted first. Keys are restored under the prefix of the backend of
+    each model, which may differ from the one dumped from. Returns the header.
+    """
+    header = read_header(fileobj)
+    by_name = dict((str(manager._meta), manager) for manager in managers)
+    try:
+        targets = [by_name[name] for name in header['models']]
+    except KeyError as e:
+        raise SnapshotError('Model %s of the snapshot is not given' % e.args[0])
+    for manager in targets:
+        clear(manager, chunk_size)
+
+    pipes = {}
+    for index, key, value, ttl in read_frames(fileobj):
+        manager = targets[index]
+        backend = manager.backend
+        pipe = pipes.get(index)
+        if pipe is None:
+            pipe = pipes[index] = backend.client.pipeline()
+        pipe.execute_command('RESTORE', model_prefix(backend, manager._meta) + key, max(ttl, 0), value, 'REPLACE')
+        if len(pipe.command_stack) >= chunk_size:
+            pipe.execute()
+    for pipe in pipes.values():
+        pipe.execute()
+    return header
+
+
+def catch_up(manager, field_name, since, chunk_size=DEFAULT_SNAPSHOT_CHUNK_SIZE):
+    """
+    Mirror rows of the mapped Django model of which field_name is since or later, then delete objects of which
+    rows are gone, chunk by chunk. Returns the numbers of mirrored and deleted objects.
+    """
+    from .models import registry
+
+    django_model = registry.get_django_model(manager.model)
+    meta = manager._meta
+    session = manager.session()
+    rows = django_model.objects.filter(**{'%s__gte' % field_name: since}).order_by('pk')
+    synced = 0
+    last_pk = None
+    while True:
+        chunk = rows if last_pk is None else rows.filter(pk__gt=last_pk)
+        django_objs = list(chunk[:chunk_size])
+        if not django_objs:
+            break
+        synced += session.sync_django_objects(manager, django_objs)
+        last_pk = django_objs[-1].pk
+
+    deleted = 0
+    backend = manager.backend
+    for ids in scan_chunks(backend.client, id_set_key(backend, meta), bool(meta.ordering), chunk_size):
+        ids = [meta.pk.to_python(id, backend) for id in ids]
+        existing = set(django_model.objects.filter(pk__in=ids).values_list('pk', flat=True))
+        missing = [id for id in ids if id not in existing]
+        if missing:
+            # rows are gone already
+            with manager.model._delete_gate:
+                manager.filter(**{'%s__in' % meta.pk.name: missing}).delete()
+            deleted += len(missing)
+    return synced, deleted
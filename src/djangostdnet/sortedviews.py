@@ -0,0 +1,143 @@
+import calendar
+from datetime import date, datetime
+import time
+
+from django.conf import settings
+from django.utils import timezone
+from stdnet import FieldError
+from stdnet.utils import zip
+
+
+VIEW = 'view'
+
+
+def parse_sorted_views(meta, names):
+    """pairs of field and whether descending for names of Meta.sorted_views, '-' prefixed for descending"""
+    views = []
+    for name in names:
+        desc = name.startswith('-')
+        if desc:
+            name = name[1:]
+        field = meta.dfields.get(name)
+        if field is None or field is meta.pk:
+            raise FieldError('Field "%s" can not be a sorted view' % name)
+        views.append((field, desc))
+    return views
+
+
+def view_key(backend, meta, field):
+    return backend.basekey(meta, VIEW, field.attname)
+
+
+def date_score(value):
+    """epoch seconds of a date or datetime, naive one in the default timezone if USE_TZ"""
+    if not isinstance(value, datetime):
+        return calendar.timegm(value.timetuple())
+    if timezone.is_naive(value):
+        if not settings.USE_TZ:
+            return time.mktime(value.timetuple()) + value.microsecond / 1e6
+        value = timezone.make_aware(value, timezone.get_default_timezone())
+    return calendar.timegm(value.utctimetuple()) + value.microsecond / 1e6
+
+
+def view_score(field, value):
+    """score of a value in a view, None if not ranked"""
+    if value is None:
+        return None
+    if isinstance(value, date):
+        return date_score(value)
+    return field.scorefun(value)
+
+
+def queue_view_updates(pipe, backend, meta, field, ids, values):
+    for id, value in zip(ids, values):
+        score = view_score(field, value)
+        if score is None:
+            pipe.zrem(view_key(backend, meta, field), id)
+        else:
+            pipe.zadd(view_key(backend, meta, field), score, id)
+
+
+def update_sorted_views(manager, instances, synced=()):
+    """put committed instances to the views of their model but ones of fields synced already, in a pipeline"""
+    meta = manager._meta
+    views = [(field, desc) for field, desc in getattr(manager.model, '_sorted_views', ()) if field not in synced]
+    if not views or not instances:
+        return
+    backend = manager.backend
+    pipe = backend.client.pipeline()
+    ids = [instance.pkvalue() for instance in instances]
+    for field, _ in views:
+        values = [getattr(instance, field.attname, None) for instance in instances]
+        queue_view_updates(pipe, backend, meta, field, ids, values)
+    pipe.execute()
+
+
+def remove_from_sorted_views(manager, ids):
+    """remove deleted ids from the views of their model, in a pipeline"""
+    meta = manager._meta
+    views = getattr(manager.model, '_sorted_views', ())
+    if not views or not ids:
+        return
+    backend = manager.backend
+    pipe = backend.client.pipeline()
+    for field, _ in views:
+        pipe.zrem(view_key(backend, meta, field), *ids)
+    pipe.execute()
+
+
+class SortedView(object):
+    """
+    Objects ranked by a field, kept in a sorted set updated at every commit.
+    Ranges and ranks are O(log n) regardless of the number of objects.
+    """
+    def __init__(self, manager, field, desc=False):
+        self.manager = manager
+        self.field = field
+        self.desc = desc
+
+    @property
+    def key(self):
+        return view_key(self.manager.read_backend, self.manager._meta, self.field)
+
+    def count(self):
+        return self.manager.read_backend.client.zcard(self.key)
+
+    def ids(self, start=0, stop=-1):
+        """ids ranked from start to stop, both inclusive"""
+        client = self.manager.read_backend.client
+        range_ = client.zrevrange if self.desc else client.zrange
+        return self._ids(range_(self.key, start, stop))
+
+    def range(self, start=0, stop=-1):
+        """instances ranked from start to stop, both inclusive"""
+        return self._instances(self.ids(start, stop))
+
+    def top(self, count):
+        return self.range(0, count - 1)
+
+    def range_by_value(self, min=None, max=None, start=None, num=None):
+        """instances of which values are between min and max, both inclusive, in order of the view"""
+        client = self.manager.read_backend.client
+        min = '-inf' if min is None else view_score(self.field, min)
+        max = '+inf' if max is None else view_score(self.field, max)
+        if self.desc:
+            ids = client.zrevrangebyscore(self.key, max, min, start, num)
+        else:
+            ids = client.zrangebyscore(self.key, min, max, start, num)
+        return self._instances(self._ids(ids))
+
+    def rank(self, instance_or_id):
+        """0 based rank, None if not ranked"""
+        client = self.manager.read_backend.client
+        id = getattr(instance_or_id, 'pkvalue', lambda: instance_or_id)()
+        return (client.zrevrank if self.desc else client.zrank)(self.key, id)
+
+    def _ids(self, ids):
+        pk = self.manager._meta.pk
+        backend = self.manager.read_backend
+        return [pk.to_python(id, backend) for id in ids]
+
+    def _instances(self, ids):
+        # ones deleted meanwhile are skipped
+        return [instance for instance in self.manager.get_many(ids) if instance is not None]
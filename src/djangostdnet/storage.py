@@ -0,0 +1,117 @@
+import msgpack
+from stdnet import odm, FieldValueError
+from stdnet.utils import native_str, string_type
+from .loading import BLOB, PACKED, id_set_key, object_key, stored_value
+from .ttl import TTLField
+from . import scripts  # noqa, registers lua scripts
+
+
+STORAGES = ('fields', 'blob')
+
+
+def encode_value(value):
+    if isinstance(value, bytes):
+        return value
+    elif isinstance(value, string_type):
+        return value.encode('utf-8')
+    elif isinstance(value, float):
+        # repr keeps the precision on python 2
+        return repr(value).encode('utf-8')
+    return str(value).encode('utf-8')
+
+
+def encode(values):
+    """blob of serialised values by attribute, in strings as plain attributes are stored"""
+    # raw strings only, as the msgpack of lua scripts packs
+    return msgpack.packb(dict((attname, encode_value(value)) for attname, value in values.items()),
+                         use_bin_type=False)
+
+
+def decode(blob):
+    return dict((native_str(attname), value) for attname, value in msgpack.unpackb(blob, raw=True).items())
+
+
+class PackedFieldMixin(object):
+    """field stored in the blob of its instance instead of its own attribute"""
+    packed = True
+
+    def set_get_value(self, instance, value):
+        svalue = super(PackedFieldMixin, self).set_get_value(instance, value)
+        if svalue is None or svalue == '':
+            if self.required:
+                raise FieldValueError("Field '%s' is required for '%s'." % (self.attname, self.meta))
+        if svalue is not None:
+            instance._dbdata.setdefault(PACKED, {})[self.attname] = svalue
+        # written by the blob field
+        return {}
+
+    def value_from_data(self, instance, data):
+        value = stored_value(self, data)
+        data.pop(self.attname, None)
+        return value
+
+
+_packed_classes = {}
+
+
+def packed_field_class(cls):
+    if cls not in _packed_classes:
+        _packed_classes[cls] = type(str('Packed%s' % cls.__name__), (PackedFieldMixin, cls), {})
+    return _packed_classes[cls]
+
+
+class BlobField(odm.ByteField):
+    """hidden field writing packed fields of its instance at once, which are validated before it"""
+    def __init__(self, **kwargs):
+        kwargs.setdefault('required', False)
+        super(BlobField, self).__init__(**kwargs)
+
+    def set_get_value(self, instance, value):
+        values = instance._dbdata.pop(PACKED, None)
+        return encode(values) if values else None
+
+    def value_from_data(self, instance, data):
+        # decoded by packed fields
+        return None
+
+    def json_serialise(self, value):
+        return None
+
+
+def is_packable(meta, field):
+    return not (field is meta.pk or field.index or field.unique or field.as_cache or
+                isinstance(field, (odm.JSONField, odm.ForeignKey, TTLField)) or
+                (meta.ordering and meta.ordering.name == field.name))
+
+
+def setup_storage(model, storage):
+    """pack non-indexed scalar fields of model into a blob by msgpack, for 'blob' storage"""
+    if storage not in STORAGES:
+        raise ValueError('Unknown storage of model %s: %s' % (model.__name__, storage))
+    if storage == 'fields':
+        return
+    meta = model._meta
+    packed_fields = [field for field in meta.scalarfields if is_packable(meta, field)]
+    for field in packed_fields:
+        field.__class__ = packed_field_class(field.__class__)
+    BlobField().register_with_model(BLOB, model)
+    model._packed_fields = packed_fields
+
+
+def migrate_storage(manager, chunk_size):
+    """
+    Rewrite objects stored in the other encoding to the storage of the model online, chunk by chunk.
+    Each chunk is rewritten by a script at once. Returns the number of rewritten objects.
+    """
+    from .reindex import scan_chunks
+
+    meta = manager._meta
+    backend = manager.backend
+    client = backend.client
+    attributes = [field.attname for field in getattr(manager.model, '_packed_fields', ())]
+    args = [object_key(backend, meta, ''), BLOB, len(attributes)] + attributes
+    migrated = 0
+    for ids in scan_chunks(client, id_set_key(backend, meta), 1 if meta.ordering else 0, chunk_size):
+        migrated += client.execute_script('djangostdnet_storage_migrate', (), *(args + ids))
+    return migrated
+
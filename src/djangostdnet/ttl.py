@@ -1,7 +1,30 @@
 from time import time
 from django.utils.encoding import smart_text
-from stdnet.odm import session
 from stdnet import odm
+from .manager import Manager
+
+
+def get_ttl_field(meta):
+    ttl_fields = [field for field in meta.fields
+                  if isinstance(field, TTLField)]
+    if len(ttl_fields) != 1:
+        raise IOError("Support only one ttl field per model: %s", meta.model)
+    return ttl_fields[0]
+
+
+def purge_expired(item):
+    ttl_field = get_ttl_field(item._meta)
+    ttl_value = ttl_field.get_value(item)
+    if ttl_value is not None and ttl_value < 0:
+        item.delete()
+        return None
+    else:
+        return item
+
+
+def purge_expired_items(items):
+    return [item for item in items
+            if purge_expired(item) is not None]
 
 
 class TTLBackendQueryClassWrapper(object):
@@ -29,27 +52,20 @@ class TTLBackendQueryWrapper(object):
     def __getattr__(self, item):
         return getattr(self.query, item)
 
+    @property
+    def _ttl_field(self):
+        return get_ttl_field(self.query.meta)
+
     def _wrap_purge_expired_items(self, callback):
         def f(result):
             return callback(self._purge_expired_items(result))
         return f
 
     def _purge_expired(self, item):
-        ttl_fields = [field for field in item._meta.fields
-                      if isinstance(field, TTLField)]
-        if len(ttl_fields) != 1:
-            raise IOError("Support only one ttl field per model: %s", item._meta.model)
-        ttl_field = ttl_fields[0]
-        ttl_value = ttl_field.get_value(item)
-        if ttl_value is not None and ttl_value < 0:
-            item.delete()
-            return None
-        else:
-            return item
+        return purge_expired(item)
 
     def _purge_expired_items(self, items):
-        return [item for item in items
-                if self._purge_expired(item) is not None]
+        return purge_expired_items(items)
 
     def items(self, slic=None, callback=None):
         if callback is not None:
@@ -69,7 +85,7 @@ class TTLBackendMiddleware(object):
         return getattr(self.backend, name)
 
 
-class TTLManager(session.Manager):
+class TTLManager(Manager):
     @property
     def read_backend(self):
         original_backend = super(TTLManager, self).read_backend
@@ -80,6 +96,9 @@ class TTLManager(session.Manager):
         original_backend = super(TTLManager, self).backend
         return TTLBackendMiddleware(original_backend)
 
+    def purge_expired_items(self, items):
+        return purge_expired_items(items)
+
 
 class TTLField(odm.CharField):
     def set_get_value(self, instance, value):
@@ -19,9 +19,14 @@ settings.configure(
 
 redis_server = None
 redis_server_info = None
+# STDNET_TEST_BACKEND=memory runs tests on the in-memory backend, without a redis server
+test_backend = os.environ.get('STDNET_TEST_BACKEND', 'redis')
 
 
 def setUpModule():
+    if test_backend == 'memory':
+        return
+
     import redis
     import testing.redis
 
@@ -49,3 +54,26 @@ from .models import *  # noqa
 from .session import *  # noqa
 from .fields import *  # noqa
 from .ttl import *  # noqa
+from .middleware import *  # noqa
+from .deferred import *  # noqa
+from .get_many import *  # noqa
+from .iterator import *  # noqa
+from .page import *  # noqa
+from .projection import *  # noqa
+from .values import *  # noqa
+from .columns import *  # noqa
+from .tojson import *  # noqa
+from .aggregates import *  # noqa
+from .facets import *  # noqa
+from .update import *  # noqa
+from .delete import *  # noqa
+from .counters import *  # noqa
+from .sortedviews import *  # noqa
+from .relations import *  # noqa
+from .prefixes import *  # noqa
+from .ranges import *  # noqa
+from .reindex import *  # noqa
+from .storage import *  # noqa
+from .memory import *  # noqa
+from .snapshot import *  # noqa
+from .inmemory import *  # noqa
@@ -0,0 +1,86 @@
+from .testcase import BaseTestCase
+
+
+class AggregateTestCase(BaseTestCase):
+    def test_aggregate(self):
+        from decimal import Decimal
+        from stdnet import odm
+        from djangostdnet import models
+        from djangostdnet.aggregates import Sum, Avg, Min, Max, Count
+
+        class AModel(models.Model):
+            group = odm.SymbolField()
+            count = odm.IntegerField()
+            ratio = odm.FloatField()
+            price = models.DecimalField()
+
+            class Meta:
+                register = False
+
+        AModel.objects.new(group='a', count=1, ratio=0.5, price=Decimal('1.25'))
+        AModel.objects.new(group='a', count=2, ratio=1.5, price=Decimal('2.5'))
+        AModel.objects.new(group='b', count=10, ratio=2.0, price=Decimal('4'))
+
+        result = AModel.objects.aggregate(Sum('count'), Avg('ratio'), Min('price'), Max('price'), Count('id'))
+        self.assertEqual(result, {
+            'count__sum': 13,
+            'ratio__avg': 4.0 / 3,
+            'price__min': Decimal('1.25'),
+            'price__max': Decimal('4'),
+            'id__count': 3,
+        })
+
+        result = AModel.objects.filter(group='a').aggregate(total=Sum('price'), n=Count('id'))
+        self.assertEqual(result, {'total': Decimal('3.75'), 'n': 2})
+
+    def test_empty(self):
+        from stdnet import odm
+        from djangostdnet import models
+        from djangostdnet.aggregates import Sum, Count
+
+        class AModel(models.Model):
+            group = odm.SymbolField()
+            count = odm.IntegerField()
+
+            class Meta:
+                register = False
+
+        self.assertEqual(AModel.objects.filter(group='none').aggregate(Sum('count'), Count('id')),
+                         {'count__sum': None, 'id__count': 0})
+        self.assertEqual(AModel.objects.filter(group__in=[]).aggregate(Sum('count'), Count('id')),
+                         {'count__sum': None, 'id__count': 0})
+
+    def test_not_numeric(self):
+        from stdnet import odm, QuerySetError
+        from djangostdnet import models
+        from djangostdnet.aggregates import Sum
+
+        class AModel(models.Model):
+            group = odm.SymbolField()
+
+            class Meta:
+                register = False
+
+        with self.assertRaises(QuerySetError):
+            AModel.objects.aggregate(Sum('group'))
+
+    def test_ttl(self):
+        from freezegun import freeze_time
+        from stdnet import odm
+        from djangostdnet import models, ttl as ttl_mod
+        from djangostdnet.aggregates import Sum
+
+        class AModel(models.Model):
+            count = odm.IntegerField()
+            ttl = ttl_mod.TTLField()
+
+            manager_class = ttl_mod.TTLManager
+
+            class Meta:
+                register = False
+
+        AModel.objects.new(count=1, ttl=100)
+        with freeze_time('1970-01-01'):
+            AModel.objects.new(count=10, ttl=100)
+
+        self.assertEqual(AModel.objects.aggregate(Sum('count')), {'count__sum': 1})
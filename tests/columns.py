@@ -0,0 +1,88 @@
+from .testcase import BaseTestCase
+
+
+class ColumnsTestCase(BaseTestCase):
+    def test_columns(self):
+        import numpy as np
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+            count = odm.IntegerField()
+            ratio = odm.FloatField()
+            flag = odm.BooleanField()
+            note = odm.CharField()
+
+            class Meta:
+                ordering = 'id'
+                register = False
+
+        AModel.objects.new(name='foo', count=1, ratio=0.5, flag=True, note='a')
+        AModel.objects.new(name='bar', count=2, ratio=1.5, flag=False, note='b')
+        AModel.objects.new(name='foo', count=3, ratio=2.5, flag=True, note='c')
+
+        columns = AModel.objects.columns('id', 'name', 'count', 'ratio', 'flag', 'note', chunk_size=2)
+        self.assertEqual(list(columns), ['id', 'name', 'count', 'ratio', 'flag', 'note'])
+        self.assertEqual(columns['id'].dtype, np.int64)
+        self.assertEqual(columns['count'].dtype, np.int64)
+        self.assertEqual(columns['count'].tolist(), [1, 2, 3])
+        self.assertEqual(columns['ratio'].tolist(), [0.5, 1.5, 2.5])
+        self.assertEqual(columns['flag'].tolist(), [True, False, True])
+        self.assertEqual(columns['note'].tolist(), ['a', 'b', 'c'])
+        self.assertEqual(columns['name'].dtype, np.int32)
+        self.assertEqual(columns.categories['name'][columns['name']].tolist(), ['foo', 'bar', 'foo'])
+
+    def test_missing_values(self):
+        import numpy as np
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.SymbolField(required=False)
+            count = odm.IntegerField(required=False)
+
+            class Meta:
+                ordering = 'id'
+                register = False
+
+        AModel.objects.new(name='foo', count=1)
+        AModel.objects.new()
+
+        columns = AModel.objects.columns('name', 'count')
+        self.assertEqual(columns['name'].tolist(), [0, -1])
+        self.assertEqual(columns['count'].dtype, np.float64)
+        self.assertEqual(columns['count'][0], 1)
+        self.assertTrue(np.isnan(columns['count'][1]))
+
+    def test_large_integers(self):
+        import numpy as np
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            count = odm.IntegerField()
+
+            class Meta:
+                ordering = 'id'
+                register = False
+
+        AModel.objects.new(count=2 ** 53 + 1)
+        AModel.objects.new(count=-2 ** 62 - 1)
+
+        columns = AModel.objects.columns('count', chunk_size=1)
+        self.assertEqual(columns['count'].dtype, np.int64)
+        self.assertEqual(columns['count'].tolist(), [2 ** 53 + 1, -2 ** 62 - 1])
+
+    def test_empty(self):
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            count = odm.IntegerField()
+
+            class Meta:
+                register = False
+
+        columns = AModel.objects.filter(count=1).columns('count')
+        self.assertEqual(len(columns['count']), 0)
@@ -0,0 +1,133 @@
+from .testcase import BaseTestCase
+
+
+class CountersTestCase(BaseTestCase):
+    def test_incr(self):
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+            count = odm.IntegerField()
+            rate = odm.FloatField()
+
+            class Meta:
+                register = False
+
+        obj = AModel.objects.new(name='foo', count=1, rate=0.5)
+
+        self.assertEqual(AModel.objects.incr(obj.id, 'count'), 2)
+        self.assertEqual(AModel.objects.incr(obj.id, 'count', 10), 12)
+        self.assertEqual(AModel.objects.incr(obj, 'count', -2), 10)
+        self.assertEqual(obj.count, 10)
+        self.assertEqual(AModel.objects.incr(obj.id, 'rate', 1.25), 1.75)
+        self.assertEqual(AModel.objects.get(id=obj.id).count, 10)
+
+        # index follows the value
+        self.assertEqual(AModel.objects.filter(count=1).count(), 0)
+        self.assertEqual(AModel.objects.filter(count=10).count(), 1)
+
+        with self.assertRaises(AModel.DoesNotExist):
+            AModel.objects.incr(obj.id + 1, 'count')
+
+    def test_field(self):
+        from stdnet import odm, FieldError
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+
+            class Meta:
+                register = False
+
+        obj = AModel.objects.new(name='foo')
+
+        with self.assertRaises(FieldError):
+            AModel.objects.incr(obj.id, 'name')
+
+    def test_ordering(self):
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+            score = odm.IntegerField()
+
+            class Meta:
+                ordering = '-score'
+                register = False
+
+        objs = [AModel.objects.new(name=str(i), score=i) for i in range(3)]
+
+        AModel.objects.incr(objs[0].id, 'score', 5)
+        self.assertEqual([obj.name for obj in AModel.objects.all()], ['0', '2', '1'])
+        self.assertEqual([obj.name for obj in AModel.objects.filter(name__in=['0', '1'])], ['0', '1'])
+
+    def test_flush_counters(self):
+        from django.db import models as dj_models
+        from djangostdnet import models
+
+        class ADjangoModel(dj_models.Model):
+            name = dj_models.CharField(max_length=255)
+            views = dj_models.IntegerField(default=0)
+
+        class AModel(models.Model):
+            class Meta:
+                django_model = ADjangoModel
+                register = False
+
+        self.create_table_for_model(ADjangoModel)
+
+        objs = [ADjangoModel.objects.create(name=str(i)) for i in range(3)]
+        for _ in range(5):
+            AModel.objects.incr(objs[0].pk, 'views')
+        AModel.objects.incr(objs[1].pk, 'views', 5)
+        AModel.objects.incr(objs[2].pk, 'views')
+
+        # no query per increment
+        self.assertEqual(ADjangoModel.objects.get(pk=objs[0].pk).views, 0)
+
+        self.assertEqual(AModel.objects.flush_counters(), 3)
+        self.assertEqual([ADjangoModel.objects.get(pk=obj.pk).views for obj in objs], [5, 5, 1])
+        self.assertEqual(AModel.objects.get(id=objs[0].pk).views, 5)
+
+        self.assertEqual(AModel.objects.flush_counters(), 0)
+        AModel.objects.incr(objs[2].pk, 'views')
+        self.assertEqual(AModel.objects.flush_counters(), 1)
+        self.assertEqual(ADjangoModel.objects.get(pk=objs[2].pk).views, 2)
+
+    def test_save_before_flush(self):
+        from django.db import models as dj_models
+        from djangostdnet import models
+
+        class ADjangoModel(dj_models.Model):
+            name = dj_models.CharField(max_length=255)
+            views = dj_models.IntegerField(default=0)
+
+        class AModel(models.Model):
+            class Meta:
+                django_model = ADjangoModel
+                register = False
+
+        self.create_table_for_model(ADjangoModel)
+
+        objs = [ADjangoModel.objects.create(name=str(i)) for i in range(2)]
+        for _ in range(5):
+            AModel.objects.incr(objs[0].pk, 'views')
+        AModel.objects.incr(objs[1].pk, 'views', 3)
+
+        # saved with the value before the increments, which are not written back yet
+        objs[0].name = 'renamed'
+        objs[0].save()
+        self.assertEqual(AModel.objects.get(id=objs[0].pk).name, 'renamed')
+        self.assertEqual(AModel.objects.get(id=objs[0].pk).views, 5)
+        AModel.objects.session().sync_django_objects(AModel.objects, ADjangoModel.objects.filter(pk=objs[1].pk))
+        self.assertEqual(AModel.objects.get(id=objs[1].pk).views, 3)
+
+        self.assertEqual(AModel.objects.flush_counters(), 2)
+        self.assertEqual([ADjangoModel.objects.get(pk=obj.pk).views for obj in objs], [5, 3])
+        self.assertEqual([AModel.objects.get(id=obj.pk).views for obj in objs], [5, 3])
+
+        objs[0].views = 0
+        objs[0].save()
+        self.assertEqual(AModel.objects.get(id=objs[0].pk).views, 0)
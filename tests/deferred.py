@@ -0,0 +1,114 @@
+from .testcase import BaseTestCase
+
+
+class DeferredTestCase(BaseTestCase):
+    def _count_pipeline_execution(self):
+        import mock
+        from stdnet.backends.redisb.client import Pipeline
+
+        calls = []
+        original_execute = Pipeline.execute
+
+        def execute(pipe, *args, **kwargs):
+            calls.append(pipe)
+            return original_execute(pipe, *args, **kwargs)
+
+        return calls, mock.patch.object(Pipeline, 'execute', execute)
+
+    def test_resolve_together(self):
+        from stdnet import odm
+        from djangostdnet import models
+        from djangostdnet.deferred import DeferredBlock
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+
+            class Meta:
+                register = False
+
+        class BModel(models.Model):
+            group = odm.SymbolField()
+
+            class Meta:
+                register = False
+
+        obj1 = AModel.objects.new(name='foo')
+        AModel.objects.new(name='bar')
+        BModel.objects.new(group='g1')
+        BModel.objects.new(group='g1')
+        BModel.objects.new(group='g2')
+
+        calls, patch = self._count_pipeline_execution()
+        with patch:
+            with DeferredBlock():
+                a = AModel.objects.deferred.get(id=obj1.id)
+                count = BModel.objects.deferred.count(group='g1')
+                bs = BModel.objects.deferred.filter(group='g2')
+                all_a = AModel.objects.deferred.all()
+            self.assertEqual(calls, [])
+
+            self.assertEqual(a.value, obj1)
+            self.assertEqual(count.value, 2)
+            self.assertEqual([b.group for b in bs.value], ['g2'])
+            self.assertEqual(sorted(obj.name for obj in all_a.value), ['bar', 'foo'])
+        self.assertEqual(len(calls), 1, "Must be resolved in a pipeline")
+
+    def test_does_not_exist(self):
+        from stdnet import odm
+        from djangostdnet import models
+        from djangostdnet.deferred import DeferredBlock
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+
+            class Meta:
+                register = False
+
+        obj = AModel.objects.new(name='foo')
+
+        with DeferredBlock():
+            missing = AModel.objects.deferred.get(id=obj.id + 1)
+            empty = AModel.objects.deferred.filter(name__in=[])
+            found = AModel.objects.deferred.get(name='foo')
+
+        with self.assertRaises(AModel.DoesNotExist):
+            missing.value
+        self.assertEqual(empty.value, [])
+        self.assertEqual(found.value, obj)
+
+    def test_standalone(self):
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+
+            class Meta:
+                register = False
+
+        obj = AModel.objects.new(name='foo')
+        a = AModel.objects.deferred.get(id=obj.id)
+        self.assertEqual(a.value.name, 'foo')
+
+    def test_ttl(self):
+        from freezegun import freeze_time
+        from stdnet import odm
+        from djangostdnet import models, ttl as ttl_mod
+        from djangostdnet.deferred import DeferredBlock
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+            ttl = ttl_mod.TTLField()
+
+            manager_class = ttl_mod.TTLManager
+
+            class Meta:
+                register = False
+
+        AModel.objects.new(name='foo', ttl=100)
+        with freeze_time('1970-01-01'):
+            AModel.objects.new(name='bar', ttl=100)
+
+        with DeferredBlock():
+            all_a = AModel.objects.deferred.all()
+        self.assertEqual([obj.name for obj in all_a.value], ['foo'])
@@ -0,0 +1,69 @@
+from .testcase import BaseTestCase
+
+
+class BulkDeleteTestCase(BaseTestCase):
+    def _make_models(self):
+        from django.db import models as dj_models
+        from djangostdnet import models
+
+        class ADjangoModel(dj_models.Model):
+            name = dj_models.CharField(max_length=255)
+            status = dj_models.CharField(max_length=255, db_index=True)
+
+        class AModel(models.Model):
+            class Meta:
+                django_model = ADjangoModel
+                register = False
+
+        self.create_table_for_model(ADjangoModel)
+        return ADjangoModel, AModel
+
+    def test_bulk_delete(self):
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            status = odm.SymbolField()
+
+            class Meta:
+                register = False
+
+        for i in range(10):
+            AModel.objects.new(status='stale' if i < 7 else 'fresh')
+
+        self.assertEqual(AModel.objects.filter(status='stale').bulk_delete(chunk_size=3), 7)
+        self.assertEqual(AModel.objects.filter(status='stale').count(), 0)
+        self.assertEqual(AModel.objects.query().count(), 3)
+        self.assertEqual(AModel.objects.bulk_delete(chunk_size=2), 3)
+        self.assertEqual(AModel.objects.query().count(), 0)
+
+    def test_from_stdnet(self):
+        import mock
+        ADjangoModel, AModel = self._make_models()
+
+        for i in range(5):
+            ADjangoModel.objects.create(name=str(i), status='stale' if i < 3 else 'fresh')
+
+        with mock.patch('djangostdnet.session.Session.delete_from_django_object') as echo:
+            self.assertEqual(AModel.objects.filter(status='stale').bulk_delete(chunk_size=2), 3)
+        self.assertFalse(echo.called, "Must not echo back per row")
+        self.assertEqual(sorted(ADjangoModel.objects.values_list('name', flat=True)), ['3', '4'])
+
+    def test_from_django(self):
+        from djangostdnet.models import delete_django_queryset
+        ADjangoModel, AModel = self._make_models()
+
+        for i in range(5):
+            ADjangoModel.objects.create(name=str(i), status='stale' if i < 3 else 'fresh')
+
+        self.assertEqual(delete_django_queryset(ADjangoModel.objects.filter(status='stale'), chunk_size=2), 3)
+        self.assertEqual(ADjangoModel.objects.count(), 2)
+        self.assertEqual(AModel.objects.filter(status='stale').count(), 0)
+        self.assertEqual(AModel.objects.query().count(), 2)
+
+    def test_delete_django_object(self):
+        ADjangoModel, AModel = self._make_models()
+
+        obj = ADjangoModel.objects.create(name='foo', status='stale')
+        obj.delete()
+        self.assertEqual(AModel.objects.query().count(), 0)
@@ -0,0 +1,42 @@
+from .testcase import BaseTestCase
+
+
+class FacetsTestCase(BaseTestCase):
+    def test_facets(self):
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            color = odm.SymbolField()
+            size = odm.IntegerField(index=True)
+            name = odm.CharField()
+
+            class Meta:
+                register = False
+
+        AModel.objects.new(color='red', size=1, name='a')
+        AModel.objects.new(color='red', size=2, name='b')
+        AModel.objects.new(color='blue', size=2, name='c')
+
+        self.assertEqual(AModel.objects.facets('color', 'size'), {
+            'color': {'red': 2, 'blue': 1},
+            'size': {1: 1, 2: 2},
+        })
+        self.assertEqual(AModel.objects.filter(size=2).facets('color'), {
+            'color': {'red': 1, 'blue': 1},
+        })
+        self.assertEqual(AModel.objects.filter(color='green').facets('size'), {'size': {}})
+        self.assertEqual(AModel.objects.filter(color__in=[]).facets('size'), {'size': {}})
+
+    def test_not_indexed(self):
+        from stdnet import odm, QuerySetError
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.CharField()
+
+            class Meta:
+                register = False
+
+        with self.assertRaises(QuerySetError):
+            AModel.objects.facets('name')
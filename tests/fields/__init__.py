@@ -3,3 +3,4 @@ from .foreign_key_field import *  # noqa
 from .image_field import *  # noqa
 from .one_to_one_field import *  # noqa
 from .many_to_many_field import *  # noqa
+from .compressed_text_field import *  # noqa
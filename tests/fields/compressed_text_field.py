@@ -0,0 +1,61 @@
+from ..testcase import BaseTestCase
+
+
+class CompressedTextFieldTestCase(BaseTestCase):
+    def test_compressed(self):
+        from djangostdnet import models
+        from djangostdnet.fields import CompressedText
+
+        class AModel(models.Model):
+            body = models.CompressedTextField(compress_threshold=100)
+
+            class Meta:
+                register = False
+
+        long_text = u'あいうえお' * 100
+        obj = AModel.objects.new(body=long_text)
+        backend = AModel.objects.backend
+        stored = backend.client.hget(backend.basekey(AModel._meta, 'obj', obj.id), 'body')
+        self.assertEqual(stored[:1], b'\xff')
+        self.assertTrue(len(stored) < len(long_text.encode('utf-8')) / 5)
+
+        obj = AModel.objects.get(id=obj.id)
+        # decompressed on access
+        self.assertTrue(isinstance(obj.__dict__['body'], CompressedText))
+        self.assertEqual(obj.body, long_text)
+        self.assertEqual(list(AModel.objects.values_list('body', flat=True)), [long_text])
+        self.assertEqual(obj.tojson()['body'], long_text)
+
+        # saved as is without access
+        obj = AModel.objects.get(id=obj.id)
+        obj.save()
+        self.assertEqual(AModel.objects.get(id=obj.id).body, long_text)
+
+    def test_small(self):
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            body = models.CompressedTextField(compress_threshold=100)
+
+            class Meta:
+                register = False
+
+        obj = AModel.objects.new(body=u'short')
+        backend = AModel.objects.backend
+        self.assertEqual(backend.client.hget(backend.basekey(AModel._meta, 'obj', obj.id), 'body'), b'short')
+        self.assertEqual(AModel.objects.get(id=obj.id).body, u'short')
+
+    def test_deferred(self):
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+            body = models.CompressedTextField(compress_threshold=10)
+
+            class Meta:
+                register = False
+
+        AModel.objects.new(name='a', body=u'a' * 100)
+        obj = AModel.objects.defer('body').get(name='a')
+        self.assertEqual(obj.body, u'a' * 100)
@@ -71,6 +71,7 @@ class QuerySetDeletionTestCase(BaseTestCase):
     This is because of https://github.com/lsbardel/python-stdnet/pull/82
     """
     def test_it(self):
+        from djangostdnet import mapper
         from djangostdnet import models
         from stdnet import odm
 
@@ -86,7 +87,7 @@ class QuerySetDeletionTestCase(BaseTestCase):
             class Meta:
                 register = False
 
-        models = odm.Router(models.mapper._default_backend)
+        models = odm.Router(mapper.getdb(models.mapper._default_backend))
         models.register(ParentModel)
         models.register(ChildModel)
 
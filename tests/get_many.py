@@ -0,0 +1,94 @@
+from .testcase import BaseTestCase
+
+
+class GetManyTestCase(BaseTestCase):
+    def test_get_many(self):
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+
+            class Meta:
+                register = False
+
+        obj1 = AModel.objects.new(name='foo')
+        obj2 = AModel.objects.new(name='bar')
+
+        objs = AModel.objects.get_many([obj2.id, obj1.id + obj2.id, obj1.id])
+        self.assertEqual(objs, [obj2, None, obj1])
+        self.assertEqual(objs[0].name, 'bar')
+        self.assertEqual(objs[2].name, 'foo')
+        self.assertEqual(AModel.objects.get_many([]), [])
+
+    def test_get_many_ordered_by_zero(self):
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            rank = odm.IntegerField()
+
+            class Meta:
+                ordering = 'rank'
+                register = False
+
+        obj1 = AModel.objects.new(rank=0)
+        obj2 = AModel.objects.new(rank=1)
+
+        self.assertEqual(AModel.objects.get_many([obj1.id, obj2.id]), [obj1, obj2])
+
+    def test_get_many_in_a_pipeline(self):
+        import mock
+        from stdnet import odm
+        from stdnet.backends.redisb.client import Pipeline
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+
+            class Meta:
+                register = False
+
+        ids = [AModel.objects.new(name=str(i)).id for i in range(10)]
+
+        calls = []
+        original_execute = Pipeline.execute
+
+        def execute(pipe, *args, **kwargs):
+            calls.append(pipe)
+            return original_execute(pipe, *args, **kwargs)
+
+        with mock.patch.object(Pipeline, 'execute', execute):
+            objs = AModel.objects.get_many(ids)
+        self.assertEqual([obj.name for obj in objs], [str(i) for i in range(10)])
+        self.assertEqual(len(calls), 1)
+
+    def test_get_many_fallback(self):
+        from django.db import models as dj_models
+        from stdnet import odm
+        from djangostdnet import models
+
+        class ADjangoModel(dj_models.Model):
+            name = dj_models.CharField(max_length=255)
+
+        class AModel(models.Model):
+            name = odm.CharField()
+
+            class Meta:
+                django_model = ADjangoModel
+                register = False
+
+        self.create_table_for_model(ADjangoModel)
+
+        obj1 = ADjangoModel.objects.create(name='obj1')
+        obj2 = ADjangoModel.objects.create(name='obj2')
+
+        # simulate lacking of objects as redis-out
+        AModel.objects.backend.flush()
+
+        self.assertEqual(AModel.objects.get_many([obj1.pk, obj2.pk]), [None, None])
+
+        objs = AModel.objects.get_many([obj2.pk, obj1.pk + obj2.pk, obj1.pk], fallback=True)
+        self.assertEqual([obj and obj.name for obj in objs], ['obj2', None, 'obj1'])
+        self.assertEqual(AModel.objects.get(id=obj1.pk).name, 'obj1')
+        self.assertEqual(AModel.objects.get(id=obj2.pk).name, 'obj2')
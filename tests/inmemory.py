@@ -0,0 +1,78 @@
+from .testcase import BaseTestCase
+
+
+class InMemoryBackendTestCase(BaseTestCase):
+    def tearDown(self):
+        from djangostdnet import inmemory
+
+        inmemory.drop_server('inmemory-test')
+        inmemory.drop_server('inmemory-other')
+        super(InMemoryBackendTestCase, self).tearDown()
+
+    def test_model(self):
+        from stdnet import CommitException, odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+            code = odm.SymbolField(unique=True)
+            value = odm.IntegerField(default=0)
+
+            class Meta:
+                register = False
+                backend = 'memory://inmemory-test?db=0&namespace=app:'
+
+        self.assertEqual(AModel.objects.backend.connection_string, 'memory://inmemory-test?db=0&namespace=app%3A')
+        for i in range(5):
+            AModel.objects.new(name='odd' if i % 2 else 'even', code=str(i), value=i)
+
+        self.assertEqual(AModel.objects.query().count(), 5)
+        self.assertEqual(sorted(obj.value for obj in AModel.objects.filter(name='odd')), [1, 3])
+        self.assertEqual(AModel.objects.get(code='3').value, 3)
+        with self.assertRaises(CommitException):
+            AModel.objects.new(name='odd', code='1')
+
+        obj = AModel.objects.get(code='2')
+        obj.value = 20
+        obj.save()
+        self.assertEqual(AModel.objects.get(id=obj.id).value, 20)
+
+        AModel.objects.filter(name='even').delete()
+        self.assertEqual(sorted(obj.code for obj in AModel.objects.query()), ['1', '3'])
+
+        backend = AModel.objects.backend
+        self.assertTrue(all(key.startswith(b'app:') for key in backend.client.keys('*')))
+        backend.flush()
+        self.assertEqual(backend.client.keys('*'), [])
+
+    def test_servers(self):
+        from djangostdnet import mapper
+
+        client = mapper.getdb('memory://inmemory-test').client
+        client.set('key', 'value')
+        client.expire('key', 100)
+        self.assertEqual(mapper.getdb('memory://inmemory-test').client.get('key'), b'value')
+        self.assertTrue(0 < client.ttl('key') <= 100)
+        self.assertIsNone(mapper.getdb('memory://inmemory-other').client.get('key'))
+        self.assertIsNone(mapper.getdb('memory://inmemory-test?db=1').client.get('key'))
+
+    def test_script_error(self):
+        from redis.exceptions import ResponseError
+        from djangostdnet import mapper
+
+        client = mapper.getdb('memory://inmemory-test').client
+        client.set('key', 'value')
+        with self.assertRaises(ResponseError):
+            client.eval("return redis.call('hget', KEYS[1], 'field')", 1, 'key')
+        self.assertEqual(client.eval("return redis.pcall('hget', KEYS[1], 'field')['err'] ~= nil", 1, 'key'), 1)
+
+    def test_set_order(self):
+        from djangostdnet import mapper
+
+        client = mapper.getdb('memory://inmemory-test').client
+        # small sets of integers are intsets iterated in order on redis
+        client.sadd('ids', 10, 2, -1, 33)
+        self.assertEqual(client.eval("return redis.call('smembers', KEYS[1])", 1, 'ids'), [b'-1', b'2', b'10', b'33'])
+        client.sadd('other', 33, 2)
+        self.assertEqual(client.eval("return redis.call('sinter', KEYS[1], KEYS[2])", 2, 'ids', 'other'),
+                         [b'2', b'33'])
@@ -0,0 +1,113 @@
+from .testcase import BaseTestCase
+
+
+class IteratorTestCase(BaseTestCase):
+    def test_unordered(self):
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+            group = odm.SymbolField()
+
+            class Meta:
+                register = False
+
+        for i in range(25):
+            AModel.objects.new(name=str(i), group='even' if i % 2 == 0 else 'odd')
+
+        names = [obj.name for obj in AModel.objects.iterator(chunk_size=4)]
+        self.assertEqual(sorted(names), sorted(str(i) for i in range(25)))
+
+        names = [obj.name for obj in AModel.objects.filter(group='odd').iterator(chunk_size=4)]
+        self.assertEqual(sorted(names), sorted(str(i) for i in range(1, 25, 2)))
+
+        self.assertEqual(list(AModel.objects.filter(group='none').iterator()), [])
+        self.assertEqual(list(AModel.objects.filter(group__in=[]).iterator()), [])
+
+    def test_ordered(self):
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+            value = odm.IntegerField()
+
+            class Meta:
+                ordering = '-id'
+                register = False
+
+        for i in range(10):
+            AModel.objects.new(name=str(i), value=i % 3)
+
+        names = [obj.name for obj in AModel.objects.iterator(chunk_size=3)]
+        self.assertEqual(names, [str(i) for i in reversed(range(10))])
+
+        values = [obj.value for obj in AModel.objects.query().sort_by('value').iterator(chunk_size=3)]
+        self.assertEqual(values, sorted(i % 3 for i in range(10)))
+
+    def test_sorted_snapshot(self):
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            value = odm.IntegerField()
+
+            class Meta:
+                register = False
+
+        for i in range(6):
+            AModel.objects.new(value=i)
+
+        iterator = AModel.objects.query().sort_by('value').iterator(chunk_size=2)
+        values = [next(iterator).value for _ in range(2)]
+        # sorted before the rest, which would shift offsets of the following chunks
+        AModel.objects.new(value=-1)
+        values.extend(obj.value for obj in iterator)
+        self.assertEqual(values, list(range(6)))
+
+    def test_load_only(self):
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+            value = odm.IntegerField()
+
+            class Meta:
+                register = False
+
+        for i in range(5):
+            AModel.objects.new(name=str(i), value=i)
+
+        objs = list(AModel.objects.query().load_only('name').iterator(chunk_size=2))
+        self.assertEqual(sorted(obj.name for obj in objs), [str(i) for i in range(5)])
+        self.assertFalse(any('value' in obj.__dict__ for obj in objs))
+        # loaded on first access
+        self.assertEqual(sorted(obj.value for obj in objs), list(range(5)))
+
+        ids = [obj.id for obj in AModel.objects.query().load_only('id').iterator(chunk_size=2)]
+        self.assertEqual(sorted(ids), sorted(obj.id for obj in AModel.objects.all()))
+
+    def test_ttl(self):
+        from freezegun import freeze_time
+        from stdnet import odm
+        from djangostdnet import models, ttl as ttl_mod
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+            ttl = ttl_mod.TTLField()
+
+            manager_class = ttl_mod.TTLManager
+
+            class Meta:
+                register = False
+
+        for i in range(5):
+            AModel.objects.new(name='alive%d' % i, ttl=100)
+            with freeze_time('1970-01-01'):
+                AModel.objects.new(name='expired%d' % i, ttl=100)
+
+        names = [obj.name for obj in AModel.objects.iterator(chunk_size=3)]
+        self.assertEqual(sorted(names), ['alive%d' % i for i in range(5)])
+        self.assertEqual(AModel.objects.query().count(), 5, "Expired items must be purged")
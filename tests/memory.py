@@ -0,0 +1,47 @@
+from .testcase import BaseTestCase
+
+
+class MemoryReportTestCase(BaseTestCase):
+    def test_memory_report(self):
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.SymbolField(unique=True)
+            status = odm.SymbolField()
+            body = odm.CharField()
+
+            class Meta:
+                register = False
+
+        for i in range(20):
+            AModel.objects.new(name=str(i), status='new' if i % 2 else 'old', body='x' * 100)
+
+        report = AModel.objects.memory_report(samples=5)
+        self.assertEqual(report['objects'], 20)
+        self.assertTrue(report['bytes'] > 20 * 100)
+        self.assertEqual(report['attributes']['body'], 20 * (len('body') + 100))
+        self.assertEqual(report['indices']['status']['keys'], 2)
+        self.assertTrue(report['indices']['status']['bytes'] > 0)
+        self.assertEqual(report['indices']['name']['keys'], 1)
+        self.assertIn(AModel.objects.backend.basekey(AModel._meta, 'id'), report['keys'])
+        self.assertIsNone(report['expired'])
+
+    def test_expired(self):
+        from stdnet import odm
+        from djangostdnet import models
+        from djangostdnet.ttl import TTLField, TTLManager
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+            ttl = TTLField()
+
+            manager_class = TTLManager
+
+            class Meta:
+                register = False
+
+        for i in range(10):
+            AModel.objects.new(name=str(i), ttl=-1 if i < 4 else 100)
+
+        self.assertEqual(AModel.objects.memory_report()['expired'], 4)
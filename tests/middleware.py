@@ -0,0 +1,204 @@
+from .testcase import BaseTestCase
+
+
+class SessionMiddlewareTestCase(BaseTestCase):
+    def _make_model(self):
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+
+            class Meta:
+                register = False
+
+        return AModel
+
+    def test_commit_at_response(self):
+        from django.http import HttpResponse
+        from django.test.client import RequestFactory
+        from djangostdnet.middleware import SessionMiddleware
+
+        AModel = self._make_model()
+
+        middleware = SessionMiddleware()
+        request = RequestFactory().get('/')
+        middleware.process_request(request)
+
+        obj1 = AModel.objects.new(name='foo')
+        obj2 = AModel.objects.new(name='bar')
+        self.assertEqual(len(AModel.objects.all()), 0,
+                         "Must not be committed until response")
+
+        middleware.process_response(request, HttpResponse())
+        self.assertEqual(len(AModel.objects.all()), 2)
+        self.assertEqual(AModel.objects.get(id=obj1.id).name, 'foo')
+        self.assertEqual(AModel.objects.get(id=obj2.id).name, 'bar')
+
+    def test_rollback_on_exception(self):
+        from django.http import HttpResponse
+        from django.test.client import RequestFactory
+        from djangostdnet.middleware import SessionMiddleware
+
+        AModel = self._make_model()
+
+        middleware = SessionMiddleware()
+        request = RequestFactory().get('/')
+        middleware.process_request(request)
+
+        AModel.objects.new(name='foo')
+        middleware.process_exception(request, ValueError())
+        middleware.process_response(request, HttpResponse())
+        self.assertEqual(len(AModel.objects.all()), 0)
+
+    def test_flush(self):
+        from django.http import HttpResponse
+        from django.test.client import RequestFactory
+        from djangostdnet.middleware import SessionMiddleware
+        from djangostdnet.session import flush_bound_session
+
+        AModel = self._make_model()
+
+        middleware = SessionMiddleware()
+        request = RequestFactory().get('/')
+        middleware.process_request(request)
+
+        AModel.objects.new(name='foo')
+        flush_bound_session()
+        self.assertEqual(len(AModel.objects.all()), 1)
+
+        AModel.objects.new(name='bar')
+        self.assertEqual(len(AModel.objects.all()), 1)
+        middleware.process_response(request, HttpResponse())
+        self.assertEqual(len(AModel.objects.all()), 2)
+
+    def test_keep_pending_changes_over_query(self):
+        from django.http import HttpResponse
+        from django.test.client import RequestFactory
+        from djangostdnet.middleware import SessionMiddleware
+
+        AModel = self._make_model()
+        obj = AModel.objects.new(name='foo')
+
+        middleware = SessionMiddleware()
+        request = RequestFactory().get('/')
+        middleware.process_request(request)
+
+        obj = AModel.objects.get(id=obj.id)
+        obj.name = 'bar'
+        obj.save()
+        # load the same object again while the change is pending
+        self.assertEqual(AModel.objects.get(id=obj.id).name, 'foo')
+
+        middleware.process_response(request, HttpResponse())
+        self.assertEqual(AModel.objects.get(id=obj.id).name, 'bar')
+
+    def test_django_model(self):
+        from django.db import models as dj_models
+        from django.http import HttpResponse
+        from django.test.client import RequestFactory
+        from djangostdnet import models
+        from djangostdnet.middleware import SessionMiddleware
+
+        class ADjangoModel(dj_models.Model):
+            name = dj_models.CharField(max_length=255)
+
+        class AModel(models.Model):
+            class Meta:
+                django_model = ADjangoModel
+                register = False
+
+        self.finish_defining_models()
+        self.create_table_for_model(ADjangoModel)
+
+        middleware = SessionMiddleware()
+        request = RequestFactory().get('/')
+        middleware.process_request(request)
+
+        obj = AModel.objects.new(name='foo')
+        self.assertEqual(obj.name, 'foo')
+        ADjangoModel.objects.create(name='bar')
+        self.assertEqual(len(AModel.objects.all()), 0)
+
+        middleware.process_response(request, HttpResponse())
+        self.assertEqual(sorted(obj.name for obj in AModel.objects.all()),
+                         ['bar', 'foo'])
+
+    def test_rollback_django_model_on_exception(self):
+        from django.db import models as dj_models
+        from django.http import HttpResponse
+        from django.test.client import RequestFactory
+        from djangostdnet import models
+        from djangostdnet.middleware import SessionMiddleware
+
+        class ADjangoModel(dj_models.Model):
+            name = dj_models.CharField(max_length=255)
+
+        class AModel(models.Model):
+            class Meta:
+                django_model = ADjangoModel
+                register = False
+
+        self.finish_defining_models()
+        self.create_table_for_model(ADjangoModel)
+
+        middleware = SessionMiddleware()
+        request = RequestFactory().get('/')
+        middleware.process_request(request)
+
+        AModel.objects.new(name='foo')
+        ADjangoModel.objects.create(name='bar')
+        self.assertEqual(ADjangoModel.objects.count(), 2)
+
+        middleware.process_exception(request, ValueError())
+        middleware.process_response(request, HttpResponse())
+        self.assertEqual(ADjangoModel.objects.count(), 0)
+        self.assertEqual(len(AModel.objects.all()), 0)
+
+    def test_discard_on_database_commit_failure(self):
+        import mock
+        from django.db import DatabaseError, models as dj_models
+        from django.http import HttpResponse
+        from django.test.client import RequestFactory
+        from stdnet import odm
+        from djangostdnet import models
+        from djangostdnet.middleware import SessionMiddleware
+
+        class ADjangoModel(dj_models.Model):
+            name = dj_models.CharField(max_length=255)
+
+        class AModel(models.Model):
+            class Meta:
+                django_model = ADjangoModel
+                register = False
+
+        class BModel(models.Model):
+            name = odm.SymbolField()
+
+            class Meta:
+                register = False
+
+        self.finish_defining_models()
+        self.create_table_for_model(ADjangoModel)
+
+        middleware = SessionMiddleware()
+        request = RequestFactory().get('/')
+        middleware.process_request(request)
+
+        AModel.objects.new(name='foo')
+        BModel.objects.new(name='bar')
+
+        atomic = request.stdnet_atomic
+        exit_atomic = atomic.__exit__
+
+        def fail_to_commit(*exc_info):
+            # rolled back as a failed commit
+            exit_atomic(DatabaseError, DatabaseError(), None)
+            raise DatabaseError('commit failed')
+
+        with mock.patch.object(atomic, '__exit__', side_effect=fail_to_commit):
+            with self.assertRaises(DatabaseError):
+                middleware.process_response(request, HttpResponse())
+        self.assertEqual(ADjangoModel.objects.count(), 0)
+        self.assertEqual(len(AModel.objects.all()), 0)
+        self.assertEqual(len(BModel.objects.all()), 0)
@@ -0,0 +1,88 @@
+from .testcase import BaseTestCase
+
+
+class PageTestCase(BaseTestCase):
+    def test_page(self):
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+
+            class Meta:
+                ordering = 'id'
+                register = False
+
+        for i in range(7):
+            AModel.objects.new(name=str(i))
+
+        page = AModel.objects.page(count=3)
+        self.assertEqual([obj.name for obj in page], ['0', '1', '2'])
+        page = AModel.objects.page(page.cursor, count=3)
+        self.assertEqual([obj.name for obj in page], ['3', '4', '5'])
+        page = AModel.objects.page(page.cursor, count=3)
+        self.assertEqual([obj.name for obj in page], ['6'])
+        self.assertIsNone(page.cursor)
+
+    def test_stable_under_writes(self):
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+
+            class Meta:
+                ordering = '-id'
+                register = False
+
+        objs = [AModel.objects.new(name=str(i)) for i in range(6)]
+
+        page = AModel.objects.page(count=2)
+        self.assertEqual([obj.name for obj in page], ['5', '4'])
+
+        # neither a new one nor removal of the last one shifts the next page
+        AModel.objects.new(name='6')
+        objs[4].delete()
+
+        page = AModel.objects.page(page.cursor, count=2)
+        self.assertEqual([obj.name for obj in page], ['3', '2'])
+
+    def test_ties_and_filter(self):
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+            group = odm.SymbolField()
+            rank = odm.IntegerField()
+
+            class Meta:
+                ordering = 'rank'
+                register = False
+
+        for i in range(9):
+            AModel.objects.new(name=str(i), group='a' if i % 3 else 'b', rank=i // 4)
+
+        names = []
+        cursor = None
+        while True:
+            page = AModel.objects.filter(group='a').page(cursor, count=2)
+            names.extend(obj.name for obj in page)
+            cursor = page.cursor
+            if cursor is None:
+                break
+        self.assertEqual(sorted(names), ['1', '2', '4', '5', '7', '8'])
+        self.assertEqual(len(set(names)), len(names), "Must not repeat an instance")
+
+    def test_unsupported(self):
+        from stdnet import odm, QuerySetError
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+
+            class Meta:
+                register = False
+
+        with self.assertRaises(QuerySetError):
+            AModel.objects.page()
@@ -0,0 +1,91 @@
+from .testcase import BaseTestCase
+
+
+class PrefixIndexTestCase(BaseTestCase):
+    def _make_model(self):
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+            status = odm.SymbolField()
+
+            class Meta:
+                prefix_indexes = ('name',)
+                register = False
+
+        return AModel
+
+    def test_startswith(self):
+        AModel = self._make_model()
+
+        for name in ['apple', 'apricot', 'banana', 'application', 'ap']:
+            AModel.objects.new(name=name, status='new' if name != 'apricot' else 'old')
+
+        self.assertEqual(sorted(obj.name for obj in AModel.objects.filter(name__startswith='ap')),
+                         ['ap', 'apple', 'application', 'apricot'])
+        self.assertEqual(sorted(obj.name for obj in AModel.objects.filter(name__startswith='appl')),
+                         ['apple', 'application'])
+        self.assertEqual(AModel.objects.filter(name__startswith='c').count(), 0)
+        self.assertEqual(sorted(obj.name for obj in AModel.objects.filter(name__startswith='ap', status='new')),
+                         ['ap', 'apple', 'application'])
+
+        self.assertEqual([obj.name for obj in AModel.objects.autocomplete('name', 'ap', 3)],
+                         ['ap', 'apple', 'application'])
+
+    def test_maintenance(self):
+        AModel = self._make_model()
+
+        obj = AModel.objects.new(name='apple', status='new')
+        obj.name = 'banana'
+        obj.save()
+        self.assertEqual(AModel.objects.filter(name__startswith='ap').count(), 0)
+        self.assertEqual(AModel.objects.filter(name__startswith='ba').count(), 1)
+
+        AModel.objects.filter(status='new').update(name='cherry')
+        self.assertEqual(AModel.objects.filter(name__startswith='ba').count(), 0)
+        self.assertEqual(AModel.objects.filter(name__startswith='ch').count(), 1)
+
+        obj.delete()
+        self.assertEqual(AModel.objects.filter(name__startswith='ch').count(), 0)
+
+    def test_field(self):
+        from stdnet import FieldError
+        AModel = self._make_model()
+
+        with self.assertRaises(FieldError):
+            AModel.objects.autocomplete('status', 'a')
+
+    def test_text_fields_only(self):
+        from stdnet import odm, ImproperlyConfigured
+        from djangostdnet import models
+
+        for field_class in (odm.ByteField, odm.PickleObjectField, odm.JSONField, models.CompressedTextField):
+            with self.assertRaises(ImproperlyConfigured):
+                class AModel(models.Model):
+                    name = field_class()
+
+                    class Meta:
+                        prefix_indexes = ('name',)
+                        register = False
+
+    def test_django_model(self):
+        from django.db import models as dj_models
+        from djangostdnet import models
+
+        class ADjangoModel(dj_models.Model):
+            name = dj_models.CharField(max_length=255)
+
+        class AModel(models.Model):
+            class Meta:
+                django_model = ADjangoModel
+                prefix_indexes = ('name',)
+                register = False
+
+        self.create_table_for_model(ADjangoModel)
+
+        for name in [u'caf\xe9', 'cafeteria', 'cake']:
+            ADjangoModel.objects.create(name=name)
+
+        self.assertEqual([obj.name for obj in AModel.objects.autocomplete('name', 'caf')], ['cafeteria', u'caf\xe9'])
+        self.assertEqual(AModel.objects.filter(name__startswith=u'caf\xe9').count(), 1)
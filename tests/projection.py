@@ -0,0 +1,85 @@
+from .testcase import BaseTestCase
+
+
+class ProjectionTestCase(BaseTestCase):
+    def _make_model(self):
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+            description = odm.CharField()
+            value = odm.IntegerField()
+
+            class Meta:
+                register = False
+
+        return AModel
+
+    def test_load_only(self):
+        AModel = self._make_model()
+        obj = AModel.objects.new(name='foo', description='long text', value=1)
+
+        loaded = AModel.objects.load_only('name').get(id=obj.id)
+        self.assertNotIn('description', loaded.__dict__)
+        self.assertNotIn('value', loaded.__dict__)
+        self.assertEqual(loaded.name, 'foo')
+
+        # rest of fields are loaded on first access
+        self.assertEqual(loaded.description, 'long text')
+        self.assertEqual(loaded.__dict__['value'], 1)
+
+    def test_defer(self):
+        AModel = self._make_model()
+        obj = AModel.objects.new(name='foo', description='long text', value=1)
+
+        loaded = AModel.objects.defer('description').get(id=obj.id)
+        self.assertNotIn('description', loaded.__dict__)
+        self.assertEqual(loaded.value, 1)
+        self.assertEqual(loaded.description, 'long text')
+
+    def test_save_without_loading(self):
+        import mock
+        AModel = self._make_model()
+        obj = AModel.objects.new(name='foo', description='long text', value=1)
+
+        loaded = AModel.objects.load_only('name').get(id=obj.id)
+        loaded.name = 'bar'
+        with mock.patch.object(AModel.objects.__class__, 'load_deferred_fields') as load:
+            loaded.save()
+        self.assertFalse(load.called, "Must not load deferred fields to save")
+
+        obj = AModel.objects.get(id=obj.id)
+        self.assertEqual(obj.name, 'bar')
+        self.assertEqual(obj.description, 'long text')
+        self.assertEqual(obj.value, 1)
+
+    def test_django_model(self):
+        from django.db import models as dj_models
+        from djangostdnet import models
+
+        class ADjangoModel(dj_models.Model):
+            name = dj_models.CharField(max_length=255)
+            description = dj_models.CharField(max_length=1024)
+
+            def display(self):
+                return '%s: %s' % (self.name, self.description)
+
+        class AModel(models.Model):
+            class Meta:
+                django_model = ADjangoModel
+                register = False
+
+        self.create_table_for_model(ADjangoModel)
+
+        dj_obj = ADjangoModel.objects.create(name='foo', description='long text')
+        obj = AModel.objects.load_only('name').get(id=dj_obj.pk)
+        self.assertEqual(obj.display(), 'foo: long text')
+
+    def test_missing_attribute(self):
+        AModel = self._make_model()
+        obj = AModel.objects.new(name='foo', description='long text', value=1)
+
+        loaded = AModel.objects.load_only('name').get(id=obj.id)
+        with self.assertRaises(AttributeError):
+            loaded.nothing
@@ -0,0 +1,113 @@
+from .testcase import BaseTestCase
+
+
+class RangeIndexTestCase(BaseTestCase):
+    def test_range_index(self):
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+            score = odm.FloatField()
+
+            class Meta:
+                range_indexes = ('score',)
+                register = False
+
+        for i in range(10):
+            AModel.objects.new(name=str(i), score=i / 2.0)
+
+        self.assertEqual(sorted(obj.name for obj in AModel.objects.filter(score__gt=3)), ['7', '8', '9'])
+        self.assertEqual(sorted(obj.name for obj in AModel.objects.filter(score__gte=3)), ['6', '7', '8', '9'])
+        self.assertEqual(sorted(obj.name for obj in AModel.objects.filter(score__lt=1)), ['0', '1'])
+        self.assertEqual(sorted(obj.name for obj in AModel.objects.filter(score__le=1)), ['0', '1', '2'])
+        self.assertEqual(sorted(obj.name for obj in AModel.objects.filter(score__range=(1, 2))), ['2', '3', '4'])
+        self.assertEqual([obj.name for obj in AModel.objects.filter(score__gt=1, name__in=['1', '5'])], ['5'])
+        self.assertEqual(AModel.objects.filter(score__gt=100).count(), 0)
+        self.assertEqual([obj.name for obj in AModel.objects.filter(score__range=(1, 3)).sort_by('-score')],
+                         ['6', '5', '4', '3', '2'])
+        self.assertEqual(sorted(obj.name for obj in AModel.objects.filter(score__gte=4).exclude(name='9')), ['8'])
+
+        obj = AModel.objects.get(name='0')
+        obj.score = 100
+        obj.save()
+        self.assertEqual([obj.name for obj in AModel.objects.filter(score__gt=50)], ['0'])
+
+    def test_field(self):
+        from stdnet import odm, FieldError
+        from djangostdnet import models
+
+        with self.assertRaises(FieldError):
+            class AModel(models.Model):
+                name = odm.SymbolField()
+
+                class Meta:
+                    range_indexes = ('name',)
+                    register = False
+
+    def test_django_model(self):
+        from datetime import datetime, timedelta
+        from django.db import models as dj_models
+        from djangostdnet import models
+
+        class ADjangoModel(dj_models.Model):
+            name = dj_models.CharField(max_length=255)
+            priority = dj_models.IntegerField(db_index=True)
+            created = dj_models.DateTimeField(db_index=True)
+            size = dj_models.IntegerField()
+
+        class AModel(models.Model):
+            class Meta:
+                django_model = ADjangoModel
+                register = False
+
+        self.create_table_for_model(ADjangoModel)
+
+        now = datetime(2015, 1, 1)
+        for i in range(5):
+            ADjangoModel.objects.create(name=str(i), priority=i, created=now + timedelta(hours=i), size=i)
+
+        self.assertEqual(sorted(obj.name for obj in AModel.objects.filter(priority__gte=3)), ['3', '4'])
+        self.assertEqual(sorted(obj.name for obj in AModel.objects.filter(
+            created__range=(now + timedelta(hours=1), now + timedelta(hours=2)))), ['1', '2'])
+        self.assertEqual(sorted(obj.name for obj in AModel.objects.filter(created__lt=now + timedelta(hours=1))),
+                         ['0'])
+        self.assertEqual([obj.name for obj in AModel.objects.sorted_view('created').top(2)], ['0', '1'])
+        self.assertEqual(len(AModel._range_indexes), 2)
+
+    def test_backfill(self):
+        from stdnet import odm
+        from django.db import models as dj_models
+        from djangostdnet import models
+        from djangostdnet.sortedviews import view_key
+
+        class ADjangoModel(dj_models.Model):
+            priority = dj_models.IntegerField(db_index=True)
+            size = dj_models.IntegerField()
+
+        class AModel(models.Model):
+            class Meta:
+                django_model = ADjangoModel
+                register = False
+
+        self.assertEqual([field.name for field in AModel._range_indexes], ['priority'])
+
+        class BModel(models.Model):
+            name = odm.SymbolField()
+            score = odm.FloatField()
+
+            class Meta:
+                range_indexes = ('score',)
+                register = False
+
+        for i in range(5):
+            BModel.objects.new(name=str(i), score=i)
+
+        # as objects stored before the range index was added
+        meta = BModel._meta
+        backend = BModel.objects.backend
+        backend.client.delete(view_key(backend, meta, meta.dfields['score']))
+        self.assertEqual(BModel.objects.filter(score__gte=3).count(), 0)
+
+        BModel.objects.rebuild_views()
+        self.assertEqual(sorted(obj.name for obj in BModel.objects.filter(score__gte=3)), ['3', '4'])
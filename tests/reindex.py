@@ -0,0 +1,158 @@
+from .testcase import BaseTestCase
+
+
+class ReindexTestCase(BaseTestCase):
+    def test_reindex(self):
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+            status = odm.SymbolField()
+
+            class Meta:
+                register = False
+
+        for i in range(10):
+            AModel.objects.new(name=str(i), status='new' if i < 6 else 'old')
+
+        # lost and stray index entries
+        backend = AModel.objects.backend
+        client = backend.client
+        client.delete(backend.basekey(AModel._meta, 'idx', 'status', 'new'))
+        client.sadd(backend.basekey(AModel._meta, 'idx', 'status', 'gone'), 1)
+        self.assertEqual(AModel.objects.filter(status='new').count(), 0)
+
+        self.assertEqual(AModel.objects.reindex('status', chunk_size=3), 10)
+        self.assertEqual(AModel.objects.filter(status='new').count(), 6)
+        self.assertEqual(AModel.objects.filter(status='old').count(), 4)
+        self.assertEqual(AModel.objects.filter(status='gone').count(), 0)
+        self.assertEqual(client.keys(backend.basekey(AModel._meta, 'reindex', '*')), [])
+
+        # maintained by commits as well
+        obj = AModel.objects.get(name='0')
+        obj.status = 'old'
+        obj.save()
+        self.assertEqual(AModel.objects.filter(status='old').count(), 5)
+
+    def test_ordering(self):
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+            rank = odm.IntegerField(index=False)
+
+            class Meta:
+                ordering = '-rank'
+                register = False
+
+        for i in range(5):
+            AModel.objects.new(name=str(i), rank=i)
+
+        backend = AModel.objects.backend
+        backend.client.delete(backend.basekey(AModel._meta, 'idx', 'name', '3'))
+
+        AModel.objects.reindex('name', chunk_size=2)
+        self.assertEqual([obj.name for obj in AModel.objects.filter(name__in=['1', '3'])], ['3', '1'])
+
+    def test_writes_while_building(self):
+        import mock
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+            status = odm.SymbolField()
+
+            class Meta:
+                register = False
+
+        for i in range(12):
+            AModel.objects.new(name=str(i), status='s%d' % (i % 4))
+
+        client = AModel.objects.backend.client
+        execute_script = client.execute_script
+        swapped = []
+
+        def build_or_swap(name, keys, *args, **options):
+            result = execute_script(name, keys, *args, **options)
+            if name == 'djangostdnet_reindex_build' and not swapped:
+                swapped.append(False)
+                for obj in AModel.objects.filter(status='s3'):
+                    obj.status = 's9'
+                    obj.save()
+                AModel.objects.new(name='new', status='s1')
+                AModel.objects.filter(name='2').delete()
+            elif name == 'djangostdnet_reindex_swap':
+                # caught up before swapped in
+                swapped.append(sorted(obj.name for obj in AModel.objects.filter(status__in=['s2', 's3', 's9'])))
+            return result
+
+        with mock.patch.object(client, 'execute_script', side_effect=build_or_swap):
+            self.assertEqual(AModel.objects.reindex('status', chunk_size=3), 12)
+
+        self.assertEqual(swapped[-1], ['10', '11', '3', '6', '7'])
+        self.assertEqual(sorted(obj.name for obj in AModel.objects.filter(status='s1')), ['1', '5', '9', 'new'])
+        self.assertEqual(AModel.objects.filter(status='s3').count(), 0)
+        self.assertEqual(sorted(obj.name for obj in AModel.objects.filter(status='s9')), ['11', '3', '7'])
+
+    def test_field(self):
+        from stdnet import odm, FieldError
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            code = odm.SymbolField(unique=True)
+            rate = odm.FloatField()
+
+            class Meta:
+                register = False
+
+        with self.assertRaises(FieldError):
+            AModel.objects.reindex('code')
+        with self.assertRaises(FieldError):
+            AModel.objects.reindex('rate')
+
+    def test_rebuild_views(self):
+        from stdnet import odm, FieldError
+        from djangostdnet import models
+        from djangostdnet.prefixes import prefix_key, prefix_values_key
+        from djangostdnet.sortedviews import view_key
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+            rank = odm.IntegerField()
+
+            class Meta:
+                sorted_views = ('-rank',)
+                prefix_indexes = ('name',)
+                register = False
+
+        objs = [AModel.objects.new(name='name%d' % i, rank=i) for i in range(5)]
+
+        # lost by a crash before their update, and stray entries of an object deleted meanwhile
+        meta = AModel._meta
+        backend = AModel.objects.backend
+        client = backend.client
+        name, rank = meta.dfields['name'], meta.dfields['rank']
+        client.delete(view_key(backend, meta, rank), prefix_key(backend, meta, name),
+                      prefix_values_key(backend, meta, name))
+        client.zadd(view_key(backend, meta, rank), 100, 99)
+        client.hset(prefix_values_key(backend, meta, name), 99, 'name99')
+        client.zadd(prefix_key(backend, meta, name), 0, b'name99\x0099')
+
+        self.assertEqual(AModel.objects.rebuild_views(chunk_size=2), 5)
+        self.assertEqual(AModel.objects.sorted_view('rank').top(2), [objs[4], objs[3]])
+        self.assertEqual(AModel.objects.sorted_view('rank').count(), 5)
+        self.assertEqual([obj.name for obj in AModel.objects.autocomplete('name', 'name', 10)],
+                         ['name%d' % i for i in range(5)])
+        self.assertEqual(client.hlen(prefix_values_key(backend, meta, name)), 5)
+
+        class BModel(models.Model):
+            name = odm.SymbolField()
+
+            class Meta:
+                register = False
+
+        with self.assertRaises(FieldError):
+            BModel.objects.rebuild_views()
@@ -0,0 +1,86 @@
+from .testcase import BaseTestCase
+
+
+class RelationCountsTestCase(BaseTestCase):
+    def test_relation_counts(self):
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AParentModel(models.Model):
+            name = odm.SymbolField()
+
+            class Meta:
+                register = False
+
+        class AChildModel(models.Model):
+            parent = odm.ForeignKey(AParentModel, related_name='children')
+
+            class Meta:
+                relation_counts = ('parent',)
+                register = False
+
+        parents = [AParentModel.objects.new(name=str(i)) for i in range(3)]
+        children = [AChildModel.objects.new(parent=parents[0]) for _ in range(3)]
+        AChildModel.objects.new(parent=parents[1])
+
+        self.assertEqual(parents[0].children_count, 3)
+        self.assertEqual(AChildModel.objects.relation_counts('parent', parents), [3, 1, 0])
+        self.assertEqual(AChildModel.objects.relation_counts('parent', [parents[2].id]), [0])
+
+        # relink
+        children[0].parent = parents[2]
+        children[0].save()
+        self.assertEqual(AChildModel.objects.relation_counts('parent', parents), [2, 1, 1])
+
+        children[1].delete()
+        self.assertEqual(parents[0].children_count, 1)
+
+    def test_field(self):
+        from stdnet import odm, FieldError
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+
+            class Meta:
+                register = False
+
+        with self.assertRaises(FieldError):
+            AModel.objects.relation_counts('name', [])
+
+    def test_django_model(self):
+        from django.db import models as dj_models
+        from djangostdnet import models
+
+        class ADjangoParentModel(dj_models.Model):
+            name = dj_models.CharField(max_length=255)
+
+        class ADjangoChildModel(dj_models.Model):
+            parent = dj_models.ForeignKey(ADjangoParentModel)
+
+        class AParentModel(models.Model):
+            class Meta:
+                django_model = ADjangoParentModel
+                register = False
+
+        class AChildModel(models.Model):
+            class Meta:
+                django_model = ADjangoChildModel
+                relation_counts = ('parent',)
+                register = False
+
+        self.create_table_for_model(ADjangoParentModel)
+        self.create_table_for_model(ADjangoChildModel)
+
+        parent_dj_obj1 = ADjangoParentModel.objects.create(name='parent1')
+        parent_dj_obj2 = ADjangoParentModel.objects.create(name='parent2')
+        child_dj_obj = ADjangoChildModel.objects.create(parent=parent_dj_obj1)
+        ADjangoChildModel.objects.create(parent=parent_dj_obj1)
+
+        parent_obj1 = AParentModel.objects.get(id=parent_dj_obj1.pk)
+        self.assertEqual(parent_obj1.achildmodel_parent_set_count, 2)
+
+        child_dj_obj.parent = parent_dj_obj2
+        child_dj_obj.save()
+        self.assertEqual(AChildModel.objects.relation_counts('parent', [parent_dj_obj1.pk, parent_dj_obj2.pk]),
+                         [1, 1])
@@ -4,7 +4,6 @@ from .testcase import BaseTestCase
 class SessionTestCase(BaseTestCase):
     def test_delete_quietly_when_stdnet_model_none(self):
         """possible case of redis-out"""
-        import redis
         from django.db import models as dj_models
         from djangostdnet import models
 
@@ -21,7 +20,76 @@ class SessionTestCase(BaseTestCase):
         obj = ADjangoModel.objects.create(name='obj1')
 
         # simulate lacking of object correspond to the obj as redis-out
-        r = redis.from_url(models.mapper._default_backend)
-        r.flushdb()
+        AModel.objects.backend.flush()
 
         AModel.objects.session().delete_from_django_object(AModel.objects, obj)
+
+    def test_add_from_django_object(self):
+        from django.db import models as dj_models
+        from stdnet import CommitException
+        from djangostdnet import models
+
+        class ADjangoModel(dj_models.Model):
+            name = dj_models.CharField(max_length=255, db_index=True)
+            code = dj_models.CharField(max_length=255, unique=True)
+            note = dj_models.CharField(max_length=255)
+
+        class AModel(models.Model):
+            class Meta:
+                django_model = ADjangoModel
+                register = False
+
+        self.create_table_for_model(ADjangoModel)
+
+        obj1 = ADjangoModel.objects.create(name='odd', code='a', note='note1')
+        obj2 = ADjangoModel.objects.create(name='odd', code='b', note='note2')
+        session = AModel.objects.session()
+
+        # nothing changed since saved
+        self.assertFalse(session.add_from_django_object(AModel.objects, obj1))
+
+        obj2.name = 'even'
+        obj2.code = 'c'
+        obj2.save()
+        self.assertEqual([obj.id for obj in AModel.objects.filter(name='odd')], [obj1.pk])
+        self.assertEqual([obj.id for obj in AModel.objects.filter(name='even')], [obj2.pk])
+        self.assertEqual(AModel.objects.get(code='c').note, 'note2')
+        with self.assertRaises(AModel.DoesNotExist):
+            AModel.objects.get(code='b')
+
+        with self.assertRaises(CommitException):
+            session.add_from_django_object(AModel.objects, ADjangoModel(pk=obj2.pk + 1, name='odd', code='a'))
+        self.assertEqual(AModel.objects.get(code='a').id, obj1.pk)
+        self.assertEqual(AModel.objects.query().count(), 2)
+
+    def test_keep_attributes_not_mirrored(self):
+        from django.db import models as dj_models
+        from stdnet import odm
+        from djangostdnet import models
+
+        class ADjangoModel(dj_models.Model):
+            name = dj_models.CharField(max_length=255, db_index=True)
+            note = dj_models.CharField(max_length=255)
+
+        class AModel(models.Model):
+            hits = odm.IntegerField(default=0)
+
+            class Meta:
+                django_model = ADjangoModel
+                sorted_views = ('-hits',)
+                register = False
+
+        self.create_table_for_model(ADjangoModel)
+
+        obj1 = ADjangoModel.objects.create(name='foo', note='note1')
+        obj2 = ADjangoModel.objects.create(name='bar', note='note2')
+        # changed on the redis side only
+        AModel.objects.incr(obj1.pk, 'hits', 3)
+
+        obj1.name = 'baz'
+        obj1.note = 'note3'
+        obj1.save()
+        instance = AModel.objects.get(id=obj1.pk)
+        self.assertEqual((instance.name, instance.note, instance.hits), ('baz', 'note3', 3))
+        self.assertEqual([obj.id for obj in AModel.objects.filter(name='baz')], [obj1.pk])
+        self.assertEqual([obj.id for obj in AModel.objects.sorted_view('hits').top(2)], [obj1.pk, obj2.pk])
@@ -0,0 +1,71 @@
+from io import BytesIO
+
+from .testcase import BaseTestCase
+
+
+class SnapshotTestCase(BaseTestCase):
+    def test_dump_and_load(self):
+        from stdnet import odm
+        from djangostdnet import models
+        from djangostdnet.snapshot import dump, load
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+            status = odm.SymbolField()
+
+            class Meta:
+                register = False
+
+        for i in range(10):
+            AModel.objects.new(name=str(i), status='new' if i < 6 else 'old')
+        manager = AModel.objects
+        backend = manager.backend
+        backend.client.pexpire(backend.basekey(AModel._meta, 'obj', 1), 100000)
+
+        fileobj = BytesIO()
+        header = dump([manager], fileobj, chunk_size=3)
+        self.assertEqual(header['models'], [str(AModel._meta)])
+
+        # lost, and written after the snapshot
+        backend.client.delete(backend.basekey(AModel._meta, 'obj', 2))
+        AModel.objects.new(name='10', status='new')
+
+        fileobj.seek(0)
+        load([manager], fileobj, chunk_size=3)
+        self.assertEqual(AModel.objects.query().count(), 10)
+        self.assertEqual(AModel.objects.filter(status='new').count(), 6)
+        self.assertEqual(AModel.objects.get(id=2).name, '1')
+        self.assertTrue(backend.client.pttl(backend.basekey(AModel._meta, 'obj', 1)) > 0)
+
+    def test_invalid(self):
+        from djangostdnet.snapshot import SnapshotError, load
+
+        with self.assertRaises(SnapshotError):
+            load([], BytesIO(b'not a snapshot'))
+
+    def test_catch_up(self):
+        from django.db import models as dj_models
+        from djangostdnet import models
+        from djangostdnet.snapshot import catch_up
+
+        class ADjangoModel(dj_models.Model):
+            name = dj_models.CharField(max_length=255)
+            updated = dj_models.IntegerField(default=0)
+
+        class AModel(models.Model):
+            class Meta:
+                django_model = ADjangoModel
+                register = False
+
+        self.create_table_for_model(ADjangoModel)
+        for i in range(5):
+            ADjangoModel.objects.create(name=str(i))
+
+        # changed and deleted without mirrored, as after a snapshot
+        with AModel._delete_gate:
+            ADjangoModel.objects.filter(name='0').delete()
+        ADjangoModel.objects.filter(name='1').update(name='one', updated=1)
+
+        self.assertEqual(catch_up(AModel.objects, 'updated', 1, chunk_size=2), (1, 1))
+        self.assertEqual(AModel.objects.query().count(), 4)
+        self.assertEqual(AModel.objects.get(id=ADjangoModel.objects.get(name='one').pk).name, 'one')
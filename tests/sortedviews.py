@@ -0,0 +1,122 @@
+from .testcase import BaseTestCase
+
+
+class SortedViewsTestCase(BaseTestCase):
+    def test_sorted_view(self):
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+            score = odm.IntegerField(index=False)
+
+            class Meta:
+                sorted_views = ('-score', 'name')
+                register = False
+
+        objs = [AModel.objects.new(name=name, score=score)
+                for name, score in [('a', 3), ('b', 10), ('c', 1), ('d', 7)]]
+
+        view = AModel.objects.sorted_view('score')
+        self.assertEqual(view.count(), 4)
+        self.assertEqual([obj.name for obj in view.top(2)], ['b', 'd'])
+        self.assertEqual([obj.name for obj in view.range(1, 2)], ['d', 'a'])
+        self.assertEqual(view.rank(objs[2]), 3)
+        self.assertEqual([obj.name for obj in view.range_by_value(min=3, max=7)], ['d', 'a'])
+
+        # updated by commits
+        obj = AModel.objects.get(id=objs[2].id)
+        obj.score = 20
+        obj.save()
+        self.assertEqual(view.rank(obj.id), 0)
+
+        objs[1].delete()
+        self.assertEqual(view.count(), 3)
+        self.assertEqual(view.rank(objs[1].id), None)
+
+        # by bulk update and counters
+        AModel.objects.filter(name='a').update(score=30)
+        self.assertEqual([obj.name for obj in view.top(1)], ['a'])
+        AModel.objects.incr(objs[3].id, 'score', 100)
+        self.assertEqual([obj.name for obj in view.top(3)], ['d', 'a', 'c'])
+
+        self.assertEqual([obj.name for obj in AModel.objects.sorted_view('name').range()], ['a', 'c', 'd'])
+
+        with self.assertRaises(KeyError):
+            AModel.objects.sorted_view('id')
+
+    def test_django_model(self):
+        from datetime import datetime, timedelta
+        from django.db import models as dj_models
+        from djangostdnet import models
+
+        class ADjangoModel(dj_models.Model):
+            name = dj_models.CharField(max_length=255)
+            published = dj_models.DateTimeField()
+
+        class AModel(models.Model):
+            class Meta:
+                django_model = ADjangoModel
+                sorted_views = ('-published',)
+                register = False
+
+        self.create_table_for_model(ADjangoModel)
+
+        now = datetime(2015, 1, 1)
+        for i in range(5):
+            ADjangoModel.objects.create(name=str(i), published=now + timedelta(days=i))
+
+        latest = AModel.objects.sorted_view('published')
+        self.assertEqual([obj.name for obj in latest.top(3)], ['4', '3', '2'])
+
+        ADjangoModel.objects.get(name='0').delete()
+        self.assertEqual(latest.count(), 4)
+
+    def test_synced_with_object(self):
+        import mock
+        from django.db import models as dj_models
+        from stdnet import odm
+        from djangostdnet import models
+
+        class ADjangoModel(dj_models.Model):
+            name = dj_models.CharField(max_length=255)
+            rank = dj_models.IntegerField()
+
+        class AModel(models.Model):
+            class Meta:
+                django_model = ADjangoModel
+                sorted_views = ('-rank',)
+                prefix_indexes = ('name',)
+                register = False
+
+        class BModel(models.Model):
+            name = odm.SymbolField()
+            rank = odm.IntegerField()
+
+            class Meta:
+                sorted_views = ('-rank',)
+                prefix_indexes = ('name',)
+                register = False
+
+        self.create_table_for_model(ADjangoModel)
+
+        # as a crash right after the write, before the updates following a commit
+        with mock.patch('djangostdnet.models.update_sorted_views'), \
+                mock.patch('djangostdnet.models.update_prefix_indexes'):
+            dj_obj = ADjangoModel.objects.create(name='foo', rank=1)
+            dj_obj.name = 'food'
+            dj_obj.rank = 3
+            dj_obj.save()
+            BModel.objects.new(name='bar', rank=2)
+
+        # written by the script syncing the row
+        self.assertEqual([obj.name for obj in AModel.objects.sorted_view('rank').top(2)], ['food'])
+        self.assertEqual(AModel.objects.sorted_view('rank').range_by_value(min=2)[0].id, dj_obj.pk)
+        self.assertEqual([obj.name for obj in AModel.objects.autocomplete('name', 'foo', 10)], ['food'])
+
+        # left to the updates following the commit, until rebuilt
+        self.assertEqual(BModel.objects.sorted_view('rank').count(), 0)
+        self.assertEqual(list(BModel.objects.autocomplete('name', 'ba', 10)), [])
+        BModel.objects.rebuild_views()
+        self.assertEqual([obj.name for obj in BModel.objects.sorted_view('rank').top(2)], ['bar'])
+        self.assertEqual([obj.name for obj in BModel.objects.autocomplete('name', 'ba', 10)], ['bar'])
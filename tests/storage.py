@@ -0,0 +1,86 @@
+from .testcase import BaseTestCase
+
+
+class StorageTestCase(BaseTestCase):
+    def test_blob(self):
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+            body = odm.CharField()
+            score = odm.FloatField(index=False)
+            count = odm.IntegerField(index=False)
+
+            class Meta:
+                storage = 'blob'
+                register = False
+
+        self.assertEqual([field.name for field in AModel._packed_fields], ['body', 'score', 'count'])
+        obj = AModel.objects.new(name='a', body=u'あ', score=0.1, count=3)
+
+        backend = AModel.objects.backend
+        stored = backend.client.hgetall(backend.basekey(AModel._meta, 'obj', obj.id))
+        self.assertEqual(sorted(stored), [b'_blob', b'name'])
+
+        obj = AModel.objects.get(name='a')
+        self.assertEqual((obj.body, obj.score, obj.count), (u'あ', 0.1, 3))
+        self.assertEqual(list(AModel.objects.values_list('body', 'count')), [(u'あ', 3)])
+        self.assertNotIn('_blob', next(AModel.objects.query().values())._fields)
+
+        # partial load and save keeps the rest of packed fields
+        obj = AModel.objects.load_only('count').get(name='a')
+        obj.count = 4
+        obj.save()
+        obj = AModel.objects.get(name='a')
+        self.assertEqual((obj.body, obj.score, obj.count), (u'あ', 0.1, 4))
+
+    def test_unsupported(self):
+        from stdnet import odm, FieldError, QuerySetError
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+            count = odm.IntegerField(index=False)
+
+            class Meta:
+                storage = 'blob'
+                register = False
+
+        AModel.objects.new(name='a', count=1)
+        with self.assertRaises(QuerySetError):
+            AModel.objects.query().update(count=2)
+        with self.assertRaises(QuerySetError):
+            AModel.objects.query().sort_by('count')
+        with self.assertRaises(FieldError):
+            AModel.objects.incr(1, 'count')
+
+    def test_migrate(self):
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+            body = odm.CharField()
+
+            class Meta:
+                storage = 'blob'
+                register = False
+
+        for i in range(5):
+            AModel.objects.new(name=str(i), body='body %d' % i)
+
+        # back to plain attributes as the storage of fields would migrate
+        backend = AModel.objects.backend
+        client = backend.client
+        prefix = backend.basekey(AModel._meta, 'obj', '')
+        self.assertEqual(client.execute_script('djangostdnet_storage_migrate', (), prefix, '_blob', 0,
+                                               *range(1, 6)), 5)
+        self.assertEqual(sorted(client.hgetall(prefix + '1')), [b'body', b'name'])
+        # read from plain attributes before migrated
+        self.assertEqual(AModel.objects.get(name='3').body, 'body 3')
+
+        self.assertEqual(AModel.objects.migrate_storage(chunk_size=2), 5)
+        self.assertEqual(sorted(client.hgetall(prefix + '1')), [b'_blob', b'name'])
+        self.assertEqual(AModel.objects.get(name='3').body, 'body 3')
+        self.assertEqual(AModel.objects.migrate_storage(), 0)
@@ -1,4 +1,5 @@
 from distutils.version import LooseVersion
+import uuid
 from django.test import TestCase
 
 
@@ -8,10 +9,20 @@ class BaseTestCase(TestCase):
     def _setup_redis_db(self):
         from djangostdnet import models
         from djangostdnet import mapper
-        from . import redis_server_info
+        from . import redis_server_info, test_backend
 
-        models.mapper = mapper.Mapper(default_backend='redis://%(host)s:%(port)d?db=%(db)d' % redis_server_info,
-                                      install_global=True)
+        # keys of each test are in its own namespace, so tests may run in parallel on a server
+        self.test_key = uuid.uuid4().hex
+        if test_backend == 'memory':
+            backend_url = 'memory://%s?db=0&namespace=test.%s:' % (self.test_key, self.test_key)
+        else:
+            backend_url = 'redis://%s:%d?db=%d&namespace=test.%s:' % (redis_server_info['host'],
+                                                                     redis_server_info['port'],
+                                                                     redis_server_info['db'],
+                                                                     self.test_key)
+        # as connection strings of backends are
+        backend_url = mapper.getdb(backend_url).connection_string
+        models.mapper = mapper.Mapper(default_backend=backend_url, install_global=True)
 
     def setUp(self):
         from django.core.management.color import no_style
@@ -53,11 +64,16 @@ class BaseTestCase(TestCase):
         globals._model_dict.clear()
 
     def _clear_redis_db(self):
-        import redis
-        from . import redis_server_info
+        from djangostdnet import models
+        from djangostdnet import mapper
+        from . import test_backend
 
-        r = redis.from_url('redis://%(host)s:%(port)d?db=%(db)d' % redis_server_info)
-        r.flushdb()
+        if test_backend == 'memory':
+            from djangostdnet import inmemory
+            inmemory.drop_server(self.test_key)
+        else:
+            # keys of the namespace of the test only
+            mapper.getdb(models.mapper._default_backend).flush()
 
     def tearDown(self):
         self._clear_registered_models()
@@ -0,0 +1,48 @@
+from .testcase import BaseTestCase
+
+
+class ToJSONTestCase(BaseTestCase):
+    def test_same_as_instance(self):
+        from datetime import date
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+            value = odm.FloatField()
+            flag = odm.BooleanField()
+            day = odm.DateField(required=False)
+
+            class Meta:
+                ordering = 'id'
+                register = False
+
+        AModel.objects.new(name='foo', value=1.5, flag=True, day=date(2015, 1, 2))
+        AModel.objects.new(name='bar', value=2, flag=False)
+
+        self.assertEqual(list(AModel.objects.tojson(chunk_size=1)),
+                         [obj.tojson() for obj in AModel.objects.query().sort_by('id')])
+
+        self.assertEqual(list(AModel.objects.filter(name='bar').tojson('name', 'value')),
+                         [{'name': 'bar', 'value': 2.0}])
+
+    def test_foreign_key(self):
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+
+            class Meta:
+                register = False
+
+        class BModel(models.Model):
+            a = odm.ForeignKey(AModel)
+
+            class Meta:
+                register = False
+
+        a = AModel.objects.new(name='foo')
+        b = BModel.objects.new(a=a)
+        self.assertEqual(list(BModel.objects.tojson()), [b.tojson()])
+        self.assertEqual(list(BModel.objects.tojson()), [{'id': b.id, 'a': a.id}])
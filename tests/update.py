@@ -0,0 +1,81 @@
+from .testcase import BaseTestCase
+
+
+class UpdateTestCase(BaseTestCase):
+    def test_update(self):
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+            status = odm.SymbolField()
+            count = odm.IntegerField()
+
+            class Meta:
+                register = False
+
+        for i in range(5):
+            AModel.objects.new(name=str(i), status='new' if i < 3 else 'done', count=i)
+
+        self.assertEqual(AModel.objects.filter(status='new').update(status='done', count=10), 3)
+
+        self.assertEqual(AModel.objects.filter(status='new').count(), 0)
+        self.assertEqual(AModel.objects.filter(status='done').count(), 5)
+        self.assertEqual(sorted(obj.count for obj in AModel.objects.all()), [3, 4, 10, 10, 10])
+
+        self.assertEqual(AModel.objects.filter(status='none').update(status='new'), 0)
+
+    def test_ordering(self):
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+            rank = odm.IntegerField()
+
+            class Meta:
+                ordering = 'rank'
+                register = False
+
+        for i in range(3):
+            AModel.objects.new(name=str(i), rank=i)
+
+        AModel.objects.filter(name='0').update(rank=10)
+        self.assertEqual([obj.name for obj in AModel.objects.all()], ['1', '2', '0'])
+        self.assertEqual([obj.name for obj in AModel.objects.filter(name__in=['0', '2'])], ['2', '0'])
+
+    def test_unique(self):
+        from stdnet import odm, QuerySetError
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            code = odm.SymbolField(unique=True)
+
+            class Meta:
+                register = False
+
+        with self.assertRaises(QuerySetError):
+            AModel.objects.update(code='a')
+
+    def test_django_model(self):
+        from django.db import models as dj_models
+        from djangostdnet import models
+
+        class ADjangoModel(dj_models.Model):
+            name = dj_models.CharField(max_length=255)
+            status = dj_models.CharField(max_length=255, db_index=True)
+
+        class AModel(models.Model):
+            class Meta:
+                django_model = ADjangoModel
+                register = False
+
+        self.create_table_for_model(ADjangoModel)
+
+        for i in range(3):
+            ADjangoModel.objects.create(name=str(i), status='new' if i < 2 else 'old')
+
+        self.assertEqual(AModel.objects.filter(status='new').update(status='done'), 2)
+        self.assertEqual(sorted(ADjangoModel.objects.filter(status='done').values_list('name', flat=True)),
+                         ['0', '1'])
+        self.assertEqual(AModel.objects.filter(status='done').count(), 2)
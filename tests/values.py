@@ -0,0 +1,93 @@
+from .testcase import BaseTestCase
+
+
+class ValuesTestCase(BaseTestCase):
+    def test_values_list(self):
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+            value = odm.IntegerField()
+
+            class Meta:
+                register = False
+
+        for i in range(5):
+            AModel.objects.new(name=str(i), value=i * 10)
+
+        rows = list(AModel.objects.values_list('name', 'value', chunk_size=2))
+        self.assertEqual(sorted(rows), [(str(i), i * 10) for i in range(5)])
+
+        names = list(AModel.objects.filter(value__gt=20).values_list('name', flat=True))
+        self.assertEqual(sorted(names), ['3', '4'])
+
+        rows = list(AModel.objects.values_list())
+        self.assertEqual(sorted(rows), sorted((obj.id, obj.name, obj.value) for obj in AModel.objects.all()))
+
+        with self.assertRaises(TypeError):
+            AModel.objects.values_list('name', 'value', flat=True)
+
+    def test_values(self):
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+            value = odm.IntegerField()
+
+            class Meta:
+                ordering = '-value'
+                register = False
+
+        for i in range(5):
+            AModel.objects.new(name=str(i), value=i * 10)
+
+        rows = list(AModel.objects.values('id', 'name', chunk_size=2))
+        self.assertEqual([row.name for row in rows], ['4', '3', '2', '1', '0'])
+        self.assertIsInstance(rows[0], tuple)
+        with self.assertRaises(AttributeError):
+            rows[0].name = 'foo'
+
+        rows = list(AModel.objects.query().sort_by('name').values('value', chunk_size=2))
+        self.assertEqual([row.value for row in rows], [0, 10, 20, 30, 40])
+
+    def test_foreign_key(self):
+        from stdnet import odm
+        from djangostdnet import models
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+
+            class Meta:
+                register = False
+
+        class BModel(models.Model):
+            a = odm.ForeignKey(AModel)
+
+            class Meta:
+                register = False
+
+        a = AModel.objects.new(name='foo')
+        BModel.objects.new(a=a)
+        self.assertEqual(list(BModel.objects.values_list('a', flat=True)), [a.id])
+
+    def test_ttl(self):
+        from freezegun import freeze_time
+        from stdnet import odm
+        from djangostdnet import models, ttl as ttl_mod
+
+        class AModel(models.Model):
+            name = odm.SymbolField()
+            ttl = ttl_mod.TTLField()
+
+            manager_class = ttl_mod.TTLManager
+
+            class Meta:
+                register = False
+
+        AModel.objects.new(name='foo', ttl=100)
+        with freeze_time('1970-01-01'):
+            AModel.objects.new(name='bar', ttl=100)
+
+        self.assertEqual(list(AModel.objects.values_list('name', flat=True)), ['foo'])